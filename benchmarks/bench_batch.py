@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one command over a fleet of projects with xcode_batch.
+
+Writes N synthetic projects of mixed sizes into a temporary tree and runs
+the same remove on all of them, once in this process one after another and
+once through the process pool, and compares both with the slowest single
+project (the best the pool can do). The snapshot cache is off so every run
+parses.
+
+Usage: python3 benchmarks/bench_batch.py [num_projects] [jobs]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project, shape_for
+from xcode_batch import find_projects, run_batch
+
+SIZES = [1000, 5000, 20000, 50000]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    os.environ['XCODE_CACHE_MB'] = '0'
+    with tempfile.TemporaryDirectory() as tmp:
+        texts = {size: generate_project(**shape_for(size)) for size in SIZES}
+        for i in range(count):
+            bundle = os.path.join(tmp, f'App{i}', f'App{i}.xcodeproj')
+            os.makedirs(bundle)
+            with open(os.path.join(bundle, 'project.pbxproj'), 'w', encoding='utf-8') as f:
+                f.write(texts[SIZES[i % len(SIZES)]])
+        projects = find_projects(os.path.join(tmp, '**', '*.xcodeproj'))
+        print(f"{len(projects)} projects of {', '.join(map(str, SIZES))} objects, {jobs} jobs")
+
+        # Each run removes a different file, so every one of them writes
+        start = time.perf_counter()
+        serial = run_batch(projects, 'remove', ['File1.swift'], jobs=1)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pooled = run_batch(projects, 'remove', ['File2.swift'], jobs=jobs)
+        pooled_time = time.perf_counter() - start
+
+        assert all(r['status'] == 'ok' for r in serial + pooled)
+        slowest = max(r['seconds'] for r in pooled)
+        print(f"serial:  {serial_time:.2f}s")
+        print(f"pool:    {pooled_time:.2f}s ({serial_time / pooled_time:.1f}x)")
+        print(f"slowest: {slowest:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: adding N files through ProjectTransaction vs. per-file string edits.
+
+The transaction applies the whole batch to the object table and writes the
+project once, so its cost should stay roughly flat as the batch grows. The
+legacy approach (one content.replace per section per file, as the old
+add_files_to_xcode.py did) copies the whole project text for every file.
+
+Usage: python3 benchmarks/bench_batch_add.py [existing_files]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project, phase_id, target_group_id
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+GROUP_ID = target_group_id(0)
+PHASE_ID = phase_id(0, 'Sources')
+BATCH_SIZES = [1, 10, 50, 100, 500, 1000]
+
+
+def make_project(num_files):
+    """Return a one-target project text with num_files Swift files in one group."""
+    return generate_project(num_files, phases=('Sources',))
+
+
+def add_with_transaction(path, batch):
+    project = XcodeProject.load(path, cache=False)
+    txn = ProjectTransaction(project)
+    for i in range(batch):
+        txn.add_file(f'Generated{i}.swift', GROUP_ID, PHASE_ID,
+                     ref_id=f'E{i:023X}', build_file_id=f'F{i:023X}')
+    txn.commit()
+
+
+def add_with_string_edits(path, batch):
+    """The pre-transaction approach: one full-text copy per section per file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for i in range(batch):
+        name = f'Generated{i}.swift'
+        ref_id, build_id = f'E{i:023X}', f'F{i:023X}'
+        content = content.replace(
+            '/* End PBXBuildFile section */',
+            f'\t\t{build_id} /* {name} in Sources */ = {{isa = PBXBuildFile; fileRef = {ref_id} /* {name} */; }};\n'
+            '/* End PBXBuildFile section */')
+        content = content.replace(
+            '/* End PBXFileReference section */',
+            f'\t\t{ref_id} /* {name} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; '
+            f'path = {name}; sourceTree = "<group>"; }};\n/* End PBXFileReference section */')
+        content = content.replace('\t\t\t);\n\t\t\tpath = App;',
+                                  f'\t\t\t\t{ref_id} /* {name} */,\n\t\t\t);\n\t\t\tpath = App;')
+        content = content.replace('\t\t\t);\n\t\t\trunOnlyForDeploymentPostprocessing',
+                                  f'\t\t\t\t{build_id} /* {name} in Sources */,\n'
+                                  '\t\t\t);\n\t\t\trunOnlyForDeploymentPostprocessing')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def timed(func, text, batch):
+    with tempfile.NamedTemporaryFile('w', suffix='.pbxproj', delete=False) as f:
+        f.write(text)
+        path = f.name
+    try:
+        start = time.perf_counter()
+        func(path, batch)
+        return time.perf_counter() - start
+    finally:
+        os.unlink(path)
+
+
+def main():
+    existing = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = make_project(existing)
+    print(f"Project: {existing} existing files, {len(text) / 1e6:.1f} MB")
+    print(f"{'batch':>6} {'transaction s':>14} {'string edits s':>15} {'txn ms/file':>12} {'edits ms/file':>14}")
+    for batch in BATCH_SIZES:
+        txn = timed(add_with_transaction, text, batch)
+        edits = timed(add_with_string_edits, text, batch)
+        print(f"{batch:>6} {txn:>14.3f} {edits:>15.3f} {txn / batch * 1000:>12.2f} {edits / batch * 1000:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark: duplicate-ID and dangling-reference scan on a large project.
+
+Builds a synthetic project of about 50 MB, times xcode_dedupe.analyze on the
+clean text, then injects colliding IDs and dangling entries and times the
+scan plus repair.
+
+Usage: python3 benchmarks/bench_dedupe.py [existing_files]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_batch_add import make_project
+from xcode_dedupe import analyze, repair
+
+
+def corrupt(text, count):
+    """Make count build files reuse file reference IDs, plus dangling entries."""
+    for i in range(count):
+        text = text.replace(f'\t\tD{i:023X} /*', f'\t\tC{i:023X} /*', 1)
+        text = text.replace(f'\t\t\t\tD{i:023X} /*', f'\t\t\t\tC{i:023X} /*', 1)
+    return text.replace('\t\t\t\tC00000000000000000000000 /* File0.swift */,\n',
+                        '\t\t\t\tC00000000000000000000000 /* File0.swift */,\n'
+                        '\t\t\t\tDEADBEEFDEADBEEFDEADBEEF /* Gone.swift */,\n', 1)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 115000
+    text = make_project(num_files)
+    print(f"Project: {num_files} files, {len(text) / 1e6:.1f} MB")
+
+    report, elapsed = timed(analyze, text)
+    assert not report['definitions'] and not report['dangling_entries']
+    print(f"clean scan:        {elapsed:.3f}s")
+
+    text = corrupt(text, 100)
+    report, scan = timed(analyze, text)
+    (fixed, remap), fix = timed(repair, text, report)
+    print(f"corrupted scan:    {scan:.3f}s ({len(report['definitions'])} duplicate IDs, "
+          f"{len(report['dangling_entries'])} dangling entries)")
+    print(f"repair:            {fix:.3f}s")
+    report = analyze(fixed)
+    assert not report['definitions'] and not report['dangling_entries']
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: structural diff of two large project versions with xcode_diff.
+
+Generates a synthetic project and a second version that adds batch files
+and removes as many others, then times the diff of the two and of the
+first against itself (hashing only) against reading both files and one
+full parse. The changed objects include the Sources phase, whose decoding
+makes up most of the difference between the two diffs.
+
+Usage: python3 benchmarks/bench_diff.py [objects] [batch]
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project, phase_id, shape_for, target_group_id
+from xcode_diff import diff_files
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+
+def main():
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 250000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    text = generate_project(**shape_for(objects))
+    project = XcodeProject.parse(text)
+    txn = ProjectTransaction(project, deterministic_ids=True)
+    for i in range(batch):
+        txn.add_file(f'Added{i}.swift', target_group_id(0), phase_id(0))
+    txn.remove_files_named([f'File{i}.swift' for i in range(batch)])
+    txn.apply()
+    changed = project.to_string()
+    count = len(project.objects)
+    # Not kept alive: a large heap makes every cyclic GC run in the diff slower
+    del project, txn
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path = os.path.join(tmp, 'old.pbxproj')
+        new_path = os.path.join(tmp, 'new.pbxproj')
+        for path, content in ((old_path, text), (new_path, changed)):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        print(f"{count} objects, {len(text) / 1e6:.1f} MB per version")
+
+        start = time.perf_counter()
+        for path in (old_path, new_path):
+            with open(path, 'r', encoding='utf-8') as f:
+                f.read()
+        read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        XcodeProject.parse(text)
+        parse = time.perf_counter() - start
+        gc.collect()
+
+        start = time.perf_counter()
+        diff_files(old_path, old_path)
+        same = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report = diff_files(old_path, new_path)
+        diffed = time.perf_counter() - start
+        print(f"read both:      {read:.2f}s")
+        print(f"one parse:      {parse:.2f}s")
+        print(f"diff, same:     {same:.2f}s")
+        print(f"diff, changed:  {diffed:.2f}s ({len(report['added'])} added, "
+              f"{len(report['removed'])} removed, {len(report['modified'])} modified)")
+
+
+if __name__ == '__main__':
+    main()
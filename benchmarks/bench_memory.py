@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory held by a parsed project.
+
+Parses a synthetic project (100k files by default) under tracemalloc and
+reports what the XcodeProject holds on top of the text it was parsed from,
+in total and per object, and the peak while parsing; then the same for a
+load from the xcode_cache snapshot. For comparison the object table is
+also copied with marshal version 2, which writes no back-references, so
+the copy has a separate string for every ID, key and value, as a parser
+that shares none of them would produce.
+
+Usage: python3 benchmarks/bench_memory.py [files]
+"""
+
+import gc
+import marshal
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project
+from xcode_project import XcodeProject
+
+
+def measured(func, *args):
+    """Return (result, bytes still allocated, peak bytes) for func(*args)."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    return result, current - before, peak - before
+
+
+def copied(objects, version):
+    """Return a copy of the object table through marshal at the given version."""
+    return marshal.loads(marshal.dumps(objects, version))
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    text = generate_project(files=files, groups=files // 100, targets=4)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['XCODE_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        path = os.path.join(tmp, 'project.pbxproj')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        XcodeProject.load(path)
+
+        tracemalloc.start()
+        project, held, peak = measured(XcodeProject.parse, text)
+        objects = len(project.objects)
+        print(f"{files} files, {objects} objects, text {len(text) / 1e6:.1f} MB")
+        print(f"parsed:        {held / 1e6:>7.1f} MB ({held / objects:.0f} B/object, "
+              f"{held / len(text):.1f}x the text), peak {peak / 1e6:.1f} MB")
+
+        object_table = project.objects
+        _, table, _ = measured(copied, object_table, marshal.version)
+        _, unshared, _ = measured(copied, object_table, 2)
+        print(f"object table:  {table / 1e6:>7.1f} MB, {unshared / 1e6:.1f} MB with no strings shared")
+        del project, object_table
+
+        loaded, held, peak = measured(XcodeProject.load, path)
+        held -= len(loaded.source)
+        print(f"cached load:   {held / 1e6:>7.1f} MB ({held / objects:.0f} B/object), "
+              f"peak {peak / 1e6:.1f} MB")
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    main()
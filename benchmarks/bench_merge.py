@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the structural three-way merge in xcode_merge.
+
+Generates a synthetic project as the base, lets "ours" add files and
+"theirs" add and remove others, and times the merge with every version
+parsed (snapshot cache off) and with base and ours already cached, which
+is the usual case during a rebase.
+
+Usage: python3 benchmarks/bench_merge.py [objects] [batch]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project, phase_id, shape_for, target_group_id
+from xcode_merge import merge_files
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+
+def main():
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    batch = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    text = generate_project(**shape_for(objects))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['XCODE_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        os.environ['XCODE_JOURNAL_MB'] = '0'
+        paths = {}
+        for side in ('base', 'ours', 'theirs'):
+            paths[side] = os.path.join(tmp, side)
+            with open(paths[side], 'w', encoding='utf-8') as f:
+                f.write(text)
+        txn = ProjectTransaction(paths['ours'])
+        for i in range(batch):
+            txn.add_file(f'Ours{i}.swift', target_group_id(0), phase_id(0))
+        txn.commit()
+        txn = ProjectTransaction(paths['theirs'])
+        for i in range(batch):
+            txn.add_file(f'Theirs{i}.swift', target_group_id(0), phase_id(0))
+        txn.remove_files_named([f'File{i}.swift' for i in range(batch, 2 * batch)])
+        txn.commit()
+        output = os.path.join(tmp, 'merged')
+
+        start = time.perf_counter()
+        XcodeProject.parse(text)
+        parse = time.perf_counter() - start
+
+        os.environ['XCODE_CACHE_MB'] = '0'
+        start = time.perf_counter()
+        conflicts, _ = merge_files(paths['base'], paths['ours'], paths['theirs'], output)
+        cold = time.perf_counter() - start
+        assert not conflicts
+
+        del os.environ['XCODE_CACHE_MB']
+        XcodeProject.load(paths['base'])
+        XcodeProject.load(paths['ours'])
+        start = time.perf_counter()
+        merge_files(paths['base'], paths['ours'], paths['theirs'], output)
+        warm = time.perf_counter() - start
+
+    print(f"{objects} objects, {batch} files added on each side, {batch} removed by theirs")
+    print(f"one parse:               {parse:.2f}s")
+    print(f"merge, nothing cached:   {cold:.2f}s")
+    print(f"merge, base+ours cached: {warm:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
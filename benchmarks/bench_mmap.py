@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory of the memory-mapped view vs. the full parser.
+
+Writes a synthetic project with N files (100k by default) and, in a fresh
+interpreter per approach, resolves the on-disk path of every file
+reference, reporting peak RSS and wall time:
+
+- read:   f.read() plus split('\\n'), what the line-based scripts start with
+- full:   XcodeProject.load, as the current scripts do
+- mapped: MappedProject, decoding each object only while it is used
+
+Usage: python3 benchmarks/bench_mmap.py [num_files]
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from synthetic_project import write_project
+
+MODES = ['read', 'full', 'mapped']
+FILES_PER_GROUP = 500
+
+
+def child(mode, path):
+    """Run one approach and print "peak_kb seconds count"."""
+    from xcode_mmap import MappedProject
+    from xcode_project import XcodeProject
+
+    start = time.perf_counter()
+    if mode == 'read':
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        count = sum(1 for line in lines if 'isa = PBXFileReference' in line)
+    elif mode == 'full':
+        project = XcodeProject.load(path, cache=False)
+        count = sum(1 for ref_id in project.by_isa.get('PBXFileReference', ())
+                    if project.source_path(ref_id))
+    else:
+        with MappedProject(path) as project:
+            count = sum(1 for ref_id in project.by_isa.get('PBXFileReference', ())
+                        if project.source_path(ref_id))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(peak, f"{elapsed:.3f}", count)
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+        return
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'project.pbxproj')
+        with open(path, 'w', encoding='utf-8') as f:
+            write_project(f, num_files, groups=num_files // FILES_PER_GROUP)
+        size = os.path.getsize(path)
+        print(f"Project: {num_files} files, {size / 1e6:.1f} MB")
+
+        idle = subprocess.run([sys.executable, '-c',
+                               'import resource; print(resource.getrusage('
+                               'resource.RUSAGE_SELF).ru_maxrss)'],
+                              capture_output=True, text=True, check=True)
+        print(f"interpreter:  {int(idle.stdout) / 1024:7.1f} MB")
+        for mode in MODES:
+            result = subprocess.run([sys.executable, os.path.abspath(__file__),
+                                     '--child', mode, path],
+                                    capture_output=True, text=True, check=True)
+            peak, elapsed, count = result.stdout.split()
+            print(f"{mode + ':':13} {int(peak) / 1024:7.1f} MB peak RSS, {elapsed}s "
+                  f"({count} file references)")
+
+
+if __name__ == '__main__':
+    main()
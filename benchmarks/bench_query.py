@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: xcode_query on a large synthetic project.
+
+Drops every tenth source file from its Sources phase (so "unbuilt" has
+something to find), stores the project's snapshot in a temporary cache and
+times the cached load every query starts with, then each query on the
+loaded project. The files are not on disk, so "missing" reports all of them.
+
+Usage: python3 benchmarks/bench_query.py [objects]
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project, shape_for, target_name
+from xcode_project import XcodeProject
+from xcode_query import ProjectQuery
+
+# Phase entries of build files D...0, D...A, D...14, ...: every tenth file
+_ENTRY_RE = re.compile(r'\t\t\t\tD[0-9A-F]{23} /\* File(\d+)0\.swift in Sources \*/,\n')
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    count = f"  ({len(result)} results)" if isinstance(result, (list, dict)) else ''
+    print(f"{label:<22} {elapsed * 1000:>9.1f} ms{count}")
+    return result
+
+
+def main():
+    objects = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    shape = shape_for(objects)
+    text = _ENTRY_RE.sub('', generate_project(**shape))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['XCODE_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        path = os.path.join(tmp, 'project.pbxproj')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"{objects} objects, {len(text) / 1e6:.1f} MB")
+        XcodeProject.load(path)
+
+        project = timed('load (cached)', XcodeProject.load, path)
+        queries = ProjectQuery(project)
+        names = [f'File{i}.swift' for i in range(0, shape['files'], shape['files'] // 10)]
+        timed('targets (1 name)', project.find_file_references_many, names[:1])
+        timed('targets (10 names)', project.find_file_references_many, names)
+        timed('files App Sources', queries.files_of_target,
+              project.ids_with_isa('PBXNativeTarget')[0], 'Sources')
+        timed('unbuilt', queries.unbuilt)
+        timed(f'unbuilt {target_name(1)}', queries.unbuilt, target_name(1))
+        timed('missing', queries.missing, tmp)
+        timed('orphans', queries.orphans)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resolving many file names to references before a bulk remove.
+
+Compares one find_file_references call per name (one pass over every
+reference path per name) with a single find_file_references_many call
+(one Aho-Corasick scan for all names), then times the cascading removal.
+
+Usage: python3 benchmarks/bench_remove.py [existing_files]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_batch_add import make_project
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+NAME_COUNTS = [1, 10, 100, 500]
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    project = XcodeProject.parse(make_project(num_files))
+    print(f"Project: {num_files} files")
+    print(f"{'names':>6} {'per-name':>10} {'one scan':>10} {'remove':>10}")
+    for count in NAME_COUNTS:
+        names = [f'File{i * (num_files // count)}.swift' for i in range(count)]
+
+        start = time.perf_counter()
+        per_name = {name: project.find_file_references(name) for name in names}
+        looped = time.perf_counter() - start
+
+        start = time.perf_counter()
+        resolved = project.find_file_references_many(names)
+        scanned = time.perf_counter() - start
+        assert resolved == per_name
+
+        scratch = XcodeProject.parse(project.to_string())
+        start = time.perf_counter()
+        txn = ProjectTransaction(scratch)
+        txn.remove_files_named(names)
+        txn.apply()
+        removed = time.perf_counter() - start
+        print(f"{count:>6} {looped:>9.3f}s {scanned:>9.3f}s {removed:>9.3f}s")
+
+
+if __name__ == '__main__':
+    main()
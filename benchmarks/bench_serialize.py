@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark: minimal-diff splice serializer vs. full re-serialization.
+
+Parses a synthetic project, adds one file through a transaction and times
+to_string() (which copies untouched objects from the original text) against
+to_string(full=True), reporting how many lines each output differs from the
+input by.
+
+Usage: python3 benchmarks/bench_serialize.py [existing_files]
+"""
+
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from bench_batch_add import GROUP_ID, PHASE_ID, make_project
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+
+def changed_lines(before, after):
+    diff = difflib.unified_diff(before.splitlines(), after.splitlines(), lineterm='', n=0)
+    return sum(1 for line in diff if line[:1] in '+-' and line[:3] not in ('+++', '---'))
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text = make_project(num_files)
+    print(f"Project: {num_files} files, {len(text) / 1e6:.1f} MB")
+
+    project = XcodeProject.parse(text)
+    start = time.perf_counter()
+    assert project.to_string() == text
+    print(f"no-op splice:      {time.perf_counter() - start:.3f}s (identical)")
+
+    txn = ProjectTransaction(project)
+    txn.add_file('OneMore.swift', GROUP_ID, PHASE_ID)
+    txn.apply()
+
+    start = time.perf_counter()
+    full = project.to_string(full=True)
+    print(f"full serialize:    {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    spliced = project.to_string()
+    print(f"splice serialize:  {time.perf_counter() - start:.3f}s")
+    assert spliced == full
+    print(f"lines changed by a one-file add: {changed_lines(text, spliced)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: build setting edits across many targets with xcode_settings.
+
+Generates a project with many targets, then times setting two build
+settings in every target configuration in one transaction against one
+transaction (and write) per target, as a script calling the tool once per
+target would; both start from one parse. Then times the shared-settings
+analysis and a hoist of what every target configuration shares into an
+.xcconfig.
+
+Usage: python3 benchmarks/bench_settings.py [targets] [files]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import generate_project, target_name
+from xcode_project import XcodeProject
+from xcode_settings import edit_settings, hoist_settings, select_configurations, shared_settings
+from xcode_transaction import ProjectTransaction
+
+CHANGES = {'SWIFT_VERSION': '6.0', 'SWIFT_STRICT_CONCURRENCY': 'complete'}
+
+
+def main():
+    targets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    text = generate_project(files=files, groups=targets, targets=targets)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['XCODE_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        os.makedirs(os.path.join(tmp, 'App.xcodeproj'))
+        path = os.path.join(tmp, 'App.xcodeproj', 'project.pbxproj')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        project = XcodeProject.parse(text)
+        print(f"{targets} targets, {len(project.objects)} objects, {len(text) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        txn = ProjectTransaction(XcodeProject.parse(text))
+        queued = edit_settings(txn, [c for c, _ in select_configurations(txn.project)], CHANGES)
+        txn.commit(path)
+        bulk = time.perf_counter() - start
+        print(f"one transaction:     {bulk:.2f}s ({len(queued)} settings)")
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        start = time.perf_counter()
+        project = XcodeProject.parse(text)
+        for t in range(targets):
+            txn = ProjectTransaction(project)
+            selection = select_configurations(project, [target_name(t)])
+            edit_settings(txn, [c for c, _ in selection], CHANGES)
+            txn.commit(path)
+        each = time.perf_counter() - start
+        print(f"one per target:      {each:.2f}s ({each / bulk:.0f}x)")
+
+        project = XcodeProject.load(path)
+        start = time.perf_counter()
+        shared = shared_settings(project, [c for c, _ in select_configurations(project)])
+        print(f"shared analysis:     {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"({len(shared)} shared settings)")
+
+        start = time.perf_counter()
+        txn = ProjectTransaction(project)
+        result = hoist_settings(path, 'Shared.xcconfig', select_configurations(project), txn=txn)
+        hoist = time.perf_counter() - start
+        print(f"hoist:               {hoist:.2f}s ({len(result['settings'])} settings, "
+              f"{len(text) - os.path.getsize(path)} bytes smaller)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: scanning a large source tree for xcode_sync.
+
+Creates a temporary tree of N Swift files spread over nested directories and
+times the thread-pool scan against scan_sources with one worker and a bare
+serial os.walk (which skips the per-entry classification), then times planning a
+sync against a project that references every file.
+
+Usage: python3 benchmarks/bench_sync.py [num_files]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from xcode_project import XcodeProject
+from xcode_sync import plan_sync, scan_sources
+
+FILES_PER_DIR = 50
+
+
+def make_tree(base, num_files):
+    paths = []
+    for i in range(num_files):
+        d = i // FILES_PER_DIR
+        rel = os.path.join('Sources', f'Module{d % 20}', f'Feature{d}', f'File{i}.swift')
+        full = os.path.join(base, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        open(full, 'w').close()
+        paths.append(rel)
+    return paths
+
+
+def make_project(paths):
+    project = XcodeProject({'archiveVersion': '1', 'classes': {}, 'objectVersion': '77',
+                            'objects': {}, 'rootObject': 'B0000000000000000000000P'})
+    project.add_object('B0000000000000000000000G', {'isa': 'PBXGroup', 'children': [],
+                                                    'sourceTree': '<group>'})
+    project.add_object('B0000000000000000000000P', {'isa': 'PBXProject',
+                                                    'mainGroup': 'B0000000000000000000000G'})
+    for i, path in enumerate(paths):
+        project.add_file_reference(f'C{i:023X}', path, 'B0000000000000000000000G',
+                                   source_tree='SOURCE_ROOT')
+    return project
+
+
+def serial_scan(base, root):
+    found = set()
+    for dirpath, _, files in os.walk(os.path.join(base, root)):
+        rel = os.path.relpath(dirpath, base)
+        found.update(os.path.join(rel, f) for f in files if f.endswith('.swift'))
+    return found
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as base:
+        paths = make_tree(base, num_files)
+        project = make_project(paths)
+        print(f"Tree: {num_files} files in {num_files // FILES_PER_DIR} directories")
+
+        start = time.perf_counter()
+        walked = serial_scan(base, 'Sources')
+        print(f"serial os.walk:    {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        serial = scan_sources(base, ['Sources'], workers=1)
+        print(f"scan, 1 worker:    {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        scanned = scan_sources(base, ['Sources'])
+        print(f"thread-pool scan:  {time.perf_counter() - start:.3f}s")
+        assert scanned == walked == serial
+
+        start = time.perf_counter()
+        plan = plan_sync(project, scanned, ['Sources'])
+        print(f"plan:              {time.perf_counter() - start:.3f}s")
+        assert not (plan['add'] or plan['remove'] or plan['move'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: every pbxproj operation at a range of project sizes.
+
+For each size (in objects, 100 to 200k by default) a synthetic project is
+generated with synthetic_project.py and these operations are timed, taking
+the best of --repeat runs:
+
+  parse           XcodeProject.parse
+  add             ProjectTransaction adding --batch files to a group and phase
+  move            ProjectTransaction.move of --batch files into a new group
+  remove          remove_files_named for --batch names
+  serialize       to_string() after those edits (splices dirty objects)
+  serialize_full  to_string(full=True)
+  dedupe          xcode_dedupe.analyze on the clean text
+  dedupe_repair   analyze + repair with --batch colliding IDs injected
+  sync            xcode_sync.plan_sync against a matching file list
+  mmap            indexing the file with MappedProject
+  load_cached     XcodeProject.load of the unchanged file from its xcode_cache
+                  snapshot (the cache lives in a temporary directory)
+
+Results are printed as a table and, with --output, written as JSON. With
+--baseline the run is compared against an earlier JSON file and the script
+exits with status 1 if any operation got slower than --threshold times the
+baseline (and by more than 5 ms, to ignore noise on tiny projects).
+
+Usage: python3 benchmarks/run_benchmarks.py [--sizes 100,1000,...] [--repeat N] [--batch N]
+                                            [--output FILE] [--baseline FILE] [--threshold X]
+"""
+
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from synthetic_project import (build_file_id, file_id, generate_project, object_count,
+                               phase_id, shape_for, target_group_id, target_name)
+from xcode_dedupe import analyze, repair
+from xcode_mmap import MappedProject
+from xcode_project import XcodeProject
+from xcode_sync import plan_sync
+from xcode_transaction import ProjectTransaction
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000, 200000]
+OPERATIONS = ['parse', 'add', 'move', 'remove', 'serialize', 'serialize_full',
+              'dedupe', 'dedupe_repair', 'sync', 'mmap', 'load_cached']
+
+# Ignore slowdowns smaller than this, whatever the ratio
+NOISE_FLOOR = 0.005
+
+_BUILD_ENTRY_RE = re.compile(r'\tD([0-9A-F]{23}) /\*')
+
+
+def corrupt(text, count):
+    """Give the first count build files the ID of the file they build."""
+    ids = {build_file_id(i)[1:] for i in range(count)}
+    return _BUILD_ENTRY_RE.sub(
+        lambda m: f'\tC{m.group(1)} /*' if m.group(1) in ids else m.group(0), text)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_once(text, path, shape, batch):
+    """Time every operation once on a freshly parsed project."""
+    timings = {}
+    files = shape['files']
+    project, timings['parse'] = timed(XcodeProject.parse, text)
+    on_disk = {project.source_path(file_id(i)) for i in range(files)}
+
+    def add():
+        txn = ProjectTransaction(project, deterministic_ids=True)
+        for i in range(batch):
+            txn.add_file(f'Added{i}.swift', target_group_id(0), phase_id(0))
+        return txn.apply()
+
+    def move():
+        txn = ProjectTransaction(project, deterministic_ids=True)
+        group_id = txn.add_group('Moved', target_group_id(0))
+        txn.move([file_id(i) for i in range(batch)], group_id)
+        return txn.apply()
+
+    def remove():
+        txn = ProjectTransaction(project)
+        txn.remove_files_named([f'File{i}.swift' for i in range(batch, 2 * batch)])
+        return txn.apply()
+
+    def dedupe_repair(corrupted):
+        return repair(corrupted, analyze(corrupted))
+
+    _, timings['add'] = timed(add)
+    _, timings['move'] = timed(move)
+    _, timings['remove'] = timed(remove)
+    _, timings['serialize'] = timed(project.to_string)
+    _, timings['serialize_full'] = timed(project.to_string, True)
+    _, timings['sync'] = timed(plan_sync, project, on_disk,
+                               [target_name(t) for t in range(shape['targets'])])
+    _, timings['dedupe'] = timed(analyze, text)
+    corrupted = corrupt(text, batch)
+    _, timings['dedupe_repair'] = timed(dedupe_repair, corrupted)
+
+    def index():
+        with MappedProject(path) as mapped:
+            return len(mapped.objects)
+
+    _, timings['mmap'] = timed(index)
+    _, timings['load_cached'] = timed(XcodeProject.load, path)
+    return timings
+
+
+def run_size(objects, repeat, batch):
+    shape = shape_for(objects)
+    batch = max(1, min(batch, shape['files'] // 10))
+    text = generate_project(**shape)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'project.pbxproj')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.environ['XCODE_CACHE_DIR'] = os.path.join(tmp, 'cache')
+        XcodeProject.load(path)  # store the snapshot load_cached reads
+        best = {}
+        for _ in range(repeat):
+            for op, seconds in run_once(text, path, shape, batch).items():
+                best[op] = min(seconds, best.get(op, seconds))
+    return dict(objects=object_count(**shape), bytes=len(text), batch=batch,
+                timings=best, **shape)
+
+
+def compare(results, baseline, threshold):
+    """Return (objects, op, baseline s, current s) for each regression."""
+    previous = {entry['objects']: entry['timings'] for entry in baseline['sizes']}
+    regressions = []
+    for entry in results['sizes']:
+        before = previous.get(entry['objects'], {})
+        for op, seconds in entry['timings'].items():
+            old = before.get(op)
+            if old is not None and seconds > old * threshold and seconds - old > NOISE_FLOOR:
+                regressions.append((entry['objects'], op, old, seconds))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'objects':>8} {'MB':>6} " + ' '.join(f'{op:>14}' for op in OPERATIONS))
+    for entry in results['sizes']:
+        cells = ' '.join(f"{entry['timings'][op]:>13.4f}s" for op in OPERATIONS)
+        print(f"{entry['objects']:>8} {entry['bytes'] / 1e6:>6.1f} {cells}")
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--sizes': None, '--repeat': '3', '--batch': '100', '--output': None,
+               '--baseline': None, '--threshold': '1.5'}
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = args[i + 1]
+            i += 2
+            continue
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    sizes = ([int(s) for s in options['--sizes'].split(',')]
+             if options['--sizes'] else DEFAULT_SIZES)
+    repeat = int(options['--repeat'])
+    batch = int(options['--batch'])
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'sizes': [],
+    }
+    for objects in sizes:
+        entry = run_size(objects, repeat, batch)
+        results['sizes'].append(entry)
+        print(f"{entry['objects']} objects done", file=sys.stderr)
+    print_table(results)
+
+    if options['--output']:
+        with open(options['--output'], 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {options['--output']}")
+
+    if options['--baseline']:
+        with open(options['--baseline'], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        threshold = float(options['--threshold'])
+        regressions = compare(results, baseline, threshold)
+        for objects, op, old, new in regressions:
+            print(f"REGRESSION {op} at {objects} objects: {old:.4f}s -> {new:.4f}s "
+                  f"({new / old:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {options['--baseline']} (threshold {threshold}x)")
+
+
+if __name__ == '__main__':
+    main()
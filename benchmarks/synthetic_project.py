@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic project.pbxproj files for the benchmarks.
+
+The projects are shaped like Jamminverz.xcodeproj/project.pbxproj: a main
+group with one folder group per target plus Products, feature groups under
+the target groups, an asset catalog per target, native targets with
+Sources/Frameworks/Resources phases, and Debug/Release configurations for
+the project and every target. The text is streamed section by section in
+Xcode's canonical layout, so XcodeProject round-trips it byte for byte and
+even a 200k-object project takes little memory to write.
+
+Object IDs are 24 characters: a one-character kind followed by a counter,
+so files are C000...0, C000...1, ... and their build files D000...0, ...
+
+Usage: python3 benchmarks/synthetic_project.py OUT [--files N] [--groups N]
+                                               [--targets N] [--phases Sources,Frameworks,Resources]
+"""
+
+import io
+import sys
+
+PHASES = ('Sources', 'Frameworks', 'Resources')
+
+PROJECT_ID = '3' * 24
+MAIN_GROUP_ID = f'A{0:023X}'
+PRODUCTS_GROUP_ID = f'A{1:023X}'
+
+_PROJECT_SETTINGS = {
+    'Debug': [
+        ('ALWAYS_SEARCH_USER_PATHS', 'NO'),
+        ('CLANG_ENABLE_MODULES', 'YES'),
+        ('DEBUG_INFORMATION_FORMAT', 'dwarf'),
+        ('ENABLE_TESTABILITY', 'YES'),
+        ('GCC_OPTIMIZATION_LEVEL', '0'),
+        ('IPHONEOS_DEPLOYMENT_TARGET', '17.0'),
+        ('ONLY_ACTIVE_ARCH', 'YES'),
+        ('SDKROOT', 'iphoneos'),
+        ('SWIFT_ACTIVE_COMPILATION_CONDITIONS', '"DEBUG $(inherited)"'),
+        ('SWIFT_OPTIMIZATION_LEVEL', '"-Onone"'),
+    ],
+    'Release': [
+        ('ALWAYS_SEARCH_USER_PATHS', 'NO'),
+        ('CLANG_ENABLE_MODULES', 'YES'),
+        ('DEBUG_INFORMATION_FORMAT', '"dwarf-with-dsym"'),
+        ('ENABLE_NS_ASSERTIONS', 'NO'),
+        ('IPHONEOS_DEPLOYMENT_TARGET', '17.0'),
+        ('SDKROOT', 'iphoneos'),
+        ('SWIFT_COMPILATION_MODE', 'wholemodule'),
+        ('VALIDATE_PRODUCT', 'YES'),
+    ],
+}
+
+
+def file_id(i):
+    """ID of the i-th source file reference."""
+    return f'C{i:023X}'
+
+
+def build_file_id(i):
+    """ID of the build file that compiles the i-th source file."""
+    return f'D{i:023X}'
+
+
+def target_group_id(t):
+    """ID of the folder group that holds target t's sources."""
+    return f'A{2 + t:023X}'
+
+
+def feature_group_id(g, targets=1):
+    return f'A{2 + targets + g:023X}'
+
+
+def target_id(t):
+    return f'7{t:023X}'
+
+
+def phase_id(t, phase='Sources'):
+    """ID of target t's build phase called phase."""
+    return f'8{t * len(PHASES) + PHASES.index(phase):023X}'
+
+
+def target_name(t):
+    return 'App' if t == 0 else f'App{t}'
+
+
+def object_count(files, groups=0, targets=1, phases=PHASES):
+    """Number of objects write_project emits for these arguments."""
+    per_target = 1 + 1 + 1 + 1 + len(phases) + 3  # group, target, product, assets, phases, configs
+    if 'Resources' in phases:
+        per_target += 1
+    build_files = files if 'Sources' in phases else 0
+    return files + build_files + groups + 2 + targets * per_target + 1 + 3
+
+
+def shape_for(objects):
+    """Pick files/groups/targets that add up to about objects objects."""
+    targets = 1 if objects < 1000 else 2 if objects < 20000 else 4
+    files = max(1, (objects - object_count(0, 0, targets)) // 2)
+    groups = files // 100
+    files = max(1, (objects - object_count(0, groups, targets)) // 2)
+    return {'files': files, 'groups': groups, 'targets': targets}
+
+
+def _files_of_target(t, files, groups, targets):
+    """Yield (group ID, file indexes) for each group holding target t's files."""
+    if groups:
+        for g in range(t, groups, targets):
+            yield feature_group_id(g, targets), range(g, files, groups)
+    else:
+        yield target_group_id(t), range(t, files, targets)
+
+
+def _list(out, key, entries, indent=3):
+    pad = '\t' * indent
+    out.write(f'{pad}{key} = (\n')
+    for entry in entries:
+        out.write(f'{pad}\t{entry},\n')
+    out.write(f'{pad});\n')
+
+
+def write_project(out, files, groups=0, targets=1, phases=PHASES):
+    """Write a project with files Swift files spread over groups and targets.
+
+    groups feature groups are dealt round-robin to the targets and files to
+    the groups; with groups=0 the files sit directly in the target groups.
+    """
+    phases = [p for p in PHASES if p in phases]
+    resources = 'Resources' in phases
+    out.write('// !$*UTF8*$!\n{\n\tarchiveVersion = 1;\n\tclasses = {\n\t};\n'
+              '\tobjectVersion = 77;\n\tobjects = {\n')
+
+    sources = files if 'Sources' in phases else 0
+    if sources or resources:
+        out.write('\n/* Begin PBXBuildFile section */\n')
+        for i in range(sources):
+            out.write(f'\t\t{build_file_id(i)} /* File{i}.swift in Sources */ = '
+                      f'{{isa = PBXBuildFile; fileRef = {file_id(i)} /* File{i}.swift */; }};\n')
+        for t in range(targets if resources else 0):
+            out.write(f'\t\t4{t:023X} /* Assets.xcassets in Resources */ = '
+                      f'{{isa = PBXBuildFile; fileRef = 5{t:023X} /* Assets.xcassets */; }};\n')
+        out.write('/* End PBXBuildFile section */\n')
+
+    out.write('\n/* Begin PBXFileReference section */\n')
+    for i in range(files):
+        out.write(f'\t\t{file_id(i)} /* File{i}.swift */ = {{isa = PBXFileReference; '
+                  f'lastKnownFileType = sourcecode.swift; path = File{i}.swift; '
+                  f'sourceTree = "<group>"; }};\n')
+    for t in range(targets):
+        out.write(f'\t\t5{t:023X} /* Assets.xcassets */ = {{isa = PBXFileReference; '
+                  'lastKnownFileType = folder.assetcatalog; path = Assets.xcassets; '
+                  'sourceTree = "<group>"; };\n')
+    for t in range(targets):
+        name = target_name(t)
+        out.write(f'\t\t6{t:023X} /* {name}.app */ = {{isa = PBXFileReference; '
+                  f'explicitFileType = wrapper.application; includeInIndex = 0; '
+                  f'path = {name}.app; sourceTree = BUILT_PRODUCTS_DIR; }};\n')
+    out.write('/* End PBXFileReference section */\n')
+
+    if 'Frameworks' in phases:
+        _write_phases(out, 'PBXFrameworksBuildPhase', 'Frameworks', targets, lambda t: ())
+
+    out.write('\n/* Begin PBXGroup section */\n')
+    out.write(f'\t\t{MAIN_GROUP_ID} = {{\n\t\t\tisa = PBXGroup;\n')
+    _list(out, 'children', [f'{target_group_id(t)} /* {target_name(t)} */' for t in range(targets)]
+          + [f'{PRODUCTS_GROUP_ID} /* Products */'])
+    out.write('\t\t\tsourceTree = "<group>";\n\t\t};\n')
+    out.write(f'\t\t{PRODUCTS_GROUP_ID} /* Products */ = {{\n\t\t\tisa = PBXGroup;\n')
+    _list(out, 'children', [f'6{t:023X} /* {target_name(t)}.app */' for t in range(targets)])
+    out.write('\t\t\tname = Products;\n\t\t\tsourceTree = "<group>";\n\t\t};\n')
+    for t in range(targets):
+        name = target_name(t)
+        if groups:
+            children = [f'{feature_group_id(g, targets)} /* Feature{g} */'
+                        for g in range(t, groups, targets)]
+        else:
+            children = [f'{file_id(i)} /* File{i}.swift */' for i in range(t, files, targets)]
+        children.append(f'5{t:023X} /* Assets.xcassets */')
+        out.write(f'\t\t{target_group_id(t)} /* {name} */ = {{\n\t\t\tisa = PBXGroup;\n')
+        _list(out, 'children', children)
+        out.write(f'\t\t\tpath = {name};\n\t\t\tsourceTree = "<group>";\n\t\t}};\n')
+    for g in range(groups):
+        out.write(f'\t\t{feature_group_id(g, targets)} /* Feature{g} */ = {{\n'
+                  '\t\t\tisa = PBXGroup;\n')
+        _list(out, 'children', (f'{file_id(i)} /* File{i}.swift */' for i in range(g, files, groups)))
+        out.write(f'\t\t\tpath = Feature{g};\n\t\t\tsourceTree = "<group>";\n\t\t}};\n')
+    out.write('/* End PBXGroup section */\n')
+
+    out.write('\n/* Begin PBXNativeTarget section */\n')
+    for t in range(targets):
+        name = target_name(t)
+        out.write(f'\t\t{target_id(t)} /* {name} */ = {{\n\t\t\tisa = PBXNativeTarget;\n'
+                  f'\t\t\tbuildConfigurationList = B{1 + t:023X} /* Build configuration list '
+                  f'for PBXNativeTarget "{name}" */;\n')
+        _list(out, 'buildPhases', [f'{phase_id(t, p)} /* {p} */' for p in phases])
+        _list(out, 'buildRules', ())
+        _list(out, 'dependencies', ())
+        out.write(f'\t\t\tname = {name};\n')
+        _list(out, 'packageProductDependencies', ())
+        out.write(f'\t\t\tproductName = {name};\n'
+                  f'\t\t\tproductReference = 6{t:023X} /* {name}.app */;\n'
+                  '\t\t\tproductType = "com.apple.product-type.application";\n\t\t};\n')
+    out.write('/* End PBXNativeTarget section */\n')
+
+    out.write('\n/* Begin PBXProject section */\n')
+    out.write(f'\t\t{PROJECT_ID} /* Project object */ = {{\n\t\t\tisa = PBXProject;\n'
+              '\t\t\tattributes = {\n\t\t\t\tBuildIndependentTargetsInParallel = 1;\n'
+              '\t\t\t\tLastSwiftUpdateCheck = 1640;\n\t\t\t\tLastUpgradeCheck = 1640;\n'
+              '\t\t\t\tTargetAttributes = {\n')
+    for t in range(targets):
+        out.write(f'\t\t\t\t\t{target_id(t)} = {{\n\t\t\t\t\t\tCreatedOnToolsVersion = 16.4;\n'
+                  '\t\t\t\t\t};\n')
+    out.write('\t\t\t\t};\n\t\t\t};\n'
+              f'\t\t\tbuildConfigurationList = B{0:023X} /* Build configuration list '
+              'for PBXProject "App" */;\n'
+              '\t\t\tdevelopmentRegion = en;\n\t\t\thasScannedForEncodings = 0;\n')
+    _list(out, 'knownRegions', ['en', 'Base'])
+    out.write(f'\t\t\tmainGroup = {MAIN_GROUP_ID};\n'
+              '\t\t\tminimizedProjectReferenceProxies = 1;\n'
+              '\t\t\tpreferredProjectObjectVersion = 77;\n'
+              f'\t\t\tproductRefGroup = {PRODUCTS_GROUP_ID} /* Products */;\n'
+              '\t\t\tprojectDirPath = "";\n\t\t\tprojectRoot = "";\n')
+    _list(out, 'targets', [f'{target_id(t)} /* {target_name(t)} */' for t in range(targets)])
+    out.write('\t\t};\n/* End PBXProject section */\n')
+
+    if resources:
+        _write_phases(out, 'PBXResourcesBuildPhase', 'Resources', targets,
+                      lambda t: [f'4{t:023X} /* Assets.xcassets in Resources */'])
+    if 'Sources' in phases:
+        _write_phases(out, 'PBXSourcesBuildPhase', 'Sources', targets, lambda t: (
+            f'{build_file_id(i)} /* File{i}.swift in Sources */'
+            for _, indexes in _files_of_target(t, files, groups, targets) for i in indexes))
+
+    out.write('\n/* Begin XCBuildConfiguration section */\n')
+    for n, config in enumerate(('Debug', 'Release')):
+        out.write(f'\t\t9{n:023X} /* {config} */ = {{\n\t\t\tisa = XCBuildConfiguration;\n'
+                  '\t\t\tbuildSettings = {\n')
+        for key, value in _PROJECT_SETTINGS[config]:
+            out.write(f'\t\t\t\t{key} = {value};\n')
+        out.write(f'\t\t\t}};\n\t\t\tname = {config};\n\t\t}};\n')
+    for t in range(targets):
+        for n, config in enumerate(('Debug', 'Release')):
+            out.write(f'\t\t9{2 + 2 * t + n:023X} /* {config} */ = {{\n'
+                      '\t\t\tisa = XCBuildConfiguration;\n\t\t\tbuildSettings = {\n'
+                      '\t\t\t\tASSETCATALOG_COMPILER_APPICON_NAME = AppIcon;\n'
+                      '\t\t\t\tCODE_SIGN_STYLE = Automatic;\n'
+                      '\t\t\t\tGENERATE_INFOPLIST_FILE = YES;\n'
+                      '\t\t\t\tMARKETING_VERSION = 1.0;\n'
+                      f'\t\t\t\tPRODUCT_BUNDLE_IDENTIFIER = com.example.{target_name(t)};\n'
+                      '\t\t\t\tPRODUCT_NAME = "$(TARGET_NAME)";\n'
+                      '\t\t\t\tSWIFT_VERSION = 5.0;\n'
+                      '\t\t\t\tTARGETED_DEVICE_FAMILY = "1,2";\n'
+                      f'\t\t\t}};\n\t\t\tname = {config};\n\t\t}};\n')
+    out.write('/* End XCBuildConfiguration section */\n')
+
+    out.write('\n/* Begin XCConfigurationList section */\n')
+    lists = [(f'B{0:023X}', 'PBXProject "App"', 0)]
+    lists += [(f'B{1 + t:023X}', f'PBXNativeTarget "{target_name(t)}"', 2 + 2 * t)
+              for t in range(targets)]
+    for list_id, owner, first in lists:
+        out.write(f'\t\t{list_id} /* Build configuration list for {owner} */ = {{\n'
+                  '\t\t\tisa = XCConfigurationList;\n')
+        _list(out, 'buildConfigurations', [f'9{first:023X} /* Debug */',
+                                           f'9{first + 1:023X} /* Release */'])
+        out.write('\t\t\tdefaultConfigurationIsVisible = 0;\n'
+                  '\t\t\tdefaultConfigurationName = Release;\n\t\t};\n')
+    out.write('/* End XCConfigurationList section */\n')
+    out.write(f'\t}};\n\trootObject = {PROJECT_ID} /* Project object */;\n}}\n')
+
+
+def _write_phases(out, isa, phase, targets, entries):
+    out.write(f'\n/* Begin {isa} section */\n')
+    for t in range(targets):
+        out.write(f'\t\t{phase_id(t, phase)} /* {phase} */ = {{\n\t\t\tisa = {isa};\n'
+                  '\t\t\tbuildActionMask = 2147483647;\n')
+        _list(out, 'files', entries(t))
+        out.write('\t\t\trunOnlyForDeploymentPostprocessing = 0;\n\t\t};\n')
+    out.write(f'/* End {isa} section */\n')
+
+
+def generate_project(files, groups=0, targets=1, phases=PHASES):
+    """Return the text write_project would write."""
+    out = io.StringIO()
+    write_project(out, files, groups, targets, phases)
+    return out.getvalue()
+
+
+def main():
+    args = sys.argv[1:]
+    options = {'--files': 1000, '--groups': 10, '--targets': 1}
+    phases = PHASES
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]] = int(args[i + 1])
+            i += 2
+            continue
+        if args[i] == '--phases' and i + 1 < len(args):
+            phases = tuple(args[i + 1].split(','))
+            i += 2
+            continue
+        positional.append(args[i])
+        i += 1
+    if len(positional) != 1 or not set(phases) <= set(PHASES):
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+
+    with open(positional[0], 'w', encoding='utf-8') as f:
+        write_project(f, options['--files'], options['--groups'], options['--targets'], phases)
+    count = object_count(options['--files'], options['--groups'], options['--targets'], phases)
+    print(f"Wrote {positional[0]} ({count} objects)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,12 @@
 #!/usr/bin/env python3
 """Remove references to missing files from Xcode project"""
 
+import sys
+
+import xcode_trace
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
 def clean_project():
     # Files that are causing errors (from Shared folders)
     files_to_remove = [
@@ -9,30 +15,22 @@ def clean_project():
         'TaskStore_iOS.swift'
     ]
     
-    with open('Todomai-iOS.xcodeproj/project.pbxproj', 'r') as f:
-        content = f.read()
-    
-    lines = content.split('\n')
-    cleaned_lines = []
-    skip_line = False
+    project = XcodeProject.load('Todomai-iOS.xcodeproj/project.pbxproj')
     
-    for line in lines:
-        # Check if this line references one of the missing files
-        should_skip = False
-        for filename in files_to_remove:
-            if filename in line:
-                should_skip = True
-                break
-        
-        if not should_skip:
-            cleaned_lines.append(line)
+    # Resolve the names to file references in one scan of the reference
+    # paths and drop them along with their build files, group and build
+    # phase entries
+    txn = ProjectTransaction(project)
+    txn.remove_files_named(files_to_remove)
     
-    # Write cleaned content
-    with open('Todomai-iOS.xcodeproj/project.pbxproj', 'w') as f:
-        f.write('\n'.join(cleaned_lines))
+    # Write cleaned content, unless none of the files were referenced
+    if txn.commit() == 0:
+        print("Nothing to do: none of the files are referenced in the project")
+        return
     
     print("Removed references to missing Shared folder files")
     print("The project should now build without errors")
 
 if __name__ == '__main__':
-    clean_project()
\ No newline at end of file
+    xcode_trace.setup(sys.argv)
+    clean_project()
@@ -0,0 +1,46 @@
+"""
+The small project the tests work on, in fixtures/App.xcodeproj.
+
+One App target builds File0.swift ... File5.swift, which sit alternately in
+the groups App/Feature0 and App/Feature1, and an asset catalog (written by
+benchmarks/synthetic_project.py with --files 6 --groups 2). Tests that edit
+it work on a copy made with copy_project.
+"""
+
+import os
+import shutil
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       'fixtures', 'App.xcodeproj', 'project.pbxproj')
+
+FILES = 6
+TARGET = '700000000000000000000000'
+SOURCES_PHASE = '800000000000000000000000'
+TARGET_DEBUG = '900000000000000000000002'
+
+
+def file_id(i):
+    """ID of the reference to File<i>.swift."""
+    return f'C{i:023X}'
+
+
+def build_file_id(i):
+    """ID of the build file that compiles File<i>.swift."""
+    return f'D{i:023X}'
+
+
+def feature_group(g):
+    """ID of the group App/Feature<g>; file i is in feature_group(i % 2)."""
+    return f'A{3 + g:023X}'
+
+
+def fixture_text():
+    with open(FIXTURE, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def copy_project(folder):
+    """Copy App.xcodeproj into folder; returns the copy's project.pbxproj."""
+    target = os.path.join(folder, 'App.xcodeproj')
+    shutil.copytree(os.path.dirname(FIXTURE), target)
+    return os.path.join(target, 'project.pbxproj')
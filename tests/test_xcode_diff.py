@@ -0,0 +1,62 @@
+"""
+Tests for xcode_diff on files that are only partly in Xcode's layout.
+
+Run from the repository root: python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from project_fixture import file_id, fixture_text
+from xcode_diff import ScannedProject, diff_files
+from xcode_mmap import MappedProject
+from xcode_project import ParseError
+
+
+def reindented(text, obj_id):
+    """Return text with obj_id's definition indented by three tabs, not two."""
+    return text.replace(f'\n\t\t{obj_id} ', f'\n\t\t\t{obj_id} ', 1)
+
+
+class PartialLayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.text = reindented(fixture_text(), file_id(3))
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_scan_refuses_a_definition_out_of_layout(self):
+        with self.assertRaises(ParseError):
+            ScannedProject(self.text)
+        ScannedProject(fixture_text())
+
+    def test_change_to_reindented_object_is_reported(self):
+        old = self.write('old.pbxproj', self.text)
+        new = self.write('new.pbxproj', self.text.replace('path = File3.swift;',
+                                                          'path = Renamed.swift;'))
+        report = diff_files(old, new)
+        self.assertEqual([entry['id'] for entry in report['modified']], [file_id(3)])
+        self.assertEqual(report['modified'][0]['changes'],
+                         [{'key': 'path', 'old': 'File3.swift', 'new': 'Renamed.swift'}])
+
+    def test_same_partial_file_has_no_changes(self):
+        path = self.write('project.pbxproj', self.text)
+        with MappedProject(path) as mapped:
+            self.assertIn(file_id(3), mapped.objects)
+        report = diff_files(path, path)
+        self.assertFalse(report['added'] or report['removed'] or report['modified'])
+
+
+if __name__ == '__main__':
+    unittest.main()
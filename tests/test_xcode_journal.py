@@ -0,0 +1,89 @@
+"""
+Tests for undo and redo through the project's edit journal.
+
+Run from the repository root: python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import xcode_journal
+from project_fixture import SOURCES_PHASE, TARGET_DEBUG, copy_project, feature_group, file_id
+from xcode_journal import JournalError, goto, read_history
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = copy_project(self.tmp.name)
+        self.texts = [self.read()]
+        self.commit(lambda txn: txn.add_file('New.swift', feature_group(0), SOURCES_PHASE),
+                    'add New.swift')
+        self.commit(lambda txn: txn.remove_file(file_id(3)), 'remove File3.swift')
+        self.commit(lambda txn: txn.set_build_setting(TARGET_DEBUG, 'SWIFT_VERSION', '6.0'),
+                    'swift 6')
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def commit(self, queue, label):
+        txn = ProjectTransaction(XcodeProject.load(self.path, cache=False))
+        queue(txn)
+        txn.commit(label=label)
+        self.texts.append(self.read())
+
+    def history(self):
+        return read_history(self.path, self.read())
+
+    def test_every_save_is_an_entry(self):
+        entries, head = self.history()
+        self.assertEqual([entry['label'] for entry in entries],
+                         ['add New.swift', 'remove File3.swift', 'swift 6'])
+        self.assertEqual(head, 3)
+
+    def test_undo_and_redo_restore_each_state(self):
+        for target in (2, 0, 1, 3, 0):
+            self.assertEqual(goto(self.path, target), target)
+            self.assertEqual(self.read(), self.texts[target])
+            self.assertEqual(self.history()[1], target)
+
+    def test_undone_project_still_parses(self):
+        goto(self.path, 1)
+        project = XcodeProject.load(self.path, cache=False)
+        self.assertIn(file_id(3), project.objects)
+        self.assertEqual(len(project.find_file_references_many(['New.swift'])['New.swift']), 1)
+
+    def test_save_after_undo_drops_the_undone_entries(self):
+        goto(self.path, 1)
+        self.commit(lambda txn: txn.remove_file(file_id(4)), 'remove File4.swift')
+        entries, head = self.history()
+        self.assertEqual([entry['label'] for entry in entries],
+                         ['add New.swift', 'remove File4.swift'])
+        self.assertEqual(head, 2)
+        goto(self.path, 0)
+        self.assertEqual(self.read(), self.texts[0])
+
+    def test_outside_edit_blocks_undo(self):
+        text = self.read().replace('path = File5.swift;', 'path = Outside.swift;')
+        xcode_journal.write_atomic(self.path, text)
+        with self.assertRaises(JournalError):
+            goto(self.path, 1)
+        self.assertEqual(self.read(), text)
+
+    def test_entries_hold_only_the_changed_objects(self):
+        entries, _ = self.history()
+        size = sum(len(old) + len(new) for _, old, new in entries[2]['hunks'])
+        self.assertLess(size, len(self.texts[0]) // 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
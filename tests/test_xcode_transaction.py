@@ -0,0 +1,123 @@
+"""
+Tests for ProjectTransaction and the splice serializer it saves through.
+
+Run from the repository root: python3 -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from project_fixture import (FILES, SOURCES_PHASE, TARGET_DEBUG, build_file_id, copy_project,
+                             feature_group, file_id, fixture_text)
+from xcode_project import XcodeProject
+from xcode_transaction import ProjectTransaction
+
+
+def edit(txn):
+    """Queue one edit of every kind the transaction supports."""
+    txn.add_file('New.swift', feature_group(0), SOURCES_PHASE)
+    txn.move_file(file_id(1), feature_group(0), after=file_id(0))
+    txn.remove_file(file_id(2))
+    txn.set_build_setting(TARGET_DEBUG, 'SWIFT_VERSION', '6.0')
+    txn.set_build_setting(TARGET_DEBUG, 'CODE_SIGN_STYLE', None)
+
+
+class SerializationTest(unittest.TestCase):
+
+    def test_unedited_project_is_written_back_verbatim(self):
+        text = fixture_text()
+        project = XcodeProject.parse(text)
+        self.assertEqual(project.to_string(), text)
+        self.assertEqual(project.to_string(full=True), text)
+
+    def test_splice_matches_full_serialization_after_edits(self):
+        project = XcodeProject.parse(fixture_text())
+        txn = ProjectTransaction(project)
+        edit(txn)
+        txn.apply()
+        spliced = project.to_string()
+        self.assertEqual(spliced, project.to_string(full=True))
+        self.assertEqual(XcodeProject.parse(spliced).objects, project.objects)
+
+    def test_splice_after_reparse_of_edited_text(self):
+        project = XcodeProject.parse(fixture_text())
+        txn = ProjectTransaction(project)
+        edit(txn)
+        txn.apply()
+        again = XcodeProject.parse(project.to_string())
+        txn = ProjectTransaction(again)
+        txn.add_file('Other.swift', feature_group(1), SOURCES_PHASE)
+        txn.apply()
+        self.assertEqual(again.to_string(), again.to_string(full=True))
+
+
+class TransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = copy_project(self.tmp.name)
+
+    def load(self):
+        return XcodeProject.load(self.path, cache=False)
+
+    def test_commit_writes_every_operation(self):
+        txn = ProjectTransaction(self.load())
+        edit(txn)
+        self.assertEqual(txn.commit(), 5)
+        project = self.load()
+        new = project.find_file_references_many(['New.swift'])['New.swift']
+        self.assertEqual(len(new), 1)
+        self.assertEqual(project.parent[new[0]], feature_group(0))
+        self.assertEqual(project.group_path(new[0]), 'App/Feature0/New.swift')
+        self.assertEqual(project.phase_of[project.build_files_by_ref[new[0]][0]], SOURCES_PHASE)
+        self.assertEqual(project.objects[feature_group(0)]['children'][:2],
+                         [file_id(0), file_id(1)])
+        self.assertNotIn(file_id(2), project.objects)
+        self.assertNotIn(build_file_id(2), project.objects)
+        self.assertNotIn(build_file_id(2), project.objects[SOURCES_PHASE]['files'])
+        settings = project.objects[TARGET_DEBUG]['buildSettings']
+        self.assertEqual(settings['SWIFT_VERSION'], '6.0')
+        self.assertNotIn('CODE_SIGN_STYLE', settings)
+
+    def test_operations_that_change_nothing_are_not_queued(self):
+        txn = ProjectTransaction(self.load())
+        txn.add_file('File0.swift', feature_group(0), SOURCES_PHASE)
+        txn.move_file(file_id(1), feature_group(1))
+        txn.set_build_setting(TARGET_DEBUG, 'SWIFT_VERSION', '5.0')
+        self.assertEqual(txn.operations, [])
+
+    def test_empty_commit_leaves_the_file_alone(self):
+        os.utime(self.path, ns=(0, 0))
+        txn = ProjectTransaction(self.load())
+        txn.set_build_setting(TARGET_DEBUG, 'SWIFT_VERSION', '5.0')
+        self.assertEqual(txn.commit(), 0)
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertFalse(os.path.exists(self.path + '.journal'))
+
+    def test_added_group_takes_files_in_the_same_commit(self):
+        txn = ProjectTransaction(self.load())
+        group_id = txn.add_group('Feature2', feature_group(0))
+        self.assertEqual(txn.add_group('Feature2', feature_group(0)), group_id)
+        txn.add_file('Deep.swift', group_id, SOURCES_PHASE)
+        txn.commit()
+        project = self.load()
+        ref_id, = project.find_file_references_many(['Deep.swift'])['Deep.swift']
+        self.assertEqual(project.source_path(ref_id), 'App/Feature0/Feature2/Deep.swift')
+
+    def test_every_file_is_still_built_once(self):
+        txn = ProjectTransaction(self.load())
+        edit(txn)
+        txn.commit()
+        project = self.load()
+        built = [project.objects[bf]['fileRef'] for bf in project.objects[SOURCES_PHASE]['files']]
+        self.assertEqual(len(built), len(set(built)))
+        self.assertEqual(len(built), FILES)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+One entry point for the project.pbxproj tools.
+
+Every command takes the project file as its first argument, so the same
+command works on any project. Dispatch itself imports nothing but the
+module behind the command that runs: --help, a command's --help (read from
+its file) and an unknown command load none of the tools, which keeps them
+at the start-up cost of the interpreter itself. The command's module brings
+in what it uses, which for every command that opens a project includes the
+parser with its snapshot cache, journal and tracing modules; tracing only
+records anything with --trace-json/--profile.
+
+Usage: python3 xcode.py COMMAND path/to/project.pbxproj [ARGS ...]
+       python3 xcode.py COMMAND --help
+"""
+
+import importlib
+import os
+import sys
+
+# Command -> (module with a main(argv), one-line summary)
+COMMANDS = {
+    'add': ('xcode_add', 'add files to the groups that mirror their directories'),
+    'remove': ('xcode_remove', 'remove files by name with their build files'),
+    'move': ('xcode_move', 'move files into the group that mirrors a directory'),
+    'dedupe': ('xcode_dedupe', 'repair repeated IDs and dangling references'),
+    'sync': ('xcode_sync', 'compare the source folders with the project'),
+    'query': ('xcode_query', 'which targets build a file, unbuilt, missing and orphaned files'),
+    'validate': ('xcode_validate', 'check that project files parse and are consistent'),
+    'recover': ('xcode_recover', 'salvage the readable objects of a damaged project'),
+    'watch': ('xcode_watch', 'keep the project in sync while files change'),
+    'journal': ('xcode_journal', 'list, undo and redo journaled edits'),
+    'batch': ('xcode_batch', 'run a command over every project a glob matches'),
+    'merge': ('xcode_merge', 'three-way merge BASE OURS THEIRS (git merge driver)'),
+    'diff': ('xcode_diff', 'compare two versions object by object: OLD NEW'),
+    'settings': ('xcode_settings', 'set, remove and hoist build settings across targets'),
+}
+
+
+def module_doc(name):
+    """Return a module's docstring without importing the module."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name + '.py')
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().split('"""', 2)[1].strip()
+
+
+def print_help():
+    print('\n'.join(__doc__.strip().splitlines()[-2:]))
+    print("\nCommands:")
+    for name, (_, summary) in COMMANDS.items():
+        print(f"  {name:<10} {summary}")
+    print("\nEvery command also accepts --trace-json FILE and --profile PHASE.")
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2 or argv[1] in ('-h', '--help', 'help'):
+        print_help()
+        sys.exit(0 if len(argv) >= 2 else 2)
+    command = argv[1]
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}\n")
+        print_help()
+        sys.exit(2)
+
+    args = [f"xcode.py {command}"] + argv[2:]
+    if '-h' in args or '--help' in args:
+        print(module_doc(COMMANDS[command][0]))
+        return
+    if '--trace-json' in args or '--profile' in args:
+        import xcode_trace
+
+        # Strips the flags; the command name labels the outermost phase
+        xcode_trace.setup(args)
+    importlib.import_module(COMMANDS[command][0]).main(args[1:])
+
+
+if __name__ == '__main__':
+    main()
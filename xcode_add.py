@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Add files to an Xcode project.
+
+Paths are taken relative to the folder that holds the .xcodeproj (absolute
+paths are made relative to it), and each file goes into the group that
+mirrors its directory, so Jamminverz/Views/Foo.swift lands in the
+Jamminverz/Views group; groups missing along the way are created. Sources
+are added to the target's Sources phase and resources to its Resources
+phase, the first native target unless --target names others (it can be
+given more than once) or --all-targets asks for every native target (say,
+a shared file for every app in a batch run). Every target's phase entry is
+queued in the same transaction, so the file is written once however many
+targets build it. Files that are already in their group and phase are
+skipped, and if nothing is left
+the project file is not rewritten.
+
+Usage: python3 xcode_add.py path/to/project.pbxproj PATH [PATH ...]
+                            [--target NAME ... | --all-targets] [--deterministic]
+"""
+
+import os
+import sys
+
+import xcode_trace
+from xcode_project import find_target, project_base
+from xcode_transaction import GroupResolver, ProjectTransaction, phase_for
+
+
+def add_files(project_path, paths, targets=None, deterministic=False, all_targets=False):
+    """Add paths to the project in one write; returns the paths added."""
+    base = project_base(project_path)
+    txn = ProjectTransaction(project_path, deterministic_ids=deterministic)
+    project = txn.project
+    native = project.ids_with_isa('PBXNativeTarget')
+    if targets:
+        target_ids = [find_target(project, name) for name in targets]
+    elif all_targets:
+        target_ids = native
+    else:
+        target_ids = native[:1] or [None]
+    groups = GroupResolver(txn)
+    added = []
+    for path in paths:
+        rel = os.path.relpath(os.path.join(base, path), base)
+        queued = len(txn.operations)
+        group_id = groups.group_for(os.path.dirname(rel))
+        for target_id in target_ids:
+            txn.add_file(os.path.basename(rel), group_id, phase_for(project, rel, target_id))
+        if len(txn.operations) > queued:
+            added.append(rel)
+    txn.commit()
+    return added
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    targets = []
+    while '--target' in args:
+        i = args.index('--target')
+        if i + 1 >= len(args):
+            print('\n'.join(__doc__.strip().splitlines()[-2:]))
+            sys.exit(2)
+        targets.append(args[i + 1])
+        del args[i:i + 2]
+    positional = [a for a in args if not a.startswith('--')]
+    if len(positional) < 2:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    project_path, paths = positional[0], positional[1:]
+
+    base = project_base(project_path)
+    missing = [p for p in paths if not os.path.exists(os.path.join(base, p))]
+    if missing:
+        for path in missing:
+            print(f"Error: {path} not found under {base}")
+        sys.exit(1)
+
+    try:
+        added = add_files(project_path, paths, targets=targets,
+                          deterministic='--deterministic' in args,
+                          all_targets='--all-targets' in args)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for path in added:
+        print(f"+ {path}")
+    if added:
+        print(f"Added {len(added)} file(s) to {project_path}")
+    else:
+        print("Nothing to do: all files are already in the project.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
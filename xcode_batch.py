@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Run one command over many projects at once.
+
+GLOB picks the projects (quote it so the shell leaves it alone; "**"
+matches any number of directories) and may name .xcodeproj bundles or
+project.pbxproj files. COMMAND and its arguments are those of xcode.py, with
+the project left out: each project gets its own run in a pool of worker
+processes (--jobs, by default one per CPU), so the batch takes about as long
+as its slowest project. Projects are handed out largest first, which keeps
+a big one from starting last.
+
+Every project is written the way the command always writes it: atomically
+and through its own edit journal, so `batch GLOB journal undo` reverts a
+batch. A failure in one project does not stop the others. The output of
+each run is collected and printed per project, followed by a summary; with
+--json the same report is written as JSON. The exit status is 1 if any
+project failed.
+
+Usage: python3 xcode_batch.py [--jobs N] [--json FILE] GLOB COMMAND [ARGS ...]
+       e.g. python3 xcode_batch.py '~/src/**/*.xcodeproj' remove Shared/Core/OldModel.swift
+"""
+
+import contextlib
+import glob
+import importlib
+import io
+import os
+import sys
+import time
+
+import xcode_trace
+from xcode import COMMANDS
+
+# Commands that make no sense per project in a batch
+_EXCLUDED = frozenset(['watch', 'batch', 'merge', 'diff'])
+
+
+def find_projects(pattern):
+    """Return the project.pbxproj files a glob matches, sorted and without repeats."""
+    projects = set()
+    for path in glob.glob(os.path.expanduser(pattern), recursive=True):
+        if path.endswith('.xcodeproj'):
+            path = os.path.join(path, 'project.pbxproj')
+        if os.path.basename(path) == 'project.pbxproj' and os.path.isfile(path):
+            projects.add(os.path.abspath(path))
+    return sorted(projects)
+
+
+def run_one(command, project_path, args):
+    """Run a command on one project in this process; returns its result.
+
+    The result is a dict with "project", "status" ("ok", "failed" for a
+    non-zero exit, "error" for an exception), "exit", "output" and "seconds".
+    """
+    start = time.perf_counter()
+    out = io.StringIO()
+    status, code = 'ok', 0
+    with contextlib.redirect_stdout(out):
+        try:
+            importlib.import_module(COMMANDS[command][0]).main([project_path] + list(args))
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code)
+                code = 1
+            else:
+                code = e.code or 0
+            if code:
+                status = 'failed'
+        except Exception as e:
+            # One broken project must not take the rest of the batch down
+            status, code = 'error', 1
+            print(f"{type(e).__name__}: {e}")
+    return {'project': project_path, 'status': status, 'exit': code,
+            'output': out.getvalue(), 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def run_batch(projects, command, args, jobs=None):
+    """Run command on every project in a process pool; returns results in input order."""
+    if command not in COMMANDS or command in _EXCLUDED:
+        raise ValueError(f"'{command}' cannot run in a batch")
+    if not projects:
+        return []
+    # Imported here for the same reason as in xcode_sync.scan_sources
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = min(jobs or os.cpu_count() or 1, len(projects))
+    # Largest first: with one project per task the batch ends when the
+    # slowest worker does, so the long runs must not start last
+    order = sorted(projects, key=_size, reverse=True)
+    with xcode_trace.phase('batch', projects=len(projects), jobs=jobs):
+        if jobs == 1:
+            done = {path: run_one(command, path, args) for path in order}
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = {path: pool.submit(run_one, command, path, args) for path in order}
+                done = {path: future.result() for path, future in futures.items()}
+    return [done[path] for path in projects]
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def print_report(results, elapsed):
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        print(f"{result['status']:<7} {result['project']} ({result['seconds']:.2f}s)")
+        for line in result['output'].rstrip('\n').splitlines():
+            print(f"        {line}")
+    summary = ', '.join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"\n{len(results)} project(s): {summary or 'none'} in {elapsed:.2f}s")
+    if results:
+        slowest = max(results, key=lambda r: r['seconds'])
+        print(f"Slowest: {slowest['project']} ({slowest['seconds']:.2f}s)")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    jobs = None
+    json_path = None
+    try:
+        while args and args[0] in ('--jobs', '--json'):
+            flag, value = args[0], args[1]
+            del args[:2]
+            if flag == '--jobs':
+                jobs = int(value)
+            else:
+                json_path = value
+    except (IndexError, ValueError):
+        args = []
+    if len(args) < 2 or args[1] not in COMMANDS or args[1] in _EXCLUDED:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    pattern, command, rest = args[0], args[1], args[2:]
+    projects = find_projects(pattern)
+    if not projects:
+        print(f"No projects match {pattern}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = run_batch(projects, command, rest, jobs)
+    elapsed = time.perf_counter() - start
+    print_report(results, elapsed)
+    if json_path:
+        import json
+
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'command': [command] + rest, 'seconds': round(elapsed, 3),
+                       'results': results}, f, indent=2)
+    if any(result['status'] != 'ok' for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
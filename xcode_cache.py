@@ -0,0 +1,151 @@
+"""
+On-disk cache of parsed project files.
+
+XcodeProject.load asks this module for a snapshot before tokenizing. A
+snapshot is everything the parser and build_indexes produce (the object
+table, comments, duplicates, spans and reverse indexes) dumped with marshal,
+which loads several times faster than the text can be tokenized. Entries are
+named by a BLAKE2 digest of the file contents and also record its length,
+so a project that git checks out again, or that another tool rewrites with
+the same bytes, still hits; any edit misses.
+
+Entries live in $XCODE_CACHE_DIR (default ~/.cache/xcode-tools). Every hit
+refreshes the entry's mtime, and when a new entry takes the directory past
+$XCODE_CACHE_MB megabytes (default 256) the least recently used entries are
+deleted. XCODE_CACHE_MB=0 turns the cache off.
+
+With --trace-json/--profile the hits, misses and evictions show up as
+counters in the summary and the trace.
+"""
+
+import gc
+import hashlib
+import marshal
+import os
+import sys
+
+import xcode_trace
+
+# Bump when the parser or the snapshot layout changes; marshal's format is
+# tied to the Python version, so that goes into the entry names as well.
+FORMAT = 2
+_SUFFIX = f'.v{FORMAT}-py{sys.version_info[0]}{sys.version_info[1]}.snap'
+
+DEFAULT_MAX_MB = 256
+
+
+def cache_dir():
+    """Return the cache directory, honouring $XCODE_CACHE_DIR and $XDG_CACHE_HOME."""
+    path = os.environ.get('XCODE_CACHE_DIR')
+    if path:
+        return path
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'xcode-tools')
+
+
+def max_bytes():
+    """Return the size cap in bytes; 0 means the cache is disabled."""
+    try:
+        return int(float(os.environ.get('XCODE_CACHE_MB', DEFAULT_MAX_MB)) * (1 << 20))
+    except ValueError:
+        return DEFAULT_MAX_MB << 20
+
+
+def digest(text):
+    """Return the key of an entry for text."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(cache_dir(), key + _SUFFIX)
+
+
+def get(text, key=None):
+    """Return the snapshot stored for text, or None on a miss."""
+    if max_bytes() <= 0:
+        return None
+    path = _entry_path(key or digest(text))
+    with xcode_trace.phase('snapshot', action='load') as p:
+        # marshal creates every container at once; left on, the cyclic GC
+        # would run full collections over them several times during the load
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+            length, snapshot = marshal.loads(blob)
+            if length != len(text):
+                snapshot = None
+        except (OSError, ValueError, EOFError, TypeError):
+            snapshot = None
+        finally:
+            if enabled:
+                gc.enable()
+        p.note(hit=snapshot is not None)
+    if snapshot is None:
+        xcode_trace.count('cache miss')
+        return None
+    xcode_trace.count('cache hit')
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return snapshot
+
+
+def put(text, snapshot, key=None):
+    """Store snapshot for text, evicting old entries past the size cap.
+
+    Failing to write the cache (read-only home, full disk) is not an error;
+    the next run simply parses again.
+    """
+    limit = max_bytes()
+    if limit <= 0:
+        return
+    path = _entry_path(key or digest(text))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with xcode_trace.phase('snapshot', action='store') as p:
+        try:
+            blob = marshal.dumps((len(text), snapshot))
+            p.note(bytes=len(blob))
+            if len(blob) > limit:
+                return
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except (OSError, ValueError):
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+    evict(limit)
+
+
+def evict(limit=None):
+    """Delete least recently used entries until the cache fits in limit bytes."""
+    limit = max_bytes() if limit is None else limit
+    directory = cache_dir()
+    entries = []
+    total = 0
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.snap'):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+    except OSError:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        if total <= limit:
+            break
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        xcode_trace.count('cache evict')
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Find and repair duplicated object IDs and dangling references in a
+project.pbxproj file.
+
+Detection is a streaming scan over the text in Xcode's one-object-per-line
+layout, without building the object table. A first check gathers the
+defined IDs, fileRef values and ID list entries (files, children,
+buildPhases, ...) with findall and compares them as sets, so a clean 50 MB
+project is checked in about half a second and is never rewritten. Only when
+that check fails is the text scanned again for offsets, isas and comments.
+
+When problems are found, every second and later definition of a duplicated
+ID gets a freshly allocated ID, and each reference to that ID is pointed at
+the definition whose isa fits where the reference appears (a "files" entry
+wants a PBXBuildFile, a "fileRef" wants a file reference, and so on; the
+n-th mention inside one list goes to the n-th fitting definition). Build
+files whose fileRef does not exist are dropped, as are list entries that
+name undefined objects. All edits are spliced into the original text in a
+single pass and written once, atomically and through the edit journal
+(xcode_journal.py), so `xcode_journal.py PROJECT undo` reverts a repair.
+
+Usage: python3 xcode_dedupe.py path/to/project.pbxproj [--dry-run]
+"""
+
+import re
+import sys
+
+import xcode_journal
+import xcode_trace
+from xcode_ids import IdAllocator
+from xcode_project import BUILD_PHASE_ISAS, GROUP_ISAS, TARGET_ISAS
+
+
+# Patterns start with a literal newline rather than a MULTILINE "^" so the
+# regex engine can skip ahead with a substring search.
+_DEF_RE = re.compile(r'\n\t\t([^\s=;{}()"]+)(?: /\* ([^\n]*?) \*/)? = \{\s*isa = (\w+);')
+_DEF_ID_RE = re.compile(r'\n\t\t([^\s=;{}()"]+)(?: /\*[^\n]*?\*/)? = \{')
+_FILE_REF_RE = re.compile(r'fileRef = ([^\s;"]+)(?: /\* ([^\n]*?) \*/)?')
+_FILE_REF_ID_RE = re.compile(r'fileRef = ([^\s;"]+)')
+_ENTRY_RE = re.compile(r'\n\t+([^\s,/()]+)(?: /\* ([^\n]*?) \*/)?,')
+_ENTRY_ID_RE = re.compile(r'\t([^\s,/()]+)[ ,]')
+_VALUE_RE = re.compile(r'([^\s;"]+)(?: /\* ([^\n]*?) \*/)?')
+_LIST_KEYS = frozenset(['files', 'children', 'buildPhases', 'targets',
+                        'buildConfigurations', 'dependencies'])
+# Keys whose value is a single object ID; also used by xcode_recover and xcode_query
+SCALAR_KEYS = ('buildConfigurationList', 'productReference', 'mainGroup', 'productRefGroup',
+               'target', 'targetProxy', 'containerPortal', 'baseConfigurationReference',
+               'rootObject')
+
+_FILE_LIKE = frozenset(['PBXFileReference', 'PBXReferenceProxy']) | GROUP_ISAS
+
+# Which isas a reference in a given position is expected to point at.
+EXPECTED_ISAS = {
+    'files': frozenset(['PBXBuildFile']),
+    'children': _FILE_LIKE,
+    'fileRef': _FILE_LIKE,
+    'buildPhases': BUILD_PHASE_ISAS,
+    'targets': TARGET_ISAS,
+    'target': TARGET_ISAS,
+    'buildConfigurations': frozenset(['XCBuildConfiguration']),
+    'buildConfigurationList': frozenset(['XCConfigurationList']),
+    'dependencies': frozenset(['PBXTargetDependency']),
+    'productReference': frozenset(['PBXFileReference']),
+    'baseConfigurationReference': frozenset(['PBXFileReference']),
+    'mainGroup': GROUP_ISAS,
+    'productRefGroup': GROUP_ISAS,
+    'targetProxy': frozenset(['PBXContainerItemProxy']),
+    'containerPortal': frozenset(['PBXProject', 'PBXFileReference']),
+    'rootObject': frozenset(['PBXProject']),
+}
+
+
+def _line_span(text, pos):
+    """Return the (start, end) of the line holding pos, newline included."""
+    start = text.rfind('\n', 0, pos) + 1
+    end = text.find('\n', pos)
+    return start, (len(text) if end == -1 else end + 1)
+
+
+def _id_lists(text):
+    """Yield (key, start, end) for every list of object IDs in the text."""
+    pos = 0
+    while True:
+        start = text.find(' = (\n', pos)
+        if start == -1:
+            return
+        end = text.find(');', start)
+        if end == -1:
+            return
+        key = text[text.rfind('\t', 0, start) + 1:start]
+        if key in _LIST_KEYS:
+            yield key, start + 4, end
+        pos = end
+
+
+def has_problems(text):
+    """Quick check for duplicate definitions and dangling references.
+
+    Collects IDs with findall only, so a clean project costs a handful of
+    C-level scans and no per-object Python work.
+    """
+    ids = _DEF_ID_RE.findall(text)
+    defined = set(ids)
+    if len(defined) != len(ids):
+        return True
+    if not defined.issuperset(_FILE_REF_ID_RE.findall(text)):
+        return True
+    return any(not defined.issuperset(_ENTRY_ID_RE.findall(text, start, end))
+               for _, start, end in _id_lists(text))
+
+
+def analyze(text):
+    """Scan project text and return a report of what needs repair.
+
+    The report holds "definitions" (ID -> list of (offset, isa, comment) in
+    file order, duplicated IDs only), "dangling_file_refs" (build file IDs
+    whose fileRef is undefined), "dangling_entries" (list key, ID, offset
+    for list entries naming undefined or dropped objects) and "references"
+    (key, ID, offset, list offset, comment for references to duplicated
+    IDs).
+    """
+    defined = {}
+    duplicated = {}
+    if not has_problems(text):
+        return {'definitions': duplicated, 'dangling_file_refs': [], 'dangling_entries': [],
+                'references': [], 'defined_ids': defined}
+    for match in _DEF_RE.finditer(text):
+        obj_id = match[1]
+        if obj_id in defined:
+            duplicated.setdefault(obj_id, [defined[obj_id]]).append(match)
+        else:
+            defined[obj_id] = match
+    for obj_id, matches in duplicated.items():
+        duplicated[obj_id] = [(m.start(1), m[3], m[2]) for m in matches]
+
+    references = []
+    dangling_file_refs = []
+    for match in _FILE_REF_RE.finditer(text):
+        ref_id = match[1]
+        if ref_id in duplicated:
+            references.append(('fileRef', ref_id, match.start(1), None, match[2]))
+        elif ref_id not in defined:
+            owner = _DEF_RE.match(text, text.rfind('\n', 0, match.start()))
+            if owner is not None and owner[3] == 'PBXBuildFile':
+                dangling_file_refs.append((owner[1], ref_id, owner.start(1)))
+    dropped = {obj_id for obj_id, _, _ in dangling_file_refs}
+
+    dangling_entries = []
+    for key, start, end in _id_lists(text):
+        for entry in _ENTRY_RE.finditer(text, start, end):
+            obj_id = entry[1]
+            if obj_id not in defined or (obj_id in dropped and obj_id not in duplicated):
+                dangling_entries.append((key, obj_id, entry.start(1)))
+            elif obj_id in duplicated:
+                references.append((key, obj_id, entry.start(1), start, entry[2]))
+
+    for key in SCALAR_KEYS:
+        needle = f'\t{key} = '
+        pos = text.find(needle)
+        while pos != -1:
+            match = _VALUE_RE.match(text, pos + len(needle))
+            if match[1] in duplicated:
+                references.append((key, match[1], match.start(1), None, match[2]))
+            pos = text.find(needle, match.end())
+
+    return {
+        'definitions': duplicated,
+        'dangling_file_refs': dangling_file_refs,
+        'dangling_entries': dangling_entries,
+        'references': references,
+        'defined_ids': defined,
+    }
+
+
+def repair(text, report, deterministic=True):
+    """Apply the fixes described by an analyze() report; returns (text, remap).
+
+    remap maps each duplicated ID to the list of IDs its definitions now
+    have, in file order (the first keeps the original ID). The edits made
+    are left in report['hunks'] for the edit journal.
+    """
+    ids = IdAllocator(report['defined_ids'], deterministic=deterministic)
+    edits = []
+    remap = {}
+    for obj_id, definitions in report['definitions'].items():
+        new_ids = [obj_id]
+        for occurrence, (offset, isa, _) in enumerate(definitions[1:], 1):
+            new_id = ids.new_id('dedupe', obj_id, occurrence, isa)
+            new_ids.append(new_id)
+            edits.append((offset, offset + len(obj_id), new_id))
+        remap[obj_id] = new_ids
+
+    # A reference goes to the definitions whose isa fits its position, and
+    # among those to the ones whose comment matches the reference's comment;
+    # remaining ties inside one list are handed out in order.
+    counts = {}
+    for key, obj_id, offset, list_offset, comment in report['references']:
+        candidates = list(zip(remap[obj_id], report['definitions'][obj_id]))
+        expected = EXPECTED_ISAS.get(key)
+        fitting = [c for c in candidates if expected is None or c[1][1] in expected] or candidates
+        fitting = [c for c in fitting if c[1][2] == comment] or fitting
+        fitting = [new_id for new_id, _ in fitting]
+        count_key = (list_offset, obj_id, tuple(fitting))
+        occurrence = counts.get(count_key, 0)
+        counts[count_key] = occurrence + 1
+        choice = fitting[min(occurrence, len(fitting) - 1)]
+        if choice != obj_id:
+            edits.append((offset, offset + len(obj_id), choice))
+
+    for _, _, offset in report['dangling_file_refs']:
+        start, end = _line_span(text, offset)
+        edits.append((start, end, ''))
+    for _, _, offset in report['dangling_entries']:
+        start, end = _line_span(text, offset)
+        edits.append((start, end, ''))
+
+    report['hunks'] = []
+    if not edits:
+        return text, remap
+    edits.sort()
+    out = []
+    pos = 0
+    for start, end, replacement in edits:
+        if start < pos:
+            continue
+        out.append(text[pos:start])
+        out.append(replacement)
+        report['hunks'].append([start, text[start:end], replacement])
+        pos = end
+    out.append(text[pos:])
+    return ''.join(out), remap
+
+
+def dedupe_project(project_path, dry_run=False):
+    """Check a project file and repair it in place; returns the report."""
+    with xcode_trace.phase('read') as p, open(project_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+        p.note(bytes=len(text))
+    with xcode_trace.phase('analyze'):
+        report = analyze(text)
+    problems = (report['definitions'] or report['dangling_file_refs']
+                or report['dangling_entries'])
+    report['changed'] = False
+    if problems and not dry_run:
+        with xcode_trace.phase('mutate'):
+            fixed, report['remap'] = repair(text, report)
+        if fixed != text:
+            xcode_journal.write(project_path, text, fixed, report['hunks'], label='dedupe')
+            report['changed'] = True
+    return report
+
+
+def print_report(report):
+    for obj_id, definitions in report['definitions'].items():
+        isas = ', '.join(isa for _, isa, _ in definitions)
+        new_ids = report.get('remap', {}).get(obj_id)
+        suffix = f" -> {', '.join(new_ids[1:])}" if new_ids else ''
+        print(f"Duplicate ID {obj_id} ({isas}){suffix}")
+    for obj_id, ref_id, _ in report['dangling_file_refs']:
+        print(f"Build file {obj_id} points at missing fileRef {ref_id}")
+    for key, obj_id, _ in report['dangling_entries']:
+        print(f"'{key}' lists missing object {obj_id}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = [a for a in argv if not a.startswith('--')]
+    if len(args) != 1:
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    dry_run = '--dry-run' in argv
+    report = dedupe_project(args[0], dry_run=dry_run)
+    print_report(report)
+    if report['changed']:
+        print("Project file repaired.")
+    elif dry_run and (report['definitions'] or report['dangling_file_refs']
+                      or report['dangling_entries']):
+        print("Dry run: no changes written.")
+    else:
+        print("Nothing to do: no duplicate IDs or dangling references found.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
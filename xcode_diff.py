@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Compare two versions of a project.pbxproj by object instead of by line.
+
+Each file is cut into object definitions by Xcode's layout (a definition
+starts on a line indented by two tabs, as in xcode_dedupe's scan) with a
+single regex split and no parsing, and each definition is hashed as raw
+text. If the split finds fewer or more definitions than there are isa
+assignments in the file, some object is laid out differently and the scan
+is not trusted. Objects whose hashes match are unchanged and are never parsed; only
+objects present in both files with different hashes are decoded and
+compared value by value, which also drops the ones that differ only in
+layout or in "/* name */" annotations. Diffing two large versions therefore
+costs about as much as reading them plus decoding what actually changed,
+and does not care how the objects are ordered in either file. A file not
+(or not entirely) in Xcode's layout is indexed with xcode_mmap.MappedProject
+instead.
+
+The report lists added, removed and modified objects with their isa and
+name. For a modified object it lists the keys that changed; ID lists
+(children, files, buildPhases, ...) are shown as the IDs that joined or
+left them, and nested dictionaries such as buildSettings as one line per
+setting. Changed top-level entries (rootObject, objectVersion, ...) are
+listed as well. With --json the report is printed as JSON. As with diff(1),
+the exit status is 0 when the projects are the same and 1 when they differ.
+
+Usage: python3 xcode_diff.py OLD NEW [--json]
+       e.g. python3 xcode_diff.py Jamminverz.xcodeproj/project.pbxproj.backup Jamminverz.xcodeproj/project.pbxproj
+"""
+
+import contextlib
+import re
+import sys
+
+import xcode_trace
+from xcode_merge import ID_LIST_KEYS
+from xcode_mmap import MappedProject
+from xcode_project import ParseError, _Parser
+
+# The header of an object definition in Xcode's layout, with the ID and
+# comment captured, so that splitting on it yields ID, comment and body
+_DEFINITION_RE = re.compile(r'\n\t\t([^\s=;{}()"]+)(?: /\* ([^\n]*?) \*/)? = \{')
+_ISA_RE = re.compile(r'\s*isa = (\w+);')
+# Every isa assignment in the file, however it is laid out; one per object.
+# The regex starts with the literal so the engine can search for it; what
+# precedes it is checked separately
+_ANY_ISA_RE = re.compile(r'isa\b"?\s*=')
+_ISA_LEAD = frozenset(' \t\n{;"')
+# Where the body of the last object before a section marker, or before the
+# end of the objects table, stops
+_OBJECT_END_RE = re.compile(r'\n(?:/\*|\t\})')
+
+
+class ScannedProject:
+    """Object definitions located in Xcode-layout text, decoded on demand.
+
+    Offers the parts of MappedProject's interface that diff_projects uses:
+    content_hashes, isa, comment, objects, data and duplicates.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.duplicates = []
+        with xcode_trace.phase('scan', bytes=len(text)):
+            # One split does all the cutting in C; each body runs from just
+            # after the "{" to where the next definition begins
+            pieces = _DEFINITION_RE.split(text)
+            if len(pieces) < 4:
+                raise ParseError("No object definitions in Xcode's layout")
+            ids = pieces[1::3]
+            # A definition laid out differently is not split off but absorbed
+            # into the body before it, where it would go unseen: every isa
+            # must belong to a definition the split found
+            isas = sum(1 for match in _ANY_ISA_RE.finditer(text)
+                       if text[match.start() - 1] in _ISA_LEAD)
+            if isas != len(ids):
+                raise ParseError("Object definitions not all in Xcode's layout")
+            self._comments = pieces[2::3]
+            self._bodies = pieces[3::3]
+            self._rows = dict(zip(ids, range(len(ids))))
+            if len(self._rows) == len(ids):
+                self._hashes = dict(zip(ids, map(hash, self._bodies)))
+            else:
+                self._keep_first(ids)
+        self.objects = _Decoded(self)
+        self.data = self._root()
+
+    def _keep_first(self, ids):
+        """Index only the first definition of each repeated ID, like the parser."""
+        self._rows = {}
+        self._hashes = {}
+        for row, obj_id in enumerate(ids):
+            if obj_id in self._rows:
+                self.duplicates.append((obj_id, None))
+                continue
+            self._rows[obj_id] = row
+            self._hashes[obj_id] = hash(self._bodies[row])
+
+    def _root(self):
+        """Parse the top-level entries with the objects table cut out."""
+        text = self.text
+        key = text.find('\n\tobjects = {')
+        close = text.rfind('\n\t};')
+        if key == -1 or close < key:
+            raise ParseError("No objects dictionary found")
+        data = _Parser(text[:key + 1] + '\tobjects = {};' + text[close + 4:]).parse()
+        data.pop('objects', None)
+        return data
+
+    def content_hashes(self):
+        """Return ID -> hash of the text of its definition."""
+        return self._hashes
+
+    def isa(self, obj_id):
+        match = _ISA_RE.match(self._bodies[self._rows[obj_id]])
+        return match[1] if match else self.objects[obj_id].get('isa')
+
+    def comment(self, obj_id):
+        comment = self._comments[self._rows[obj_id]]
+        return comment.strip() if comment is not None else None
+
+    def decode(self, obj_id):
+        body = self._bodies[self._rows[obj_id]]
+        marker = _OBJECT_END_RE.search(body)
+        body = body[:marker.start() if marker else len(body)].rstrip()
+        return _Parser('{' + (body[:-1] if body.endswith(';') else body)).parse()
+
+
+class _Decoded(dict):
+    """ID -> decoded object, filled on first lookup."""
+
+    def __init__(self, project):
+        super().__init__()
+        self._project = project
+
+    def __contains__(self, obj_id):
+        return obj_id in self._project._rows
+
+    def __missing__(self, obj_id):
+        obj = self[obj_id] = self._project.decode(obj_id)
+        return obj
+
+
+def diff_values(old, new, prefix=''):
+    """Return the changes between two decoded dictionaries.
+
+    Each change is a dict with "key" (dotted through nested dictionaries)
+    and either "old"/"new" (None when absent) or, for ID lists,
+    "added"/"removed" (and "reordered" when only the order changed).
+    """
+    changes = []
+    for key in list(old) + [key for key in new if key not in old]:
+        before, after = old.get(key), new.get(key)
+        if before == after:
+            continue
+        where = prefix + key
+        if isinstance(before, dict) and isinstance(after, dict):
+            changes.extend(diff_values(before, after, where + '.'))
+        elif key in ID_LIST_KEYS and isinstance(before, list) and isinstance(after, list):
+            before_set, after_set = set(before), set(after)
+            added = [entry for entry in after if entry not in before_set]
+            removed = [entry for entry in before if entry not in after_set]
+            change = {'key': where, 'added': added, 'removed': removed}
+            if not added and not removed:
+                change['reordered'] = True
+            changes.append(change)
+        else:
+            changes.append({'key': where, 'old': before, 'new': after})
+    return changes
+
+
+def diff_projects(old, new):
+    """Compare two ScannedProjects or MappedProjects; returns the report as a dict.
+
+    The report has "added" and "removed" (lists of {"id", "isa", "name"}),
+    "modified" (the same plus "changes" from diff_values), "root" (changes
+    to the top-level entries) and "duplicates" (repeated IDs per side,
+    whose later definitions are not compared).
+    """
+    with xcode_trace.phase('hash') as p:
+        old_hashes = old.content_hashes()
+        new_hashes = new.content_hashes()
+        p.note(objects=len(old_hashes) + len(new_hashes))
+    with xcode_trace.phase('compare') as p:
+        added = [_describe(new, obj_id) for obj_id in new_hashes if obj_id not in old_hashes]
+        removed = [_describe(old, obj_id) for obj_id in old_hashes if obj_id not in new_hashes]
+        modified = []
+        decoded = 0
+        for obj_id, digest in old_hashes.items():
+            other = new_hashes.get(obj_id, digest)
+            if other == digest:
+                continue
+            decoded += 1
+            changes = diff_values(dict(old.objects[obj_id]), dict(new.objects[obj_id]))
+            if changes:
+                entry = _describe(new, obj_id)
+                entry['changes'] = changes
+                modified.append(entry)
+        p.note(decoded=decoded)
+    return {'added': added, 'removed': removed, 'modified': modified,
+            'root': diff_values(old.data, new.data),
+            'duplicates': {'old': [obj_id for obj_id, _ in old.duplicates],
+                           'new': [obj_id for obj_id, _ in new.duplicates]}}
+
+
+def _describe(project, obj_id):
+    return {'id': obj_id, 'isa': project.isa(obj_id), 'name': project.comment(obj_id)}
+
+
+def open_project(path, stack):
+    """Return a ScannedProject for path, or a MappedProject (closed by stack)."""
+    with xcode_trace.phase('read') as p, open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+        p.note(bytes=len(text))
+    try:
+        return ScannedProject(text)
+    except ParseError:
+        return stack.enter_context(MappedProject(path))
+
+
+def diff_files(old_path, new_path):
+    """Compare two project files; returns the diff_projects report."""
+    with contextlib.ExitStack() as stack:
+        old = open_project(old_path, stack)
+        new = open_project(new_path, stack)
+        report = diff_projects(old, new)
+        # Names for the IDs that joined or left lists, from whichever side has them
+        for entry in report['modified']:
+            for change in entry['changes']:
+                for side, project in (('added', new), ('removed', old)):
+                    if side in change:
+                        change[side] = [{'id': obj_id, 'name': _name(project, obj_id)}
+                                        for obj_id in change[side]]
+    return report
+
+
+def _name(project, obj_id):
+    return project.comment(obj_id) if obj_id in project.objects else None
+
+
+def _show(value):
+    if value is None:
+        return '(absent)'
+    text = repr(value)
+    return text if len(text) <= 60 else text[:57] + '...'
+
+
+def print_report(report):
+    for side, mark in (('old', '<'), ('new', '>')):
+        for obj_id in report['duplicates'][side]:
+            print(f"{mark} duplicate ID {obj_id}: only its first definition is compared")
+    for change in report['root']:
+        print(f"~ {change['key']}: {_show(change['old'])} -> {_show(change['new'])}")
+    for mark, key in (('+', 'added'), ('-', 'removed'), ('~', 'modified')):
+        for entry in report[key]:
+            print(f"{mark} {entry['id']} {entry['isa']} {entry['name'] or ''}".rstrip())
+            for change in entry.get('changes', ()):
+                if 'old' in change:
+                    print(f"    {change['key']}: {_show(change['old'])} -> {_show(change['new'])}")
+                elif change.get('reordered'):
+                    print(f"    {change['key']}: reordered")
+                for side, sign in (('added', '+'), ('removed', '-')):
+                    for item in change.get(side, ()):
+                        name = f" ({item['name']})" if item['name'] else ''
+                        print(f"    {change['key']}: {sign} {item['id']}{name}")
+    print(f"{len(report['added'])} added, {len(report['removed'])} removed, "
+          f"{len(report['modified'])} modified object(s).")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    as_json = '--json' in args
+    args = [a for a in args if a != '--json']
+    if len(args) != 2 or any(a.startswith('--') for a in args):
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    try:
+        report = diff_files(*args)
+    except (OSError, ParseError) as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    if as_json:
+        import json
+
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print_report(report)
+    if report['added'] or report['removed'] or report['modified'] or report['root']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
@@ -0,0 +1,65 @@
+"""
+Object ID allocation for Xcode project files.
+
+IdAllocator hands out 24-character hex IDs that are checked against the
+project's parsed object table, so allocation is a constant-time set lookup
+rather than a rescan of the file. In deterministic mode an ID is derived by
+hashing what the object represents (kind, target, group path, file path), so
+re-runs and parallel CI jobs that make the same edit produce byte-identical
+project files.
+"""
+
+import hashlib
+import random
+
+
+class IdAllocator:
+    """Collision-free ID source backed by an existing set of IDs."""
+
+    def __init__(self, existing_ids=(), deterministic=False):
+        # existing_ids is consulted, not copied: passing project.objects keeps
+        # the allocator in sync with objects added after it was created.
+        self.existing = existing_ids
+        self.issued = set()
+        self.deterministic = deterministic
+        self._counter = random.getrandbits(96)
+
+    def _taken(self, candidate):
+        return candidate in self.existing or candidate in self.issued
+
+    def new_id(self, *key):
+        """Return an unused ID.
+
+        In deterministic mode the key parts (for example kind, target, group
+        path and file path) seed a SHA-1 hash; on the rare collision the hash
+        is salted with a counter, which is still reproducible for the same
+        project contents. In random mode the key is ignored and IDs come from
+        a counter started at a random 96-bit value.
+        """
+        if self.deterministic:
+            if not key:
+                raise ValueError("Deterministic IDs need a key to hash")
+            seed = '\0'.join(str(part) for part in key)
+            salt = 0
+            while True:
+                material = seed if salt == 0 else f"{seed}\0{salt}"
+                candidate = hashlib.sha1(material.encode('utf-8')).hexdigest()[:24].upper()
+                if not self._taken(candidate):
+                    break
+                salt += 1
+        else:
+            while True:
+                self._counter = (self._counter + 1) & ((1 << 96) - 1)
+                candidate = f"{self._counter:024X}"
+                if not self._taken(candidate):
+                    break
+        self.issued.add(candidate)
+        return candidate
+
+    def file_reference_id(self, group_path, file_path):
+        """ID for a PBXFileReference to file_path inside group_path."""
+        return self.new_id('PBXFileReference', group_path, file_path)
+
+    def build_file_id(self, target, group_path, file_path, phase='Sources'):
+        """ID for the PBXBuildFile that builds file_path in target's phase."""
+        return self.new_id('PBXBuildFile', target, phase, group_path, file_path)
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Edit journal for project.pbxproj files, replacing full backup copies.
+
+Every save appends one line to project.pbxproj.journal, next to the
+project, before the new text is renamed into place. The line records which
+spans of the old text were replaced by what: with the splice serializer
+those are the definitions of the objects the edit touched, so an entry
+costs about as much as the objects it changed, not a copy of the file. It
+also records BLAKE2 digests of the text before and after, which is how the
+journal notices edits made behind its back (by Xcode, git, a text editor)
+and refuses to replay across them.
+
+The journal is a linear history with a cursor. Undo and redo to any entry
+apply the recorded spans backwards or forwards, check the result against
+the recorded digest and write the project atomically; a save made after an
+undo discards the undone entries, as in an editor. When the journal passes
+$XCODE_JOURNAL_MB megabytes (default 16) the oldest entries are dropped to
+halve it, and `compact` rewrites it with only the reachable entries (or
+the last N). XCODE_JOURNAL_MB=0 turns journaling off.
+
+Usage: python3 xcode_journal.py path/to/project.pbxproj [log | undo [N] | redo [N] | goto ENTRY]
+       python3 xcode_journal.py path/to/project.pbxproj compact [--keep N]
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+
+import xcode_trace
+from xcode_cache import digest
+
+DEFAULT_MAX_MB = 16
+
+
+class JournalError(Exception):
+    """Raised when the journal cannot move the project to the requested entry."""
+
+
+def journal_path(project_path):
+    return project_path + '.journal'
+
+
+def max_bytes():
+    """Return the journal size cap in bytes; 0 means journaling is off."""
+    try:
+        return int(float(os.environ.get('XCODE_JOURNAL_MB', DEFAULT_MAX_MB)) * (1 << 20))
+    except ValueError:
+        return DEFAULT_MAX_MB << 20
+
+
+def write_atomic(path, text):
+    """Write text through a sibling temp file and a rename.
+
+    A reader (Xcode, a watcher) never sees a half-written project, and the
+    file keeps its permissions.
+    """
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    try:
+        with xcode_trace.phase('write', bytes=len(text)):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            if os.path.exists(path):
+                shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# ----------------------------------------------------------------------
+# Hunks: [start, old, new] triples, start being an offset in the old text
+# ----------------------------------------------------------------------
+
+def diff_hunks(old, new):
+    """Return the hunks turning old into new, for writers that don't know them.
+
+    Compares whole lines; the splice serializer hands its hunks over
+    directly and never needs this.
+    """
+    import difflib
+
+    a = old.splitlines(True)
+    b = new.splitlines(True)
+    offsets = [0]
+    for line in a:
+        offsets.append(offsets[-1] + len(line))
+    hunks = []
+    matcher = difflib.SequenceMatcher(None, a, b, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            hunks.append([offsets[i1], ''.join(a[i1:i2]), ''.join(b[j1:j2])])
+    return hunks
+
+
+def trim_hunks(hunks):
+    """Shrink each hunk to the part that changed.
+
+    The splice serializer replaces whole object definitions, and a group
+    with a hundred children is several kilobytes for a one-line change.
+    """
+    trimmed = []
+    for start, old, new in hunks:
+        if old == new:
+            continue
+        head = len(os.path.commonprefix([old, new]))
+        limit = min(len(old), len(new)) - head
+        tail = 0
+        while tail < limit and old[-1 - tail] == new[-1 - tail]:
+            tail += 1
+        trimmed.append([start + head, old[head:len(old) - tail], new[head:len(new) - tail]])
+    return trimmed
+
+
+def apply_hunks(text, hunks):
+    """Apply hunks to the text they were recorded against."""
+    out = []
+    pos = 0
+    for start, old, new in hunks:
+        if start < pos or text[start:start + len(old)] != old:
+            raise JournalError(f"the text at offset {start} is not what the journal recorded")
+        out.append(text[pos:start])
+        out.append(new)
+        pos = start + len(old)
+    out.append(text[pos:])
+    return ''.join(out)
+
+
+def invert_hunks(hunks):
+    """Return the hunks that undo hunks, as offsets into the new text."""
+    inverted = []
+    shift = 0
+    for start, old, new in hunks:
+        inverted.append([start + shift, new, old])
+        shift += len(new) - len(old)
+    return inverted
+
+
+# ----------------------------------------------------------------------
+# Journal file
+# ----------------------------------------------------------------------
+
+def _records(project_path):
+    try:
+        with open(journal_path(project_path), 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            # A line cut short by a crash mid-append
+            continue
+    return records
+
+
+def read_history(project_path, current=None):
+    """Replay the journal; returns (entries, head).
+
+    entries is the linear history and head the number of them applied to
+    the project. When current (the project text) is given and the last
+    applied entry was recorded but its write never happened, the cursor
+    moves back before it, so redo finishes the interrupted save.
+    """
+    entries = []
+    head = 0
+    for record in _records(project_path):
+        if 'head' in record:
+            head = max(0, min(record['head'], len(entries)))
+        else:
+            del entries[head:]
+            entries.append(record)
+            head = len(entries)
+    if current is not None and head:
+        last = entries[head - 1]
+        key = digest(current)
+        if key != last['after'] and key == last['before']:
+            head -= 1
+    return entries, head
+
+
+def _append(project_path, record):
+    with open(journal_path(project_path), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def write(project_path, before, text, hunks=None, label=None):
+    """Journal the change from before to text, then write text atomically.
+
+    hunks are [start, old, new] triples against before; without them they
+    are worked out with diff_hunks. The entry is appended (and synced)
+    before the project is replaced, so a crash in between leaves an entry
+    that read_history recognises as never applied.
+    """
+    limit = max_bytes()
+    if limit > 0 and before is not None and text != before:
+        with xcode_trace.phase('journal') as p:
+            hunks = trim_hunks(diff_hunks(before, text) if hunks is None else hunks)
+            entries, head = read_history(project_path, before)
+            record = {
+                'time': round(time.time(), 3),
+                'label': label or 'edit',
+                'before': digest(before),
+                'after': digest(text),
+                'hunks': hunks,
+            }
+            if head < len(entries):
+                # After an interrupted save the journal's cursor is one entry
+                # ahead of the file; pin it so replay drops that entry
+                _append(project_path, {'head': head})
+            _append(project_path, record)
+            p.note(hunks=len(hunks))
+        write_atomic(project_path, text)
+        if os.path.getsize(journal_path(project_path)) > limit:
+            compact(project_path, max_size=limit // 2)
+        return
+    write_atomic(project_path, text)
+
+
+def goto(project_path, target):
+    """Move the project to the state after entry target (0 = before the first).
+
+    Returns the new head.
+    """
+    with open(project_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    entries, head = read_history(project_path, text)
+    if not 0 <= target <= len(entries):
+        raise JournalError(f"no entry {target}; the journal has {len(entries)}")
+    if target == head:
+        return head
+    expected = entries[head - 1]['after'] if head else entries[0]['before']
+    if digest(text) != expected:
+        raise JournalError("the project changed since the journal last wrote it; "
+                           "undo/redo would overwrite that change")
+    with xcode_trace.phase('journal', entries=abs(target - head)):
+        if target < head:
+            for i in range(head - 1, target - 1, -1):
+                if i < head - 1 and entries[i]['after'] != entries[i + 1]['before']:
+                    raise JournalError(f"entry {i + 2} was made on top of an outside edit; "
+                                       f"cannot go back past it")
+                text = apply_hunks(text, invert_hunks(entries[i]['hunks']))
+            expected = entries[target]['before']
+        else:
+            for i in range(head, target):
+                if i > head and entries[i]['before'] != entries[i - 1]['after']:
+                    raise JournalError(f"entry {i + 1} was made on top of an outside edit; "
+                                       f"cannot go forward past it")
+                text = apply_hunks(text, entries[i]['hunks'])
+            expected = entries[target - 1]['after']
+        if digest(text) != expected:
+            raise JournalError("replaying the journal did not reproduce the recorded text")
+    _append(project_path, {'head': target})
+    write_atomic(project_path, text)
+    return target
+
+
+def compact(project_path, keep=None, max_size=None):
+    """Rewrite the journal with only the entries still reachable.
+
+    keep limits how many entries before the cursor are kept for undo;
+    max_size drops the oldest ones until the journal fits. Entries after
+    the cursor (redo) are always kept. Returns the number of entries left.
+    """
+    entries, head = read_history(project_path)
+    first = 0 if keep is None else max(0, head - keep)
+    lines = [json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries]
+    if max_size is not None:
+        size = sum(len(line) for line in lines[first:])
+        while first < head and size > max_size:
+            size -= len(lines[first])
+            first += 1
+    out = lines[first:]
+    if head < len(entries):
+        out.append(json.dumps({'head': head - first}) + '\n')
+    write_atomic(journal_path(project_path), ''.join(out))
+    return len(entries) - first
+
+
+def print_log(project_path):
+    with open(project_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    entries, head = read_history(project_path, text)
+    if not entries:
+        print("The journal is empty.")
+        return
+    for i, entry in enumerate(entries, 1):
+        marker = '*' if i == head else ' '
+        when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))
+        size = sum(len(new) - len(old) for _, old, new in entry['hunks'])
+        print(f"{marker}{i:>4}  {when}  {entry['label']:<32} "
+              f"{len(entry['hunks'])} hunk(s), {size:+d} chars")
+    if head == 0:
+        print("*   0  (before the first entry)")
+    elif digest(text) != entries[head - 1]['after']:
+        print("The project has changed since the last journaled write.")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    if not args:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    project_path = args[0]
+    command = args[1] if len(args) > 1 else 'log'
+    rest = args[2:]
+    try:
+        if command == 'log' and not rest:
+            print_log(project_path)
+            return
+        if command == 'compact':
+            keep = int(rest[1]) if rest[:1] == ['--keep'] and len(rest) == 2 else None
+            if rest and keep is None:
+                raise ValueError
+            left = compact(project_path, keep=keep)
+            print(f"Journal compacted to {left} entr{'y' if left == 1 else 'ies'}.")
+            return
+        if command in ('undo', 'redo', 'goto') and len(rest) <= 1:
+            with open(project_path, 'r', encoding='utf-8') as f:
+                entries, head = read_history(project_path, f.read())
+            if command == 'goto':
+                target = int(rest[0])
+            else:
+                steps = int(rest[0]) if rest else 1
+                target = head - steps if command == 'undo' else head + steps
+            target = max(0, min(target, len(entries)))
+            if target == head:
+                print(f"Nothing to {command}.")
+                return
+            goto(project_path, target)
+            label = entries[target - 1]['label'] if target else 'the first entry'
+            print(f"Project is now at entry {target} of {len(entries)} "
+                  f"({'after ' + label if target else 'before ' + label}).")
+            return
+    except ValueError:
+        pass
+    except JournalError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print('\n'.join(__doc__.strip().splitlines()[-2:]))
+    sys.exit(2)
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
@@ -0,0 +1,81 @@
+"""
+Multi-pattern string matching for resolving many file names at once.
+
+NameMatcher is an Aho-Corasick automaton: all patterns are compiled into one
+trie with failure links, and each text is scanned once regardless of how many
+patterns there are. Matching hundreds of names against every file reference
+path therefore costs O(total path length + matches) instead of
+O(names x paths).
+"""
+
+
+class NameMatcher:
+    """Aho-Corasick automaton over a fixed set of patterns."""
+
+    def __init__(self, patterns=()):
+        # Node 0 is the root; each node has a goto table, a failure link and
+        # the patterns that end there (including those reached via failure).
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+        for pattern in patterns:
+            self.add(pattern)
+
+    def add(self, pattern, value=None):
+        """Add a pattern; value (default: the pattern) is reported on a match."""
+        if not pattern:
+            raise ValueError("Empty patterns cannot be matched")
+        if self._built:
+            raise RuntimeError("Cannot add patterns after matching has started")
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), pattern if value is None else value))
+
+    def _build(self):
+        # Breadth-first, so every failure target is finished before it is used
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for ch, nxt in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+        self._built = True
+
+    def _step(self, node, ch):
+        goto, fail = self._goto, self._fail
+        while node and ch not in goto[node]:
+            node = fail[node]
+        return goto[node].get(ch, 0)
+
+    def iter_matches(self, text):
+        """Yield (start, end, value) for every pattern occurrence in text."""
+        if not self._built:
+            self._build()
+        out = self._out
+        node = 0
+        for pos, ch in enumerate(text):
+            node = self._step(node, ch)
+            for length, value in out[node]:
+                yield pos + 1 - length, pos + 1, value
+
+    def suffix_matches(self, text):
+        """Return the values of the patterns that text ends with."""
+        if not self._built:
+            self._build()
+        node = 0
+        for ch in text:
+            node = self._step(node, ch)
+        return [value for _, value in self._out[node]]
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Three-way merge of project.pbxproj files, as a git merge driver.
+
+The three versions are parsed and merged object by object, keyed by object
+ID, instead of line by line:
+
+- an object changed on one side only takes that side's version, and one
+  deleted on one side and untouched on the other is deleted;
+- an object changed on both sides is merged key by key, recursing into
+  dictionaries such as buildSettings;
+- ID lists (files, children, buildPhases, targets, dependencies, ...) are
+  merged as sets: entries either side removed are removed, entries either
+  side added are kept, in our order, with theirs placed after the entry
+  they follow in their version;
+- when both sides added the same file (same group, same path) under
+  different IDs, their reference and build files are folded into ours, so
+  the merge doesn't produce the duplicates fix_project.py used to clean up.
+
+What remains is a real conflict: a value both sides set differently, an
+object one side deleted and the other edited, or a reference one side added
+to an object the other deleted. Conflicts are listed, our value is kept (the
+dangling reference dropped), and the exit status is 1 so git marks the file
+as conflicted. If a version does not parse, the driver falls back to
+`git merge-file`, which leaves the usual conflict markers.
+
+Everything after parsing is a single pass over the three object tables, and
+the result is written with the splice serializer, so only objects the merge
+changed differ from our version. Unchanged versions (base and ours on most
+rebases) come out of xcode_cache without being parsed again.
+
+To use it, add to .gitattributes:
+    *.pbxproj merge=pbxproj
+and run:
+    git config merge.pbxproj.name "project.pbxproj merge"
+    git config merge.pbxproj.driver "python3 /path/to/xcode_merge.py %O %A %B %P"
+
+Usage: python3 xcode_merge.py BASE OURS THEIRS [PATHNAME] [--output FILE]
+"""
+
+import subprocess
+import sys
+
+import xcode_journal
+import xcode_trace
+from xcode_project import ParseError, XcodeProject
+
+# Keys whose values are lists of object IDs, merged as sets
+ID_LIST_KEYS = frozenset([
+    'files', 'children', 'buildPhases', 'targets', 'buildConfigurations', 'dependencies',
+    'buildRules', 'packageProductDependencies', 'packageReferences', 'projectReferences',
+])
+
+_MISSING = object()
+
+
+class _Merge:
+    """State of one merge: the three projects and what came out of it."""
+
+    def __init__(self, base, ours, theirs):
+        self.base = base
+        self.ours = ours
+        self.theirs = theirs
+        self.conflicts = []
+        self.folded = {}
+
+    # ------------------------------------------------------------------
+    # Values
+    # ------------------------------------------------------------------
+
+    def merge_value(self, base, ours, theirs, where, key=None):
+        """Merge one value three ways; records a conflict and keeps ours if it can't."""
+        if ours == theirs:
+            return ours
+        if ours == base:
+            return theirs
+        if theirs == base:
+            return ours
+        if isinstance(ours, dict) and isinstance(theirs, dict):
+            return self._merge_dict(base if isinstance(base, dict) else {}, ours, theirs, where)
+        if key in ID_LIST_KEYS and isinstance(ours, list) and isinstance(theirs, list):
+            return merge_lists(base if isinstance(base, list) else [], ours, theirs)
+        self.conflicts.append((where, f"ours {_show(ours)}, theirs {_show(theirs)}"))
+        return ours
+
+    def _merge_dict(self, base, ours, theirs, where):
+        merged = {}
+        for key in list(ours) + [key for key in theirs if key not in ours]:
+            value = self.merge_value(base.get(key, _MISSING), ours.get(key, _MISSING),
+                                     theirs.get(key, _MISSING), where + (key,), key)
+            if value is not _MISSING:
+                merged[key] = value
+        return merged
+
+    # ------------------------------------------------------------------
+    # Objects
+    # ------------------------------------------------------------------
+
+    def fold_duplicate_adds(self):
+        """Point their new references at ours where both added the same file.
+
+        Walks their group tree from the main group, so a group both sides
+        created is matched before the files in it.
+        """
+        base, ours, theirs = self.base.objects, self.ours.objects, self.theirs.objects
+        ours_new = {}
+        for obj_id in ours.keys() - base.keys():
+            obj = ours[obj_id]
+            if obj.get('isa') == 'PBXBuildFile':
+                ours_new[('build', self.ours.phase_of.get(obj_id), obj.get('fileRef'))] = obj_id
+            elif 'path' in obj or 'name' in obj:
+                ours_new[(self.ours.parent.get(obj_id), obj.get('isa'),
+                          obj.get('path'), obj.get('name'))] = obj_id
+        if not ours_new:
+            return
+        folded = self.folded
+        pending = [self.theirs.main_group()]
+        while pending:
+            group_id = pending.pop()
+            for child in theirs.get(group_id, {}).get('children', ()):
+                obj = theirs.get(child)
+                if obj is None:
+                    continue
+                if child not in base and child not in ours:
+                    match = ours_new.get((folded.get(group_id, group_id), obj.get('isa'),
+                                          obj.get('path'), obj.get('name')))
+                    if match is not None:
+                        folded[child] = match
+                if 'children' in obj:
+                    pending.append(child)
+        if not folded:
+            return
+        for obj_id in theirs.keys() - base.keys() - ours.keys():
+            obj = theirs[obj_id]
+            if obj.get('isa') == 'PBXBuildFile':
+                ref = obj.get('fileRef')
+                match = ours_new.get(('build', self.theirs.phase_of.get(obj_id),
+                                      folded.get(ref, ref)))
+                if match is not None:
+                    folded[obj_id] = match
+        # Rewrite their side as if they had used our IDs; only objects they
+        # changed can mention the IDs they added
+        for obj_id in folded:
+            del theirs[obj_id]
+        for obj_id, obj in theirs.items():
+            if base.get(obj_id) != obj:
+                theirs[obj_id] = _rename(obj, folded)
+
+    def merge_objects(self):
+        """Merge the object tables.
+
+        Returns (changed, removed, edited): merged definitions that differ
+        from ours, IDs to delete, and IDs only our side edited.
+        """
+        base, ours, theirs = self.base.objects, self.ours.objects, self.theirs.objects
+        changed = {}
+        removed = []
+        edited = []
+        for obj_id in _ordered_union(ours, theirs, base):
+            b = base.get(obj_id, _MISSING)
+            o = ours.get(obj_id, _MISSING)
+            t = theirs.get(obj_id, _MISSING)
+            if o == t:
+                continue
+            if t == b:
+                edited.append(obj_id)
+                continue
+            if o == b:
+                merged = t
+            elif t is _MISSING:
+                # Deleted on one side, edited on the other: keep the edit
+                self.conflicts.append(((obj_id,), "edited in ours, deleted in theirs; kept"))
+                merged = o
+            elif o is _MISSING:
+                self.conflicts.append(((obj_id,), "deleted in ours, edited in theirs; kept"))
+                merged = t
+            else:
+                merged = self.merge_value(b if b is not _MISSING else {}, o, t, (obj_id,))
+            if merged is _MISSING:
+                removed.append(obj_id)
+            elif merged != o:
+                changed[obj_id] = merged
+        return changed, removed, edited
+
+    def drop_dangling(self, changed, removed, edited):
+        """Remove list entries naming objects the merged project doesn't have.
+
+        Such an entry is one side's new reference to an object the other
+        side deleted. Only objects the merge produced or our side edited
+        can hold one, so only those are checked.
+        """
+        ours = self.ours.objects
+        gone = set(removed)
+
+        def exists(obj_id):
+            return obj_id in changed or (obj_id in ours and obj_id not in gone)
+
+        for obj_id in list(changed) + edited:
+            obj = changed.get(obj_id) or ours.get(obj_id)
+            if obj is None:
+                continue
+            for key, value in list(obj.items()):
+                if key in ID_LIST_KEYS and isinstance(value, list):
+                    missing = [entry for entry in value if not exists(entry)]
+                    if not missing:
+                        continue
+                    for entry in missing:
+                        self.conflicts.append(((obj_id, key), f"lists {entry}, which the "
+                                               f"other side deleted; dropped"))
+                    obj = changed[obj_id] = dict(obj)
+                    obj[key] = [entry for entry in value if exists(entry)]
+                elif key == 'fileRef' and isinstance(value, str) and not exists(value):
+                    self.conflicts.append(((obj_id, key), f"names {value}, which the other "
+                                           f"side deleted"))
+
+    def merge_roots(self):
+        roots = {}
+        for key in self.ours.data:
+            if key == 'objects':
+                continue
+            value = self.merge_value(self.base.data.get(key, _MISSING), self.ours.data[key],
+                                     self.theirs.data.get(key, _MISSING), (key,), key)
+            if value != self.ours.data[key]:
+                roots[key] = value
+        return roots
+
+    def apply(self):
+        """Merge into the ours project in place; returns the number of objects changed."""
+        with xcode_trace.phase('merge') as p:
+            self.fold_duplicate_adds()
+            changed, removed, edited = self.merge_objects()
+            self.drop_dangling(changed, removed, edited)
+            roots = self.merge_roots()
+            project = self.ours
+            theirs = self.theirs
+            for obj_id in removed:
+                if obj_id in project.objects:
+                    project.remove_object(obj_id)
+            for obj_id, obj in changed.items():
+                # Their comment goes with their definition; a merged one
+                # keeps ours
+                comment = theirs.comments.get(obj_id) if obj is theirs.objects.get(obj_id) else None
+                if obj_id in project.objects:
+                    project.replace_object(obj_id, obj, comment)
+                else:
+                    project.add_object(obj_id, obj, comment)
+            for key, value in roots.items():
+                if value is _MISSING:
+                    del project.data[key]
+                else:
+                    project.data[key] = value
+            p.note(changed=len(changed), removed=len(removed), conflicts=len(self.conflicts))
+        return len(changed) + len(removed) + len(roots)
+
+
+def merge_lists(base, ours, theirs):
+    """Merge ID lists as sets, keeping our order.
+
+    An entry either side removed is removed; entries only they added go
+    after the entry that precedes them in their list (or first).
+    """
+    in_base = set(base)
+    in_ours = set(ours)
+    in_theirs = set(theirs)
+    result = [entry for entry in ours if entry in in_theirs or entry not in in_base]
+    kept = set(result)
+    added = {}
+    anchor = None
+    for entry in theirs:
+        if entry not in in_base and entry not in in_ours:
+            added.setdefault(anchor, []).append(entry)
+        elif entry in kept:
+            anchor = entry
+    if not added:
+        return result
+    merged = list(added.get(None, ()))
+    for entry in result:
+        merged.append(entry)
+        merged.extend(added.get(entry, ()))
+    return merged
+
+
+def _ordered_union(*tables):
+    seen = {}
+    for table in tables:
+        for obj_id in table:
+            seen[obj_id] = None
+    return seen
+
+
+def _rename(value, mapping, key=None):
+    if isinstance(value, str):
+        return mapping.get(value, value)
+    if isinstance(value, list):
+        renamed = [_rename(item, mapping) for item in value]
+        if key in ID_LIST_KEYS:
+            # Folding can make two entries of one list the same ID
+            renamed = list(dict.fromkeys(renamed))
+        return renamed
+    if isinstance(value, dict):
+        return {k: _rename(item, mapping, k) for k, item in value.items()}
+    return value
+
+
+def _show(value):
+    if value is _MISSING:
+        return '(absent)'
+    text = repr(value)
+    return text if len(text) <= 60 else text[:57] + '...'
+
+
+def merge_files(base_path, ours_path, theirs_path, output=None):
+    """Merge three versions into output (ours_path by default).
+
+    Returns (conflicts, folded): conflicts are (where, message) pairs, where
+    naming the object and the keys leading to the value; folded maps
+    their IDs to ours for objects both sides added. Raises ParseError if a
+    version does not parse.
+    """
+    base = XcodeProject.load(base_path)
+    ours = XcodeProject.load(ours_path)
+    theirs = XcodeProject.load(theirs_path)
+    for project in (base, ours, theirs):
+        if project.duplicates:
+            raise ParseError(f"{project.path} repeats object IDs")
+    merge = _Merge(base, ours, theirs)
+    if merge.apply() or output is not None:
+        xcode_journal.write_atomic(output or ours_path, ours.to_string())
+    conflicts = []
+    for where, message in merge.conflicts:
+        comment = ours.comments.get(where[0]) or theirs.comments.get(where[0])
+        label = f"{where[0]} ({comment})" if comment else where[0]
+        conflicts.append(('.'.join((label,) + where[1:]), message))
+    return conflicts, merge.folded
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    output = None
+    if '--output' in args:
+        i = args.index('--output')
+        if i + 1 >= len(args):
+            args = []
+        else:
+            output = args[i + 1]
+            del args[i:i + 2]
+    if len(args) not in (3, 4) or any(a.startswith('--') for a in args):
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    base_path, ours_path, theirs_path = args[:3]
+    name = args[3] if len(args) == 4 else ours_path
+    try:
+        conflicts, folded = merge_files(base_path, ours_path, theirs_path, output)
+    except (ParseError, ValueError) as e:
+        print(f"{name}: {e}; falling back to a line merge")
+        target = output or ours_path
+        if output is not None:
+            with open(ours_path, 'r', encoding='utf-8') as src:
+                xcode_journal.write_atomic(output, src.read())
+        result = subprocess.run(['git', 'merge-file', '-L', 'ours', '-L', 'base', '-L', 'theirs',
+                                 target, base_path, theirs_path])
+        sys.exit(1 if result.returncode else 0)
+    if folded:
+        print(f"{name}: {len(folded)} object(s) both sides added were folded together")
+    for where, message in conflicts:
+        print(f"{name}: conflict at {where}: {message}")
+    if conflicts:
+        print(f"{name}: {len(conflicts)} conflict(s); our side was kept for each")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
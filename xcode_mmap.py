@@ -0,0 +1,297 @@
+"""
+Read-only, memory-mapped view of a project.pbxproj file.
+
+XcodeProject.load reads the whole file into one string and decodes every
+object into dicts of Python strings, so a 200 MB project needs several times
+its size in memory. MappedProject maps the file instead and makes a single
+structural pass over the bytes (braces, parentheses, quoted strings and
+comments only) that records, per object, where its definition starts and
+ends and what its isa is. Nothing else is decoded up front: an object's
+dict is parsed from its byte range the first time it is accessed, and only
+for as long as the caller holds on to it. Pages behind the scan are handed
+back to the kernel as it goes, so peak RSS stays near the size of the index
+rather than the size of the file.
+
+The view answers the lookups the read-only tools need (objects, by_isa,
+parent, source_path, comment), which is enough for xcode_sync.plan_sync.
+Edits still go through XcodeProject.
+"""
+
+import mmap
+import os
+import re
+from array import array
+from collections.abc import Mapping
+
+import xcode_trace
+from xcode_project import GROUP_ISAS, ParseError, _Parser, resolve_source_path
+
+# The lookahead lets the regex engine skip to the next interesting byte
+# instead of trying every alternative at every offset.
+_STRUCTURE_RE = re.compile(
+    rb'(?=["/{}()])(?:'
+    rb'("(?:[^"\\]+|\\.)*")'                # 1: quoted string
+    rb'|(/\*.*?\*/)'                        # 2: block comment
+    rb'|(//[^\n]*)'                         # 3: line comment
+    rb'|([{(])'                             # 4: open
+    rb'|([})])'                             # 5: close
+    rb')',
+    re.DOTALL,
+)
+_OPEN = 4
+_CLOSE = 5
+
+_KEY_RE = re.compile(rb'([A-Za-z0-9_]+)\s*=\s*\Z')
+_HEADER_RE = re.compile(
+    rb'([^\s;=/"{}()]+|"(?:[^"\\]|\\.)*")\s*(?:/\*(.*?)\*/)?\s*=\s*\Z', re.DOTALL)
+_ISA_RE = re.compile(rb'[{;]\s*isa\s*=\s*"?([A-Za-z0-9_]+)')
+
+# Bytes scanned between returning mapped pages to the kernel
+_RELEASE_WINDOW = 4 << 20
+
+
+class MappedObject(Mapping):
+    """One object's attributes, parsed from the mapped bytes on first access."""
+
+    __slots__ = ('_project', '_row', '_value')
+
+    def __init__(self, project, row):
+        self._project = project
+        self._row = row
+        self._value = None
+
+    def _decoded(self):
+        if self._value is None:
+            self._value = self._project._decode(self._row)
+        return self._value
+
+    def __getitem__(self, key):
+        return self._decoded()[key]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __len__(self):
+        return len(self._decoded())
+
+
+class _MappedObjects(Mapping):
+    """The objects table: ID -> MappedObject, created on lookup."""
+
+    def __init__(self, project):
+        self._project = project
+
+    def __getitem__(self, obj_id):
+        return MappedObject(self._project, self._project._rows[obj_id])
+
+    def __contains__(self, obj_id):
+        return obj_id in self._project._rows
+
+    def __iter__(self):
+        return iter(self._project._rows)
+
+    def __len__(self):
+        return len(self._project._rows)
+
+
+class MappedProject:
+    """project.pbxproj indexed in place through mmap."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size == 0:
+                raise ParseError(f"{path} is empty")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        # Row-indexed offsets: the ID, the opening brace and one past the
+        # closing brace of each definition; isas are stored as small codes
+        self._starts = array('q')
+        self._braces = array('q')
+        self._ends = array('q')
+        self._isa_codes = array('H')
+        self._isa_names = []
+        self._rows = {}
+        self.by_isa = {}
+        self.duplicates = []
+        self._parent = None
+        self._group_paths = {}
+        try:
+            with xcode_trace.phase('index', mapped=True):
+                self.data = self._index()
+        except BaseException:
+            self.close()
+            raise
+        self.objects = _MappedObjects(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _index(self):
+        """Record every object's offsets; returns the top-level entries."""
+        mm = self._map
+        release = hasattr(mmap, 'MADV_DONTNEED')
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        isa_codes = {}
+        depth = 0
+        last_end = 0
+        objects_key = objects_close = None
+        entry_start = None
+        brace = None
+        released = 0
+        for match in _STRUCTURE_RE.finditer(mm):
+            kind = match.lastindex
+            pos = match.start()
+            if kind == _OPEN:
+                if depth == 1 and objects_key is None:
+                    key = _KEY_RE.search(mm, last_end, pos)
+                    if key is not None and key.group(1) == b'objects':
+                        objects_key = key.start()
+                        entry_start = pos + 1
+                elif depth == 2 and entry_start is not None and objects_close is None:
+                    brace = pos
+                depth += 1
+            elif kind == _CLOSE:
+                depth -= 1
+                if depth < 0:
+                    raise ParseError(f"Unbalanced '{chr(mm[pos])}' at offset {pos}")
+                if depth == 2 and brace is not None:
+                    self._add_row(entry_start, brace, pos + 1, isa_codes)
+                    entry_start = pos + 1
+                    brace = None
+                elif depth == 1 and entry_start is not None and objects_close is None:
+                    objects_close = pos
+            last_end = match.end()
+            if release and pos - released >= _RELEASE_WINDOW:
+                upto = pos - pos % mmap.PAGESIZE
+                mm.madvise(mmap.MADV_DONTNEED, released, upto - released)
+                released = upto
+        if release:
+            mm.madvise(mmap.MADV_DONTNEED)
+        if depth != 0:
+            raise ParseError(f"Unbalanced braces: {depth} left open at end of file")
+        if objects_close is None:
+            raise ParseError("No objects dictionary found")
+
+        # The top level is tiny once the objects are cut out; parse it fully
+        after = mm.find(b';', objects_close)
+        text = (mm[:objects_key] + b'objects = {};' + mm[after + 1:]).decode('utf-8')
+        data = _Parser(text).parse()
+        data.pop('objects', None)
+        return data
+
+    def _add_row(self, entry_start, brace, end, isa_codes):
+        mm = self._map
+        header = _HEADER_RE.search(mm, entry_start, brace)
+        if header is None:
+            raise ParseError(f"Object without an ID at offset {brace}")
+        obj_id = header.group(1).decode('utf-8').strip('"')
+        isa_match = _ISA_RE.search(mm, brace, end)
+        isa = isa_match.group(1).decode('ascii') if isa_match else None
+        code = isa_codes.get(isa)
+        if code is None:
+            code = isa_codes[isa] = len(self._isa_names)
+            self._isa_names.append(isa)
+        row = len(self._starts)
+        self._starts.append(header.start())
+        self._braces.append(brace)
+        self._ends.append(end)
+        self._isa_codes.append(code)
+        if obj_id in self._rows:
+            # Like the full parser: keep the first, remember the rest
+            self.duplicates.append((obj_id, MappedObject(self, row)))
+            return
+        self._rows[obj_id] = row
+        self.by_isa.setdefault(isa, {})[obj_id] = None
+
+    def _decode(self, row):
+        text = self._map[self._braces[row]:self._ends[row]].decode('utf-8')
+        return _Parser(text).parse()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def ids_with_isa(self, isa):
+        """Return the IDs of every object with the given isa."""
+        return list(self.by_isa.get(isa, ()))
+
+    def isa(self, obj_id):
+        """Return an object's isa without decoding it."""
+        return self._isa_names[self._isa_codes[self._rows[obj_id]]]
+
+    def raw(self, obj_id):
+        """Return the bytes of an object's definition as written in the file."""
+        row = self._rows[obj_id]
+        return self._map[self._starts[row]:self._ends[row]]
+
+    def content_hashes(self):
+        """Return ID -> hash of the bytes between the braces of its definition.
+
+        Nothing is decoded, so equal hashes are cheap proof that an object
+        is unchanged; different ones may still hide only reformatting or
+        renamed "/* name */" annotations.
+        """
+        mm = self._map
+        braces = self._braces
+        ends = self._ends
+        return {obj_id: hash(mm[braces[row]:ends[row]]) for obj_id, row in self._rows.items()}
+
+    def comment(self, obj_id):
+        """Return the "/* name */" annotation written after an object's ID."""
+        row = self._rows[obj_id]
+        header = _HEADER_RE.search(self._map, self._starts[row], self._braces[row])
+        comment = header.group(2) if header else None
+        return comment.decode('utf-8').strip() if comment is not None else None
+
+    def main_group(self):
+        """Return the ID of the project's root group."""
+        root_id = self.data.get('rootObject')
+        return self.objects[root_id].get('mainGroup') if root_id in self.objects else None
+
+    @property
+    def parent(self):
+        """Child ID -> group ID, built by decoding each group once."""
+        if self._parent is None:
+            parent = {}
+            for isa in GROUP_ISAS:
+                for group_id in self.by_isa.get(isa, ()):
+                    for child in self.objects[group_id].get('children', ()):
+                        parent[child] = group_id
+            self._parent = parent
+        return self._parent
+
+    def source_path(self, obj_id):
+        """Return where an object lives on disk, relative to the project directory.
+
+        Same rules as XcodeProject.source_path (resolve_source_path); each
+        group's result is cached, so a group is decoded once however many
+        files it holds.
+        """
+        if obj_id in self._group_paths:
+            return self._group_paths[obj_id]
+        result = resolve_source_path(self.objects.get(obj_id, {}),
+                                     lambda: self._parent_path(obj_id))
+        if obj_id in self._rows and self.isa(obj_id) in GROUP_ISAS:
+            self._group_paths[obj_id] = result
+        return result
+
+    def _parent_path(self, obj_id):
+        parent_id = self.parent.get(obj_id)
+        return self.source_path(parent_id) if parent_id is not None else ''
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Move files between groups of an Xcode project.
+
+Each name is resolved to file references the way xcode_remove.py does it
+(whole path components only). The references move into the group that
+mirrors DIR, a directory relative to the folder holding the .xcodeproj,
+which is created if the project has none. The files themselves stay where
+they are: ProjectTransaction.move rewrites each path relative to the new
+group, or relative to the project when the file is outside DIR. All moves
+are written at once; files already in that group are left alone.
+
+Usage: python3 xcode_move.py path/to/project.pbxproj NAME [NAME ...] --to DIR
+                             [--deterministic]
+"""
+
+import os
+import sys
+
+import xcode_trace
+from xcode_project import project_base
+from xcode_transaction import GroupResolver, ProjectTransaction
+
+
+def move_files(project_path, names, directory, deterministic=False):
+    """Move every file reference matching names; returns (moved, missing)."""
+    txn = ProjectTransaction(project_path, deterministic_ids=deterministic)
+    project = txn.project
+    base = project_base(project_path)
+    group_id = GroupResolver(txn).group_for(os.path.relpath(os.path.join(base, directory), base))
+    missing = txn.move(names, group_id)
+    moved = [project.group_path(args['ref_id']) for kind, args in txn.operations
+             if kind == 'move']
+    txn.commit()
+    return moved, missing
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    directory = None
+    if '--to' in args:
+        i = args.index('--to')
+        if i + 1 < len(args):
+            directory = args[i + 1]
+            del args[i:i + 2]
+    positional = [a for a in args if not a.startswith('--')]
+    if directory is None or len(positional) < 2:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+
+    moved, missing = move_files(positional[0], positional[1:], directory,
+                                deterministic='--deterministic' in args)
+    for name in missing:
+        print(f"Not in project: {name}")
+    for path in moved:
+        print(f"~ {path} -> {directory}")
+    if moved:
+        print(f"Moved {len(moved)} file reference(s) in {positional[0]}")
+    else:
+        print(f"Nothing to do: the files are already in {directory}.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
@@ -0,0 +1,1045 @@
+"""
+Shared reader/writer for Xcode project.pbxproj files.
+
+The old-style plist is tokenized once, in linear time, into an object table
+keyed by object ID. Reverse indexes (by isa, by path, by parent group and by
+build phase) are built in a single pass over that table so the scripts in this
+directory can look things up directly instead of re-scanning the raw text with
+substring tests and regexes for every edit.
+"""
+
+import bisect
+import os
+import re
+
+import xcode_cache
+import xcode_journal
+import xcode_trace
+from xcode_match import NameMatcher
+
+
+# One token per match. Comments are kept so reference annotations such as
+# "/* ContentView.swift */" survive a round trip.
+_TOKEN_RE = re.compile(
+    r'\s*(?:'
+    r'(/\*.*?\*/)'                          # 1: block comment
+    r'|(//[^\n]*)'                          # 2: line comment
+    r'|"((?:[^"\\]|\\.)*)"'                 # 3: quoted string
+    r'|((?:[^\s{}()=;,"/]|/(?![/*]))+)'     # 4: bare word
+    r'|([{}()=;,])'                         # 5: punctuation
+    r')',
+    re.DOTALL,
+)
+
+_UNESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\'}
+_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+_SAFE_RE = re.compile(r'[A-Za-z0-9_$/:.]+\Z')
+
+_SECTION_RE = re.compile(r'\n/\* (Begin|End) (\w+) section \*/\n')
+
+# Objects Xcode writes on a single line.
+_INLINE_ISAS = frozenset(['PBXBuildFile', 'PBXFileReference'])
+
+# Containers whose "children" list makes them a parent group.
+GROUP_ISAS = frozenset(['PBXGroup', 'PBXVariantGroup', 'XCVersionGroup'])
+
+BUILD_PHASE_ISAS = frozenset([
+    'PBXSourcesBuildPhase',
+    'PBXFrameworksBuildPhase',
+    'PBXResourcesBuildPhase',
+    'PBXHeadersBuildPhase',
+    'PBXCopyFilesBuildPhase',
+    'PBXShellScriptBuildPhase',
+])
+
+TARGET_ISAS = frozenset(['PBXNativeTarget', 'PBXAggregateTarget', 'PBXLegacyTarget'])
+
+
+def resolve_source_path(obj, parent_path):
+    """Apply Xcode's source tree rules to one object.
+
+    parent_path is called, only for a "<group>" source tree, to get the
+    path of the object's parent group. Paths are joined up through parent
+    groups for "<group>" and stop at SOURCE_ROOT; absolute paths are
+    returned as they are. Objects in other trees (SDKROOT,
+    BUILT_PRODUCTS_DIR, ...) give None, as does a parent that gives None.
+    """
+    own = obj.get('path')
+    tree = obj.get('sourceTree', '<group>')
+    if tree in ('SOURCE_ROOT', '<absolute>'):
+        return os.path.normpath(own) if own else ''
+    if tree != '<group>':
+        return None
+    base = parent_path()
+    if base is None:
+        return None
+    path = os.path.join(base, own) if own else base
+    return os.path.normpath(path) if path else ''
+
+_PHASE_NAMES = {
+    'PBXSourcesBuildPhase': 'Sources',
+    'PBXFrameworksBuildPhase': 'Frameworks',
+    'PBXResourcesBuildPhase': 'Resources',
+    'PBXHeadersBuildPhase': 'Headers',
+    'PBXCopyFilesBuildPhase': 'CopyFiles',
+    'PBXShellScriptBuildPhase': 'ShellScript',
+}
+
+FILE_TYPES = {
+    '.swift': 'sourcecode.swift',
+    '.m': 'sourcecode.c.objc',
+    '.mm': 'sourcecode.cpp.objcpp',
+    '.h': 'sourcecode.c.h',
+    '.c': 'sourcecode.c.c',
+    '.cpp': 'sourcecode.cpp.cpp',
+    '.xcassets': 'folder.assetcatalog',
+    '.storyboard': 'file.storyboard',
+    '.xib': 'file.xib',
+    '.strings': 'text.plist.strings',
+    '.plist': 'text.plist.xml',
+    '.json': 'text.json',
+    '.xcconfig': 'text.xcconfig',
+    '.png': 'image.png',
+    '.md': 'net.daringfireball.markdown',
+}
+
+# Extensions whose files a target builds in its Sources or Resources phase.
+SOURCE_EXTENSIONS = frozenset(['.swift', '.m', '.mm', '.c', '.cpp'])
+RESOURCE_EXTENSIONS = frozenset(['.xcassets', '.storyboard', '.xib', '.strings', '.json', '.png'])
+
+# Isas whose references to other objects are covered by the reverse indexes.
+_INDEXED_ISAS = _INLINE_ISAS | GROUP_ISAS | BUILD_PHASE_ISAS
+
+# Keys whose ID values Xcode writes without a "/* name */" annotation.
+_UNANNOTATED_KEYS = frozenset(['remoteGlobalIDString'])
+
+# Reverse indexes built by build_indexes, in snapshot order.
+_INDEX_NAMES = ('by_isa', 'by_path', 'parent', 'phase_of', 'build_files_by_ref',
+                'target_of_phase')
+
+
+class ParseError(ValueError):
+    """Raised when a project file is not a well-formed old-style plist."""
+
+
+def _unquote(raw):
+    if '\\' not in raw:
+        return raw
+    return _ESCAPE_RE.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(1)), raw)
+
+
+def quote(value):
+    """Quote a string the way Xcode does, leaving safe words bare."""
+    if value and _SAFE_RE.match(value) and '//' not in value and '___' not in value:
+        return value
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"')
+               .replace('\n', '\\n').replace('\t', '\\t'))
+    return f'"{escaped}"'
+
+
+class _Parser:
+    """Recursive descent over a single left-to-right token scan."""
+
+    def __init__(self, text):
+        self.text = text
+        self.comments = {}
+        self.duplicates = []
+        # Object ID -> (start, end, isa) of its definition in the text, from
+        # the ID to the closing ";", for the minimal-diff serializer
+        self.spans = {}
+        self._tokens = self._scan()
+        self._advance()
+
+    def _scan(self):
+        text = self.text
+        comments = self.comments
+        # One string object per distinct token: every ID recurs in lists,
+        # fileRefs and comments, and keys and values such as "isa" or
+        # "<group>" in most objects, so sharing them takes about 40% off the
+        # memory of the parsed project (benchmarks/bench_memory.py)
+        strings = {}
+        pos = 0
+        last_word = None
+        for match in _TOKEN_RE.finditer(text):
+            if match.start() != pos:
+                yield self._bad(pos)
+                return
+            pos = match.end()
+            block, line, quoted, word, punct = match.groups()
+            if punct is not None:
+                last_word = None
+                yield punct, punct, match.start(5)
+            elif word is not None:
+                last_word = word = strings.setdefault(word, word)
+                yield 'str', word, match.start(4)
+            elif quoted is not None:
+                last_word = None
+                quoted = _unquote(quoted)
+                yield 'str', strings.setdefault(quoted, quoted), match.start(3) - 1
+            elif block is not None and last_word is not None:
+                comment = block[3:-3]
+                comments.setdefault(last_word, strings.setdefault(comment, comment))
+                last_word = None
+        if text[pos:].strip():
+            yield self._bad(pos)
+            return
+        yield 'eof', None, len(text)
+
+    def _bad(self, pos):
+        # The recovery parser in xcode_recover returns a token instead
+        raise ParseError(f"Unexpected character at offset {pos}")
+
+    def _advance(self):
+        self.kind, self.value, self.offset = next(self._tokens)
+
+    def _expect(self, kind):
+        if self.kind != kind:
+            raise ParseError(
+                f"Expected '{kind}' but found {self.value!r} at offset {self.offset}")
+        self._advance()
+
+    def _string(self):
+        if self.kind != 'str':
+            raise ParseError(
+                f"Expected a string but found {self.value!r} at offset {self.offset}")
+        value = self.value
+        self._advance()
+        return value
+
+    def parse(self):
+        root = self._dict(depth=0)
+        if self.kind != 'eof':
+            raise ParseError(f"Trailing data at offset {self.offset}")
+        return root
+
+    def _value(self, depth, spans=None):
+        if self.kind == 'str':
+            return self._string()
+        if self.kind == '{':
+            return self._dict(depth, spans)
+        if self.kind == '(':
+            return self._array(depth)
+        raise ParseError(f"Unexpected {self.value!r} at offset {self.offset}")
+
+    def _dict(self, depth, spans=None):
+        self._expect('{')
+        result = {}
+        while self.kind != '}':
+            start = self.offset
+            key = self._string()
+            self._expect('=')
+            value = self._value(depth + 1, self.spans if depth == 0 and key == 'objects' else None)
+            if spans is not None and key not in result and isinstance(value, dict):
+                spans[key] = (start, self.offset + 1, value.get('isa'))
+            self._expect(';')
+            if depth == 1 and key in result:
+                # Only the objects table cares about repeated keys; keep the
+                # first definition and remember the rest for repair tools.
+                self.duplicates.append((key, value))
+            else:
+                result[key] = value
+        self._advance()
+        return result
+
+    def _array(self, depth):
+        self._expect('(')
+        result = []
+        while self.kind != ')':
+            result.append(self._value(depth + 1))
+            if self.kind != ',':
+                break
+            self._advance()
+        self._expect(')')
+        return result
+
+
+def _discard(index, key, obj_id):
+    """Remove obj_id from the list index[key], dropping the key once it is empty."""
+    ids = index.get(key)
+    if ids is not None and obj_id in ids:
+        ids.remove(obj_id)
+        if not ids:
+            del index[key]
+
+
+class XcodeProject:
+    """Parsed project.pbxproj with ID-keyed objects and reverse indexes."""
+
+    def __init__(self, data, comments=None, duplicates=None, path=None,
+                 source=None, spans=None, indexes=None):
+        self.data = data
+        self.objects = data.setdefault('objects', {})
+        self.comments = comments if comments is not None else {}
+        self.duplicates = duplicates or []
+        self.path = path
+        # Original text and object spans, kept so that to_string can copy
+        # untouched objects verbatim and re-serialize only dirty ones
+        self.source = source
+        self.spans = spans if spans is not None else {}
+        self.dirty = set()
+        self._dropped = []
+        self._hunks = None
+        # Group ID -> source_path, cleared whenever the group tree changes
+        self._group_paths = {}
+        self._root_snapshot = self._root_entries()
+        if indexes is not None:
+            for name, index in zip(_INDEX_NAMES, indexes):
+                setattr(self, name, index)
+        else:
+            self.build_indexes()
+
+    @classmethod
+    def parse(cls, text, path=None):
+        """Parse project text into an XcodeProject."""
+        with xcode_trace.phase('parse') as p:
+            parser = _Parser(text)
+            data = parser.parse()
+            p.note(bytes=len(text), objects=len(data.get('objects', {})))
+        return cls(data, parser.comments, parser.duplicates, path, text, parser.spans)
+
+    @classmethod
+    def load(cls, path, cache=True):
+        """Read and parse a project.pbxproj file.
+
+        Unless cache is false, an unchanged file is restored from the
+        snapshot xcode_cache kept from an earlier load instead of being
+        tokenized again.
+        """
+        with xcode_trace.phase('read') as p, open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+            p.note(bytes=len(text))
+        # A snapshot load runs neither phase, so profiling them means parsing
+        if (not cache or xcode_cache.max_bytes() <= 0
+                or xcode_trace.profiling('parse') or xcode_trace.profiling('index')):
+            return cls.parse(text, path)
+        key = xcode_cache.digest(text)
+        snapshot = xcode_cache.get(text, key)
+        if snapshot is not None:
+            data, comments, duplicates, spans, indexes = snapshot
+            return cls(data, comments, duplicates, path, text, spans, indexes)
+        project = cls.parse(text, path)
+        xcode_cache.put(text, project.snapshot(), key)
+        return project
+
+    def snapshot(self):
+        """Return the parsed state as plain containers, for xcode_cache.
+
+        Only meaningful before the project is edited: spans and comments
+        describe the text it was parsed from.
+        """
+        return (self.data, self.comments, self.duplicates, self.spans,
+                tuple(getattr(self, name) for name in _INDEX_NAMES))
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+
+    def build_indexes(self):
+        """Rebuild every reverse index in one pass over the object table."""
+        # Ordered dicts with None values serve as insertion-ordered sets;
+        # by_path and build_files_by_ref almost always hold a single ID per
+        # key, so they get lists, which are a third of the size
+        self.by_isa = {}
+        self.by_path = {}
+        self.parent = {}
+        self.phase_of = {}
+        self.build_files_by_ref = {}
+        self.target_of_phase = {}
+        with xcode_trace.phase('index'):
+            for obj_id, obj in self.objects.items():
+                self._index(obj_id, obj)
+
+    def _index(self, obj_id, obj):
+        isa = obj.get('isa')
+        self.by_isa.setdefault(isa, {})[obj_id] = None
+        path = obj.get('path')
+        if path is not None:
+            self.by_path.setdefault(path, []).append(obj_id)
+        if isa in GROUP_ISAS:
+            if self._group_paths:
+                self._group_paths.clear()
+            for child in obj.get('children', ()):
+                self.parent[child] = obj_id
+        elif isa in BUILD_PHASE_ISAS:
+            for build_file in obj.get('files', ()):
+                self.phase_of[build_file] = obj_id
+        elif isa == 'PBXBuildFile' and 'fileRef' in obj:
+            self.build_files_by_ref.setdefault(obj['fileRef'], []).append(obj_id)
+        elif isa in TARGET_ISAS:
+            for phase_id in obj.get('buildPhases', ()):
+                self.target_of_phase[phase_id] = obj_id
+
+    def _unindex(self, obj_id, obj):
+        isa = obj.get('isa')
+        self.by_isa.get(isa, {}).pop(obj_id, None)
+        path = obj.get('path')
+        if path is not None:
+            _discard(self.by_path, path, obj_id)
+        if isa in GROUP_ISAS:
+            if self._group_paths:
+                self._group_paths.clear()
+            for child in obj.get('children', ()):
+                if self.parent.get(child) == obj_id:
+                    del self.parent[child]
+        elif isa in BUILD_PHASE_ISAS:
+            for build_file in obj.get('files', ()):
+                if self.phase_of.get(build_file) == obj_id:
+                    del self.phase_of[build_file]
+        elif isa == 'PBXBuildFile' and 'fileRef' in obj:
+            _discard(self.build_files_by_ref, obj['fileRef'], obj_id)
+        elif isa in TARGET_ISAS:
+            for phase_id in obj.get('buildPhases', ()):
+                if self.target_of_phase.get(phase_id) == obj_id:
+                    del self.target_of_phase[phase_id]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def ids_with_isa(self, isa):
+        """Return the IDs of every object with the given isa."""
+        return list(self.by_isa.get(isa, ()))
+
+    def display_name(self, obj_id):
+        """Return the name Xcode shows for an object, or None."""
+        obj = self.objects.get(obj_id)
+        if obj is None:
+            return None
+        if 'name' in obj:
+            return obj['name']
+        if 'path' in obj:
+            return os.path.basename(obj['path'])
+        return None
+
+    def find_file_references(self, name):
+        """Return file reference IDs whose path or name equals name.
+
+        A bare file name also matches references whose path ends with it as
+        a whole path component, so "Foo.swift" finds "Sources/Foo.swift"
+        but not "OtherFoo.swift".
+        """
+        return self.find_file_references_many([name])[name]
+
+    def find_file_references_many(self, names):
+        """Resolve many names to file reference IDs in a single scan.
+
+        Returns a dict mapping each name to the IDs of the file references
+        whose own path, or full path through their groups, ends with that
+        name at a "/" boundary. All names go into one Aho-Corasick automaton,
+        so each reference path is read once however many names are given.
+        """
+        matcher = NameMatcher()
+        found = {}
+        for name in names:
+            if name not in found:
+                found[name] = {}
+                matcher.add('/' + name.strip('/'), name)
+        if not found:
+            return {}
+        group_paths = {}
+        for ref_id in self.by_isa.get('PBXFileReference', ()):
+            obj = self.objects[ref_id]
+            own = obj.get('path') or obj.get('name')
+            if not own:
+                continue
+            group_id = self.parent.get(ref_id)
+            if group_id not in group_paths:
+                group_paths[group_id] = self.group_path(group_id) if group_id else ''
+            prefix = group_paths[group_id]
+            for name in matcher.suffix_matches(f'/{prefix}/{own}' if prefix else '/' + own):
+                found[name][ref_id] = None
+        return {name: list(ids) for name, ids in found.items()}
+
+    def group_path(self, obj_id):
+        """Return the slash-joined path of an object through its parent groups.
+
+        Each level contributes its path, or its name when it has no path; the
+        unnamed root group contributes nothing.
+        """
+        parts = []
+        while obj_id is not None:
+            obj = self.objects.get(obj_id, {})
+            part = obj.get('path') or obj.get('name')
+            if part:
+                parts.append(part)
+            obj_id = self.parent.get(obj_id)
+        return '/'.join(reversed(parts))
+
+    def source_path(self, obj_id):
+        """Return where an object lives on disk, relative to the project directory.
+
+        The rules are resolve_source_path's. Each group's result is
+        memoized until the group tree changes, so resolving every file in
+        the project costs one parent lookup per file.
+        """
+        if obj_id in self._group_paths:
+            return self._group_paths[obj_id]
+        obj = self.objects.get(obj_id, {})
+        result = resolve_source_path(obj, lambda: self._parent_path(obj_id))
+        if obj.get('isa') in GROUP_ISAS:
+            self._group_paths[obj_id] = result
+        return result
+
+    def _parent_path(self, obj_id):
+        group_id = self.parent.get(obj_id)
+        return self.source_path(group_id) if group_id is not None else ''
+
+    def _group_tree_changed(self, obj_ids):
+        """Drop memoized group paths if any of obj_ids is a group."""
+        if self._group_paths and any(self.objects.get(obj_id, {}).get('isa') in GROUP_ISAS
+                                     for obj_id in obj_ids):
+            self._group_paths.clear()
+
+    def find_child_by_path(self, group_id, path):
+        """Return the file reference in group_id whose path is path, or None."""
+        for obj_id in self.by_path.get(path, ()):
+            if (self.parent.get(obj_id) == group_id
+                    and self.objects[obj_id].get('isa') == 'PBXFileReference'):
+                return obj_id
+        return None
+
+    def build_file_in_phase(self, ref_id, phase_id):
+        """Return the build file that puts ref_id in phase_id, or None."""
+        for build_file_id in self.build_files_by_ref.get(ref_id, ()):
+            if self.phase_of.get(build_file_id) == phase_id:
+                return build_file_id
+        return None
+
+    def find_group(self, name):
+        """Return the ID of the first group whose name or path equals name."""
+        for obj_id in self.by_isa.get('PBXGroup', ()):
+            obj = self.objects[obj_id]
+            if obj.get('name') == name or obj.get('path') == name:
+                return obj_id
+        return None
+
+    def main_group(self):
+        """Return the ID of the project's root group."""
+        root = self.objects.get(self.data.get('rootObject'), {})
+        return root.get('mainGroup')
+
+    def find_build_phase(self, isa='PBXSourcesBuildPhase', target_id=None):
+        """Return the first build phase of the given isa, optionally per target."""
+        if target_id is not None:
+            candidates = self.objects[target_id].get('buildPhases', ())
+        else:
+            candidates = self.by_isa.get(isa, ())
+        for obj_id in candidates:
+            if self.objects.get(obj_id, {}).get('isa') == isa:
+                return obj_id
+        return None
+
+    def phase_name(self, phase_id):
+        """Return the display name of a build phase ("Sources", ...)."""
+        phase = self.objects[phase_id]
+        return phase.get('name') or _PHASE_NAMES.get(phase.get('isa'), phase.get('isa'))
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def add_object(self, obj_id, obj, comment=None):
+        """Insert a new object and index it."""
+        if obj_id in self.objects:
+            raise KeyError(f"Object {obj_id} already exists")
+        self.objects[obj_id] = obj
+        if comment is not None:
+            self.comments[obj_id] = comment
+        self._index(obj_id, obj)
+
+    def remove_object(self, obj_id):
+        """Delete an object from the table; references are left to the caller."""
+        # Whatever still lists the object loses its "/* name */" annotation
+        self._mark_referrers(obj_id)
+        obj = self.objects.pop(obj_id)
+        self._unindex(obj_id, obj)
+        self.comments.pop(obj_id, None)
+        span = self.spans.pop(obj_id, None)
+        if span is not None:
+            self._dropped.append(span)
+        return obj
+
+    def replace_object(self, obj_id, obj, comment=None):
+        """Swap in a new definition of an existing object and reindex it."""
+        self._unindex(obj_id, self.objects[obj_id])
+        self.objects[obj_id] = obj
+        self._index(obj_id, obj)
+        self.dirty.add(obj_id)
+        if comment is not None and comment != self.comments.get(obj_id):
+            self.comments[obj_id] = comment
+            self._mark_referrers(obj_id)
+
+    def mark_dirty(self, obj_id):
+        """Flag an object edited in place so to_string re-serializes it."""
+        self.dirty.add(obj_id)
+
+    def _mark_referrers(self, obj_id):
+        """Flag every object whose text shows obj_id's comment."""
+        for index in (self.parent, self.phase_of):
+            owner = index.get(obj_id)
+            if owner is not None:
+                self.dirty.add(owner)
+        self.dirty.update(self.build_files_by_ref.get(obj_id, ()))
+        # The few remaining referrers (productReference, mainGroup, ...) live
+        # in targets, configurations and the project object, which are few
+        for isa, ids in self.by_isa.items():
+            if isa in _INDEXED_ISAS:
+                continue
+            for owner in ids:
+                for value in self.objects[owner].values():
+                    if value == obj_id or (isinstance(value, list) and obj_id in value):
+                        self.dirty.add(owner)
+                        break
+
+    def refresh_comments(self, ref_id):
+        """Re-derive the comments of a file reference and its build files."""
+        name = self.display_name(ref_id)
+        self.comments[ref_id] = name
+        self.dirty.add(ref_id)
+        self._mark_referrers(ref_id)
+        for build_file_id in self.build_files_by_ref.get(ref_id, ()):
+            phase_id = self.phase_of.get(build_file_id)
+            self.comments[build_file_id] = (f"{name} in {self.phase_name(phase_id)}"
+                                            if phase_id else name)
+            self._mark_referrers(build_file_id)
+
+    def add_child(self, group_id, child_id, after=None):
+        """Append child_id to a group, or insert it right after another child."""
+        children = self.objects[group_id].setdefault('children', [])
+        if child_id in children:
+            return False
+        if after is not None and after in children:
+            children.insert(children.index(after) + 1, child_id)
+        else:
+            children.append(child_id)
+        self.parent[child_id] = group_id
+        self._group_tree_changed([child_id])
+        self.dirty.add(group_id)
+        return True
+
+    def remove_child(self, group_id, child_id):
+        """Remove every occurrence of child_id from a group's children."""
+        group = self.objects[group_id]
+        children = group.get('children', [])
+        if child_id not in children:
+            return False
+        group['children'] = [c for c in children if c != child_id]
+        if self.parent.get(child_id) == group_id:
+            del self.parent[child_id]
+        self._group_tree_changed([child_id])
+        self.dirty.add(group_id)
+        return True
+
+    def add_to_phase(self, phase_id, build_file_id, after=None):
+        """Append a build file to a phase, or insert it after another entry."""
+        files = self.objects[phase_id].setdefault('files', [])
+        if build_file_id in files:
+            return False
+        if after is not None and after in files:
+            files.insert(files.index(after) + 1, build_file_id)
+        else:
+            files.append(build_file_id)
+        self.phase_of[build_file_id] = phase_id
+        self.dirty.add(phase_id)
+        return True
+
+    def remove_from_phase(self, phase_id, build_file_id):
+        """Remove every occurrence of a build file from a phase."""
+        phase = self.objects[phase_id]
+        files = phase.get('files', [])
+        if build_file_id not in files:
+            return False
+        phase['files'] = [f for f in files if f != build_file_id]
+        if self.phase_of.get(build_file_id) == phase_id:
+            del self.phase_of[build_file_id]
+        self.dirty.add(phase_id)
+        return True
+
+    def splice_list(self, obj_id, key, inserts=(), removals=()):
+        """Insert and remove many entries of a children/files list at once.
+
+        inserts is a sequence of (after, entry) pairs. An entry follows its
+        anchor (which may itself be a newly inserted entry); entries queued
+        after the same anchor keep their queue order, and entries whose
+        anchor is None or absent are appended. The list is rebuilt in a
+        single O(len(list) + k) pass.
+        """
+        obj = self.objects[obj_id]
+        current = obj.get(key, [])
+        removals = set(removals)
+        present = set(current) - removals
+        followers = {}
+        queued = []
+        for after, entry in inserts:
+            if entry in present or entry not in self.objects:
+                continue
+            present.add(entry)
+            queued.append(entry)
+            followers.setdefault(after, []).append(entry)
+
+        result = []
+        emitted = set()
+
+        def emit(entry):
+            stack = [entry]
+            while stack:
+                item = stack.pop()
+                if item in emitted:
+                    continue
+                result.append(item)
+                emitted.add(item)
+                stack.extend(reversed(followers.pop(item, ())))
+
+        for entry in current:
+            if entry not in removals:
+                emit(entry)
+        for entry in queued:
+            if entry not in emitted:
+                emit(entry)
+        obj[key] = result
+        self.dirty.add(obj_id)
+
+        index = self.parent if key == 'children' else self.phase_of
+        if key == 'children':
+            self._group_tree_changed(list(removals) + queued)
+        for entry in removals:
+            if index.get(entry) == obj_id:
+                del index[entry]
+        for entry in queued:
+            index[entry] = obj_id
+
+    def add_file_reference(self, ref_id, path, group_id=None, name=None,
+                           source_tree='<group>', after=None):
+        """Create a PBXFileReference and optionally attach it to a group."""
+        ext = os.path.splitext(path)[1]
+        obj = {'isa': 'PBXFileReference'}
+        file_type = FILE_TYPES.get(ext)
+        if file_type:
+            obj['lastKnownFileType'] = file_type
+        if name is not None:
+            obj['name'] = name
+        obj['path'] = path
+        obj['sourceTree'] = source_tree
+        self.add_object(ref_id, obj, name or os.path.basename(path))
+        if group_id is not None:
+            self.add_child(group_id, ref_id, after=after)
+        return ref_id
+
+    def add_build_file(self, build_file_id, ref_id, phase_id, after=None):
+        """Create a PBXBuildFile for ref_id and add it to a build phase."""
+        comment = f"{self.display_name(ref_id)} in {self.phase_name(phase_id)}"
+        self.add_object(build_file_id, {'isa': 'PBXBuildFile', 'fileRef': ref_id}, comment)
+        self.add_to_phase(phase_id, build_file_id, after=after)
+        return build_file_id
+
+    def remove_file_reference(self, ref_id):
+        """Remove a file reference and everything that points at it.
+
+        Cascades to its PBXBuildFile objects, their build-phase entries and
+        the parent group's children list.
+        """
+        for build_file_id in list(self.build_files_by_ref.get(ref_id, ())):
+            phase_id = self.phase_of.get(build_file_id)
+            if phase_id is not None:
+                self.remove_from_phase(phase_id, build_file_id)
+            self.remove_object(build_file_id)
+        group_id = self.parent.get(ref_id)
+        if group_id is not None:
+            self.remove_child(group_id, ref_id)
+        self.remove_object(ref_id)
+
+    def rename_object(self, old_id, new_id):
+        """Move an object to a new ID and repoint the references to it.
+
+        Uses the reverse indexes, so only the parent group, the build phase
+        and the build files that refer to the object are touched.
+        """
+        comment = self.comments.get(old_id)
+        group_id = self.parent.pop(old_id, None)
+        phase_id = self.phase_of.pop(old_id, None)
+        build_files = list(self.build_files_by_ref.get(old_id, ()))
+        obj = self.remove_object(old_id)
+        self.add_object(new_id, obj, comment)
+        if group_id is not None:
+            group = self.objects[group_id]
+            group['children'] = [new_id if c == old_id else c for c in group['children']]
+            self.parent[new_id] = group_id
+            self._group_tree_changed([new_id])
+            self.dirty.add(group_id)
+        if phase_id is not None:
+            phase = self.objects[phase_id]
+            phase['files'] = [new_id if f == old_id else f for f in phase['files']]
+            self.phase_of[new_id] = phase_id
+            self.dirty.add(phase_id)
+        for build_file_id in build_files:
+            self.set_value(build_file_id, 'fileRef', new_id)
+
+    def set_value(self, obj_id, key, value):
+        """Set a scalar attribute, keeping the path index current."""
+        obj = self.objects[obj_id]
+        self._unindex(obj_id, obj)
+        if value is None:
+            obj.pop(key, None)
+        else:
+            obj[key] = value
+        self._index(obj_id, obj)
+        self.dirty.add(obj_id)
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def _ref(self, value, key=None):
+        text = quote(value)
+        if key not in _UNANNOTATED_KEYS and value in self.objects:
+            comment = self.comments.get(value)
+            if comment is not None:
+                return f"{text} /* {comment} */"
+        return text
+
+    def _write_value(self, out, value, indent, key=None):
+        if isinstance(value, dict):
+            out.append('{\n')
+            pad = '\t' * (indent + 1)
+            for k, v in value.items():
+                out.append(f"{pad}{quote(k)} = ")
+                self._write_value(out, v, indent + 1, k)
+                out.append(';\n')
+            out.append('\t' * indent + '}')
+        elif isinstance(value, list):
+            out.append('(\n')
+            pad = '\t' * (indent + 1)
+            for item in value:
+                out.append(pad)
+                self._write_value(out, item, indent + 1, key)
+                out.append(',\n')
+            out.append('\t' * indent + ')')
+        else:
+            out.append(self._ref(value, key))
+
+    def _write_inline(self, out, value, key=None):
+        if isinstance(value, dict):
+            out.append('{')
+            for k, v in value.items():
+                out.append(f"{quote(k)} = ")
+                self._write_inline(out, v, k)
+                out.append('; ')
+            out.append('}')
+        elif isinstance(value, list):
+            out.append('(')
+            for item in value:
+                self._write_inline(out, item, key)
+                out.append(', ')
+            out.append(')')
+        else:
+            out.append(self._ref(value, key))
+
+    def write_object(self, out, obj_id, obj):
+        """Append one object definition, as Xcode lays it out, to out."""
+        out.append('\t\t' + self._ref(obj_id) + ' = ')
+        if obj.get('isa') in _INLINE_ISAS:
+            self._write_inline(out, obj)
+        else:
+            self._write_value(out, obj, 2)
+        out.append(';\n')
+
+    def to_string(self, full=False):
+        """Serialize the project in Xcode's canonical layout.
+
+        For a parsed project only the objects that were added, removed or
+        edited are serialized; everything else is copied from the original
+        text, so a no-op round trip returns the input unchanged and a
+        one-file add touches a handful of lines. Projects built in memory,
+        or whose top-level keys changed, are written out in full, as is
+        every project when full is true (which normalizes the layout).
+        """
+        if self.duplicates:
+            ids = ', '.join(sorted({obj_id for obj_id, _ in self.duplicates}))
+            raise ValueError(f"Unresolved duplicate object IDs: {ids}")
+        with xcode_trace.phase('serialize') as p:
+            if (not full and self.source is not None
+                    and self._root_entries() == self._root_snapshot):
+                text = self._splice()
+                if text is not None:
+                    p.note(mode='splice', bytes=len(text))
+                    return text
+            self._hunks = None
+            text = self._serialize()
+            p.note(mode='full', bytes=len(text))
+            return text
+
+    def _root_entries(self):
+        return [(key, repr(value)) for key, value in self.data.items() if key != 'objects']
+
+    def _line_range(self, start, end):
+        """Widen a span to whole lines when it is alone on them."""
+        text = self.source
+        line_start = text.rfind('\n', 0, start) + 1
+        if not text[line_start:start].strip():
+            start = line_start
+        line_end = text.find('\n', end)
+        if line_end == -1:
+            line_end = len(text)
+        if not text[end:line_end].strip():
+            end = min(line_end + 1, len(text))
+        return start, end
+
+    def _sections(self):
+        """Map each isa to the (begin, end) line offsets of its section."""
+        sections = {}
+        for match in _SECTION_RE.finditer(self.source):
+            begin_or_end, isa = match.group(1), match.group(2)
+            marker = match.start() + 1
+            if begin_or_end == 'Begin':
+                sections[isa] = [marker, None]
+            elif isa in sections:
+                sections[isa][1] = marker
+        return {isa: tuple(span) for isa, span in sections.items() if span[1] is not None}
+
+    def _object_text(self, obj_id):
+        out = []
+        self.write_object(out, obj_id, self.objects[obj_id])
+        return ''.join(out)
+
+    def _splice(self):
+        """Build the output by editing the original text; None if it can't."""
+        text = self.source
+        sections = self._sections()
+        if not sections:
+            return None
+        edits = []
+        for start, end, isa in self._dropped:
+            start, end = self._line_range(start, end)
+            edits.append((start, end, ()))
+        added = {}
+        for obj_id in self.dirty:
+            span = self.spans.get(obj_id)
+            if span is None or obj_id not in self.objects:
+                continue
+            start, end = self._line_range(span[0], span[1])
+            if self.objects[obj_id].get('isa') != span[2]:
+                # The object now belongs in another section
+                edits.append((start, end, ()))
+                del self.spans[obj_id]
+                continue
+            edits.append((start, end, ((obj_id, self._object_text(obj_id)),)))
+        for obj_id, obj in self.objects.items():
+            if obj_id not in self.spans:
+                added.setdefault(obj.get('isa'), []).append(obj_id)
+        ordered = sorted(sections.items(), key=lambda item: item[1])
+        for isa, ids in added.items():
+            pieces = [(obj_id, self._object_text(obj_id)) for obj_id in ids]
+            if isa in sections:
+                pos = sections[isa][1]
+                edits.append((pos, pos, tuple(pieces)))
+                continue
+            if not isinstance(isa, str):
+                return None
+            # New section, placed where the full serializer's sort puts it
+            following = [span[0] for name, span in ordered if name > isa]
+            if following:
+                pos = following[0] - 1
+            else:
+                pos = text.find('\n', ordered[-1][1][1]) + 1
+            pieces = ([(None, f"\n/* Begin {isa} section */\n")] + pieces
+                      + [(None, f"/* End {isa} section */\n")])
+            edits.append((pos, pos, tuple(pieces)))
+        for isa, (begin, end) in sections.items():
+            if not self.by_isa.get(isa):
+                # Every object of this isa is gone; drop the section markers
+                edits.append((begin - 1, text.find('\n', end) + 1, ()))
+
+        edits.sort(key=lambda edit: (edit[0], edit[1]))
+        out = []
+        hunks = []
+        placed = {}
+        shifts = []
+        pos = 0
+        size = 0
+        for start, end, pieces in edits:
+            if start < pos:
+                continue
+            out.append(text[pos:start])
+            size += start - pos
+            new = []
+            for obj_id, piece in pieces:
+                if obj_id is not None:
+                    placed[obj_id] = (size, len(piece))
+                new.append(piece)
+                size += len(piece)
+            out.extend(new)
+            hunks.append([start, text[start:end], ''.join(new)])
+            pos = end
+            shifts.append((end, size - end))
+        out.append(text[pos:])
+        result = ''.join(out)
+        self._rebase(result, shifts, placed)
+        # What the splice replaced, for the edit journal
+        self._hunks = hunks
+        return result
+
+    def _rebase(self, text, shifts, placed):
+        """Point the spans at a freshly spliced text so later saves splice too."""
+        ends = [end for end, _ in shifts]
+        spans = {}
+        for obj_id, (start, end, isa) in self.spans.items():
+            if obj_id in placed:
+                continue
+            i = bisect.bisect_right(ends, start)
+            delta = shifts[i - 1][1] if i else 0
+            spans[obj_id] = (start + delta, end + delta, isa)
+        for obj_id, (offset, length) in placed.items():
+            # write_object emits two tabs, the definition and ";\n"
+            spans[obj_id] = (offset + 2, offset + length - 1, self.objects[obj_id].get('isa'))
+        self.source = text
+        self.spans = spans
+        self.dirty = set()
+        self._dropped = []
+
+    def _serialize(self):
+        out = ['// !$*UTF8*$!\n{\n']
+        for key, value in self.data.items():
+            if key == 'objects':
+                out.append('\tobjects = {\n')
+                sections = {}
+                for obj_id, obj in self.objects.items():
+                    sections.setdefault(obj.get('isa'), []).append(obj_id)
+                for isa in sorted(sections):
+                    out.append(f"\n/* Begin {isa} section */\n")
+                    for obj_id in sections[isa]:
+                        self.write_object(out, obj_id, self.objects[obj_id])
+                    out.append(f"/* End {isa} section */\n")
+                out.append('\t};\n')
+            else:
+                out.append(f"\t{quote(key)} = ")
+                self._write_value(out, value, 1, key)
+                out.append(';\n')
+        out.append('}\n')
+        return ''.join(out)
+
+    def save(self, path=None, full=False, label=None):
+        """Write the project back to disk in a single atomic write.
+
+        Saving over the file the project was loaded from also records the
+        edit in its journal (see xcode_journal), under label.
+        """
+        path = path or self.path
+        before = self.source if path == self.path else None
+        text = self.to_string(full)
+        if before is None:
+            xcode_journal.write_atomic(path, text)
+            return
+        xcode_journal.write(path, before, text, self._hunks, label)
+
+
+def project_base(project_path):
+    """Return the folder holding the .xcodeproj that contains project_path."""
+    return os.path.dirname(os.path.dirname(os.path.abspath(project_path)))
+
+
+def find_target(project, name):
+    """Return the ID of the native target called name; ValueError if none."""
+    for target_id in project.ids_with_isa('PBXNativeTarget'):
+        if project.objects[target_id].get('name') == name:
+            return target_id
+    raise ValueError(f"No target named {name}")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Answer questions about which files a project builds, where and for whom.
+
+The queries walk the reverse indexes XcodeProject keeps anyway (child ->
+group, build file -> phase, file -> build files, phase -> target), so a
+question about one file costs a few dict lookups, and one about every file
+a single pass over the file references. On-disk paths come from
+XcodeProject.source_path, which computes the directory of each group once
+and reuses it for all its children. An unchanged project is restored from
+its xcode_cache snapshot, indexes included, so a query on a large project
+takes about as long as reading the file.
+
+  targets NAME ...        the targets (and phases) that build each file
+  files TARGET [PHASE]    the files a target builds, or only those in PHASE
+  unbuilt [DIR]           source files under DIR that no Sources phase builds
+  missing [DIR]           file references under DIR whose file is not on disk
+  unreferenced [DIR ...]  files on disk under the DIRs (Jamminverz and Shared
+                          by default) that no reference points at
+  orphans                 files, groups and build files nothing refers to
+
+Paths are relative to the folder holding the .xcodeproj. With --json the
+result is printed as JSON instead of one line per file.
+
+Usage: python3 xcode_query.py path/to/project.pbxproj QUERY [ARGS ...] [--json]
+       e.g. python3 xcode_query.py Jamminverz.xcodeproj/project.pbxproj unbuilt Jamminverz
+"""
+
+import os
+import sys
+
+import xcode_trace
+from xcode_dedupe import SCALAR_KEYS
+from xcode_project import GROUP_ISAS, SOURCE_EXTENSIONS, XcodeProject, find_target, project_base
+from xcode_sync import DEFAULT_ROOTS, scan_sources
+
+
+class ProjectQuery:
+    """Read-only lookups over a parsed project's reverse indexes."""
+
+    def __init__(self, project):
+        self.project = project
+
+    def file_references(self, directory=None):
+        """Yield (ref ID, path) for every file reference, or those under directory."""
+        prefix = _dir_prefix(directory)
+        for ref_id in self.project.by_isa.get('PBXFileReference', ()):
+            path = self.project.source_path(ref_id)
+            if path is not None and (prefix is None or path.startswith(prefix)):
+                yield ref_id, path
+
+    def memberships(self, ref_id, phase_isa=None):
+        """Return (target ID, phase ID) for each build phase that builds ref_id.
+
+        A build file in no phase, or in a phase no target lists, gives None
+        in that position.
+        """
+        project = self.project
+        found = []
+        for build_file_id in project.build_files_by_ref.get(ref_id, ()):
+            phase_id = project.phase_of.get(build_file_id)
+            if phase_isa is not None and (
+                    phase_id is None or project.objects[phase_id].get('isa') != phase_isa):
+                continue
+            found.append((project.target_of_phase.get(phase_id), phase_id))
+        return found
+
+    def files_of_target(self, target_id, phase_name=None):
+        """Return the file reference IDs a target's phases build, in phase order."""
+        project = self.project
+        refs = {}
+        for phase_id in project.objects[target_id].get('buildPhases', ()):
+            if phase_id not in project.objects:
+                continue
+            if phase_name is not None and project.phase_name(phase_id) != phase_name:
+                continue
+            for build_file_id in project.objects[phase_id].get('files', ()):
+                ref_id = project.objects.get(build_file_id, {}).get('fileRef')
+                if ref_id in project.objects:
+                    refs[ref_id] = None
+        return list(refs)
+
+    def unbuilt(self, directory=None, extensions=SOURCE_EXTENSIONS):
+        """Return (ref ID, path) for source files no target's Sources phase builds."""
+        project = self.project
+        objects = project.objects
+        phase_of = project.phase_of
+        compiling = {phase_id for phase_id in project.by_isa.get('PBXSourcesBuildPhase', ())
+                     if phase_id in project.target_of_phase}
+        prefix = _dir_prefix(directory)
+        found = []
+        # Extension and membership are a few lookups each; only the files
+        # that pass both need their path resolved
+        for ref_id in project.by_isa.get('PBXFileReference', ()):
+            obj = objects[ref_id]
+            own = obj.get('path') or obj.get('name') or ''
+            if own[own.rfind('.'):] not in extensions:
+                continue
+            for build_file_id in project.build_files_by_ref.get(ref_id, ()):
+                if phase_of.get(build_file_id) in compiling:
+                    break
+            else:
+                path = self.project.source_path(ref_id)
+                if path is not None and (prefix is None or path.startswith(prefix)):
+                    found.append((ref_id, path))
+        return found
+
+    def missing(self, base, directory=None):
+        """Return (ref ID, path) for file references whose file is not under base."""
+        return [(ref_id, path) for ref_id, path in self.file_references(directory)
+                if path and not os.path.exists(os.path.join(base, path))]
+
+    def unreferenced(self, base, roots=DEFAULT_ROOTS):
+        """Return the paths of files under roots that no file reference points at."""
+        with xcode_trace.phase('scan'):
+            on_disk = scan_sources(base, roots)
+        referenced = {path for _, path in self.file_references()}
+        return sorted(on_disk - referenced)
+
+    def orphans(self):
+        """Return (ID, isa) for objects unreachable from the project's groups and phases.
+
+        That is file references and groups in no group (other than the main
+        group and whatever a target, configuration or the project object
+        names directly), and build files in no build phase.
+        """
+        project = self.project
+        named = set()
+        for isa, ids in project.by_isa.items():
+            if isa == 'PBXFileReference' or isa == 'PBXBuildFile' or isa in GROUP_ISAS:
+                continue
+            for obj_id in ids:
+                obj = project.objects[obj_id]
+                named.update(obj[key] for key in SCALAR_KEYS if isinstance(obj.get(key), str))
+        named.add(project.main_group())
+        found = []
+        for isa, ids in project.by_isa.items():
+            if isa == 'PBXBuildFile':
+                found.extend((obj_id, isa) for obj_id in ids if obj_id not in project.phase_of)
+            elif isa == 'PBXFileReference' or isa in GROUP_ISAS:
+                found.extend((obj_id, isa) for obj_id in ids
+                             if obj_id not in project.parent and obj_id not in named)
+        return found
+
+    def record(self, ref_id, path=None):
+        """Return a JSON-ready description of a file reference and what builds it."""
+        project = self.project
+        targets = []
+        for target_id, phase_id in self.memberships(ref_id):
+            targets.append({
+                'target': project.objects[target_id].get('name') if target_id else None,
+                'phase': project.phase_name(phase_id) if phase_id else None,
+            })
+        return {'id': ref_id, 'name': project.display_name(ref_id),
+                'path': self.project.source_path(ref_id) if path is None else path,
+                'targets': targets}
+
+
+def _dir_prefix(directory):
+    if directory is None:
+        return None
+    directory = os.path.normpath(directory)
+    return '' if directory == '.' else directory + os.sep
+
+
+QUERIES = ('targets', 'files', 'unbuilt', 'missing', 'unreferenced', 'orphans')
+
+
+def run_query(project_path, query, args):
+    """Run one query on a project file; returns a JSON-ready result.
+
+    Raises ValueError for an unknown query or target and bad arguments.
+    """
+    if query not in QUERIES:
+        raise ValueError(f"Unknown query: {query}")
+    if query in ('targets', 'files') and not args:
+        raise ValueError(f"'{query}' needs an argument")
+    if query in ('files', 'unbuilt', 'missing') and len(args) > (2 if query == 'files' else 1):
+        raise ValueError(f"Too many arguments for '{query}'")
+    if query == 'orphans' and args:
+        raise ValueError("'orphans' takes no arguments")
+    base = project_base(project_path)
+    queries = ProjectQuery(XcodeProject.load(project_path))
+    project = queries.project
+    with xcode_trace.phase('query', query=query):
+        if query == 'targets':
+            refs = project.find_file_references_many(args)
+            return {name: [queries.record(ref_id) for ref_id in ids] for name, ids in refs.items()}
+        if query == 'files':
+            refs = queries.files_of_target(find_target(project, args[0]), *args[1:])
+            return [queries.record(ref_id) for ref_id in refs]
+        if query == 'unbuilt':
+            return [queries.record(ref_id, path) for ref_id, path in queries.unbuilt(*args)]
+        if query == 'missing':
+            return [queries.record(ref_id, path) for ref_id, path in queries.missing(base, *args)]
+        if query == 'unreferenced':
+            return queries.unreferenced(base, args or DEFAULT_ROOTS)
+        return [{'id': obj_id, 'isa': isa, 'name': project.display_name(obj_id)}
+                for obj_id, isa in queries.orphans()]
+
+
+def _describe(record):
+    built = ', '.join(f"{t['target'] or '(no target)'} ({t['phase'] or 'no phase'})"
+                      for t in record['targets'])
+    return f"{record['path'] or record['name']}: {built or 'not built'}"
+
+
+def print_result(query, result):
+    if query == 'targets':
+        for name, records in result.items():
+            if not records:
+                print(f"Not in project: {name}")
+            for record in records:
+                print(_describe(record))
+        return
+    if query == 'unreferenced':
+        for path in result:
+            print(path)
+    elif query == 'orphans':
+        for entry in result:
+            print(f"{entry['id']} {entry['isa']} {entry['name'] or ''}".rstrip())
+    else:
+        for record in result:
+            print(_describe(record) if query == 'files' else record['path'])
+    print(f"{len(result)} result(s).")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    as_json = '--json' in args
+    args = [a for a in args if a != '--json']
+    if len(args) < 2 or any(a.startswith('--') for a in args):
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    project_path, query, rest = args[0], args[1], args[2:]
+    try:
+        result = run_query(project_path, query, rest)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(2 if query not in QUERIES else 1)
+    if as_json:
+        import json
+
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print_result(query, result)
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Salvage what can be read from a project.pbxproj file that does not parse.
+
+The text is first cut at the places where Xcode's layout lets a reader
+resynchronize: the start of an object definition (a line indented by two
+tabs holding an ID and "= {"), section markers, and the top-level keys
+(archiveVersion, classes, objectVersion, objects, rootObject) indented by
+one tab. Each piece is then parsed on its own, so an unterminated string or a missing brace costs the one
+object it appears in instead of everything after it. One regex scan plus
+one parse of every piece keeps the whole recovery linear in the file size.
+
+Objects that parse are kept byte for byte; one missing its final ";" gets
+it back. Objects that don't parse, and text between objects that belongs to
+none, are dropped. Missing top-level keys are filled in (rootObject from
+the PBXProject object). The salvaged objects are written out in Xcode's
+section order and handed to xcode_dedupe, which renames repeated IDs and
+removes references to the objects that were dropped, and the result is
+checked with the normal parser. Every drop and repair is reported with its
+line number.
+
+The project is rewritten through the edit journal (xcode_journal.py), so
+the recovery can be undone. A project that already parses is left alone, so
+CI can run `xcode.py validate PROJECT || xcode.py recover PROJECT`.
+
+Usage: python3 xcode_recover.py path/to/project.pbxproj [--dry-run] [--output FILE]
+"""
+
+import re
+import sys
+
+import xcode_journal
+import xcode_trace
+from xcode_dedupe import SCALAR_KEYS, analyze, print_report as print_dedupe_report, repair
+from xcode_project import ParseError, XcodeProject, _Parser
+
+_ROOT_KEYS = ('archiveVersion', 'classes', 'objectVersion', 'objects', 'rootObject')
+_ROOT_DEFAULTS = {'archiveVersion': '1', 'classes': '{\n\t}', 'objectVersion': '46'}
+
+# Places to resynchronize at. The indentation is what tells an object from
+# a dictionary nested in one (TargetAttributes is keyed by object IDs too).
+_RESYNC_RE = re.compile(
+    r'^(?:'
+    r'\t\t(?P<obj>[^\s=;{}()"/]+)(?: /\*[^\n]*?\*/)? = \{'
+    r'|\t(?P<root>' + '|'.join(_ROOT_KEYS) + r') = '
+    r'|(?P<section>/\* (?:Begin|End) \w+ section \*/)'
+    r')',
+    re.MULTILINE,
+)
+_ISA_RE = re.compile(r'isa\s*=\s*(\w+)')
+_OFFSET_RE = re.compile(r' at offset \d+')
+_NO_ISA = "not an object with an isa"
+# What may sit between entries: comments, and the braces closing the
+# objects table and the file
+_FILLER_RE = re.compile(r'/\*.*?\*/|//[^\n]*|^[ \t]*\};?[ \t]*$', re.DOTALL | re.MULTILINE)
+
+
+class _EntryParser(_Parser):
+    """Parses a single "key = value;" and reports junk as a token."""
+
+    def _bad(self, pos):
+        return 'junk', self.text[pos:pos + 20], pos
+
+    def entry(self):
+        """Return (key, value, end, terminated) for the entry at the start.
+
+        end is the offset just past the ";", or past the value when the ";"
+        is missing.
+        """
+        key = self._string()
+        self._expect('=')
+        value = self._value(2)
+        if self.kind == ';':
+            end = self.offset + 1
+            self._advance()
+            return key, value, end, True
+        return key, value, self.offset, False
+
+
+def _pieces(text):
+    """Yield (kind, name, start, end) for the text between resync points."""
+    start = 0
+    kind = name = None
+    for match in _RESYNC_RE.finditer(text):
+        yield kind, name, start, match.start()
+        kind = match.lastgroup
+        name = match[kind]
+        start = match.start()
+    yield kind, name, start, len(text)
+
+
+def recover(text):
+    """Return (text, report) with every object that could be salvaged.
+
+    The report has "objects" (the number kept), "dropped" (line, what,
+    reason), "repaired" (line, description) and "dedupe" (the
+    xcode_dedupe report for the salvaged text). Raises ParseError if not
+    even the PBXProject object survives.
+    """
+    dropped = []
+    repaired = []
+    sections = {}
+    roots = {}
+    line = 1
+    line_pos = 0
+    with xcode_trace.phase('recover', bytes=len(text)) as p:
+        for kind, name, start, end in _pieces(text):
+            line += text.count('\n', line_pos, start)
+            line_pos = start
+            piece = text[start:end]
+            if kind == 'obj' or (kind == 'root' and name != 'objects'):
+                parser = _EntryParser(piece)
+                try:
+                    key, value, stop, terminated = parser.entry()
+                    if kind == 'obj' and not (isinstance(value, dict)
+                                              and isinstance(value.get('isa'), str)):
+                        raise ParseError(_NO_ISA)
+                except ParseError as e:
+                    if kind == 'obj':
+                        isa = _ISA_RE.search(piece)
+                        what = f"object {name} ({isa[1]})" if isa else f"object {name}"
+                    else:
+                        what = f"{name} entry"
+                    if str(e) == _NO_ISA:
+                        reason = _NO_ISA
+                    elif parser.kind == 'eof':
+                        reason = "cut off before it is closed"
+                    elif parser.kind == 'junk':
+                        reason = f"unreadable text {parser.value!r}"
+                    else:
+                        reason = _OFFSET_RE.sub('', str(e))
+                    dropped.append((line, what, reason))
+                    continue
+                definition = piece[:stop].strip()
+                if not terminated:
+                    definition += ';'
+                    repaired.append((line, f"added the missing ';' after {key}"))
+                if kind == 'obj':
+                    sections.setdefault(value['isa'], []).append(definition)
+                elif key in roots:
+                    dropped.append((line, f"{key} entry", "repeated"))
+                else:
+                    roots[key] = (definition, value)
+                rest = piece[stop:]
+            elif kind == 'root':
+                # "objects = {" opens the table the object pieces fill
+                rest = piece[piece.index('=') + 1:].lstrip(' \t')
+                rest = rest[1:] if rest.startswith('{') else rest
+            elif kind == 'section':
+                rest = piece[piece.index(name) + len(name):]
+            else:
+                # The text before the first resync point: the UTF-8 marker
+                # and the opening brace
+                rest = piece.replace('// !$*UTF8*$!', '', 1).replace('{', '', 1)
+            junk = _FILLER_RE.sub('', rest).strip()
+            if junk:
+                dropped.append((line + piece.count('\n', 0, len(piece) - len(rest)), "text",
+                                f"unreadable: {junk[:40]!r}"))
+
+        objects = sum(len(defs) for defs in sections.values())
+        if 'rootObject' not in roots:
+            projects = sections.get('PBXProject', ())
+            if not projects:
+                raise ParseError("no PBXProject object could be salvaged")
+            project_id = projects[0].split(None, 1)[0]
+            roots['rootObject'] = (f"rootObject = {project_id} /* Project object */;", None)
+            repaired.append((None, f"set rootObject to {project_id}"))
+        for key, value in _ROOT_DEFAULTS.items():
+            if key not in roots:
+                roots[key] = (f"{key} = {value};", None)
+                repaired.append((None, f"set {key} to {value.splitlines()[0]}"))
+
+        out = ['// !$*UTF8*$!\n{\n']
+        for key in ('archiveVersion', 'classes', 'objectVersion'):
+            out.append(f"\t{roots[key][0]}\n")
+        out.append('\tobjects = {\n')
+        for isa in sorted(sections):
+            out.append(f"\n/* Begin {isa} section */\n")
+            for definition in sections[isa]:
+                out.append(f"\t\t{definition}\n")
+            out.append(f"/* End {isa} section */\n")
+        out.append('\t};\n')
+        out.append(f"\t{roots['rootObject'][0]}\n}}\n")
+        salvaged = ''.join(out)
+
+        report = analyze(salvaged)
+        salvaged, report['remap'] = repair(salvaged, report)
+        # The normal parser has the last word
+        project = XcodeProject.parse(salvaged)
+        p.note(objects=objects, dropped=len(dropped))
+    return salvaged, {'objects': objects, 'dropped': dropped, 'repaired': repaired,
+                    'dedupe': report, 'missing': _missing_references(project)}
+
+
+def _missing_references(project):
+    """Return (object ID, key, ID) for single references to dropped objects.
+
+    xcode_dedupe removes list entries naming missing objects; a missing
+    mainGroup or buildConfigurationList has no such fix and is reported.
+    """
+    objects = project.objects
+    missing = []
+    root = project.data.get('rootObject')
+    if root not in objects:
+        missing.append(('', 'rootObject', root))
+    for obj_id, obj in objects.items():
+        for key in SCALAR_KEYS:
+            ref = obj.get(key)
+            if isinstance(ref, str) and ref not in objects:
+                missing.append((obj_id, key, ref))
+    return missing
+
+
+def recover_project(project_path, dry_run=False, output=None):
+    """Recover a project file in place (or into output); returns the report.
+
+    Returns None if the file parses and nothing needs recovering.
+    """
+    try:
+        XcodeProject.load(project_path)
+        return None
+    except ParseError:
+        pass
+    with open(project_path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    fixed, report = recover(text)
+    report['changed'] = fixed != text and not dry_run
+    if report['changed']:
+        if output is None:
+            xcode_journal.write(project_path, text, fixed, label='recover')
+        else:
+            xcode_journal.write_atomic(output, fixed)
+    return report
+
+
+def print_report(report):
+    for line, what, reason in report['dropped']:
+        print(f"line {line}: dropped {what}: {reason}")
+    for line, what in report['repaired']:
+        print(f"line {line}: {what}" if line else what)
+    print_dedupe_report(report['dedupe'])
+    for obj_id, key, ref in report['missing']:
+        owner = f"{obj_id} " if obj_id else ''
+        print(f"Warning: {owner}'{key}' still names dropped object {ref}")
+    print(f"Salvaged {report['objects']} object(s), dropped {len(report['dropped'])} piece(s).")
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    output = None
+    if '--output' in args:
+        i = args.index('--output')
+        output = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
+        if output is None:
+            args.append('--output')
+    dry_run = '--dry-run' in args
+    paths = [a for a in args if not a.startswith('--')]
+    if len(paths) != 1 or len(args) - dry_run != 1:
+        print('\n'.join(__doc__.strip().splitlines()[-1:]))
+        sys.exit(2)
+    try:
+        report = recover_project(paths[0], dry_run=dry_run, output=output)
+    except ParseError as e:
+        print(f"Error: cannot recover {paths[0]}: {e}")
+        sys.exit(1)
+    if report is None:
+        print("Nothing to do: the project file parses.")
+        return
+    print_report(report)
+    if report['changed']:
+        print(f"Recovered project written to {output or paths[0]}.")
+    else:
+        print("Dry run: no changes written.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
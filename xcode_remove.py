@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Remove files from an Xcode project by name.
+
+Each name is resolved to PBXFileReference IDs through the project's path
+index, matching whole path components only, and the removal cascades to the
+PBXBuildFile objects that build it, the group children lists and the build
+phase files lists. Any number of names is resolved in a single scan, so a
+bulk prune after a large refactor stays linear in the size of the project.
+
+Usage: python3 xcode_remove.py path/to/project.pbxproj NAME [NAME ...]
+       python3 xcode_remove.py path/to/project.pbxproj --from names.txt
+"""
+
+import sys
+
+import xcode_trace
+from xcode_transaction import ProjectTransaction
+
+
+def remove_files(project_path, names):
+    """Remove every file reference matching names; returns (removed, missing)."""
+    with ProjectTransaction(project_path) as txn:
+        missing = txn.remove_files_named(names)
+        removed = len(txn.operations)
+    return removed, missing
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    names = []
+    if '--from' in args:
+        i = args.index('--from')
+        if i + 1 >= len(args):
+            print(__doc__.strip().splitlines()[-1])
+            sys.exit(2)
+        with open(args[i + 1], 'r', encoding='utf-8') as f:
+            names.extend(line.strip() for line in f if line.strip())
+        del args[i:i + 2]
+    if not args or (len(args) == 1 and not names):
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    project_path = args[0]
+    names.extend(args[1:])
+
+    removed, missing = remove_files(project_path, names)
+    for name in missing:
+        print(f"Not in project: {name}")
+    if removed:
+        print(f"Removed {removed} file reference(s) from {project_path}")
+    else:
+        print("Nothing to do: none of the files are referenced in the project.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Edit build settings across targets and configurations in one write.
+
+Targets are looked up in the PBXNativeTarget index and their build
+configurations through the XCConfigurationList each one points at, so
+selecting every Release configuration of twenty targets costs a few dict
+lookups per target. All edits go into one ProjectTransaction: the project
+file is serialized and journaled once however many configurations change,
+and configurations that already hold the requested value are left alone.
+
+  set KEY=VALUE ...   set build settings (a value with spaces is kept as one
+                      string, as Xcode writes SWIFT_ACTIVE_COMPILATION_CONDITIONS)
+  remove KEY ...      remove build settings
+  shared              settings with the same value in more than one of the
+                      selected configurations, most repeated first
+  hoist FILE          move the settings every selected configuration shares
+                      into a new .xcconfig (relative to the folder holding the
+                      .xcodeproj) and base the configurations on it
+
+Every native target is selected unless --target names some (repeatable);
+--project selects the project's own configurations instead (add --target to
+have both). --config limits the selection to configurations with that name
+(repeatable). Hoisting keeps every effective value: a configuration's own
+settings sit just above its base .xcconfig, and the moved settings are
+identical in all of the configurations, so nothing that inherits from them
+sees a difference. Configurations that already have a base configuration
+are refused, as are values an .xcconfig cannot hold ("//" starts a comment
+there), which stay where they are. With --json, shared and hoist print JSON.
+
+Usage: python3 xcode_settings.py path/to/project.pbxproj COMMAND [ARGS ...]
+                                 [--target NAME ...] [--config NAME ...] [--project] [--json]
+"""
+
+import os
+import sys
+
+import xcode_trace
+from xcode_project import find_target, project_base
+from xcode_transaction import GroupResolver, ProjectTransaction
+
+COMMANDS = ('set', 'remove', 'shared', 'hoist')
+
+
+def select_configurations(project, targets=None, configs=None, project_level=False):
+    """Return (configuration ID, owner ID) pairs for the selection.
+
+    The owners are the native targets called targets (every native target
+    if none are named and project_level is false) and, with project_level,
+    the PBXProject. configs limits the result to configurations with those
+    names. Raises ValueError for a target or configuration name that
+    matches nothing.
+    """
+    owners = []
+    if project_level:
+        owners.append(project.data.get('rootObject'))
+    if targets:
+        owners.extend(find_target(project, name) for name in targets)
+    elif not project_level:
+        owners.extend(project.ids_with_isa('PBXNativeTarget'))
+    selected = []
+    for owner_id in owners:
+        list_id = project.objects.get(owner_id, {}).get('buildConfigurationList')
+        for config_id in project.objects.get(list_id, {}).get('buildConfigurations', ()):
+            if not configs or project.objects[config_id].get('name') in configs:
+                selected.append((config_id, owner_id))
+    for name in configs or ():
+        if not any(project.objects[config_id].get('name') == name for config_id, _ in selected):
+            raise ValueError(f"No configuration named {name} in the selected targets")
+    return selected
+
+
+def describe(project, config_id, owner_id):
+    """Return "Owner/Configuration" for reports."""
+    owner = project.objects[owner_id]
+    label = owner.get('name') if owner.get('isa') != 'PBXProject' else '(project)'
+    return f"{label}/{project.objects[config_id].get('name')}"
+
+
+def edit_settings(txn, config_ids, changes):
+    """Queue changes (key -> value, None to remove) on every configuration.
+
+    Returns (configuration ID, key, value) for each change queued.
+    """
+    queued = []
+    for config_id in config_ids:
+        for key, value in changes.items():
+            if txn.set_build_setting(config_id, key, value):
+                queued.append((config_id, key, value))
+    return queued
+
+
+def shared_settings(project, config_ids):
+    """Return the key/value pairs set the same way in several configurations.
+
+    Each entry is a dict with "key", "value" and "configurations" (the IDs
+    holding it), most widely shared first.
+    """
+    seen = {}
+    for config_id in config_ids:
+        for key, value in project.objects[config_id].get('buildSettings', {}).items():
+            frozen = tuple(value) if isinstance(value, list) else value
+            entry = seen.get((key, frozen))
+            if entry is None:
+                entry = seen[(key, frozen)] = {'key': key, 'value': value, 'configurations': []}
+            entry['configurations'].append(config_id)
+    shared = [entry for entry in seen.values() if len(entry['configurations']) > 1]
+    shared.sort(key=lambda entry: (-len(entry['configurations']), entry['key']))
+    return shared
+
+
+def xcconfig_value(value):
+    """Return value as written in an .xcconfig, or None if it cannot be."""
+    items = value if isinstance(value, list) else [value]
+    if not all(isinstance(item, str) for item in items):
+        return None
+    if any('//' in item or '\n' in item or (' ' in item and '"' in item) for item in items):
+        return None
+    if isinstance(value, list):
+        return ' '.join(f'"{item}"' if ' ' in item or not item else item for item in items)
+    return value
+
+
+def hoist_settings(project_path, path, selection, txn=None):
+    """Move the settings all selected configurations share into path.
+
+    selection is a list from select_configurations. path is relative to
+    the folder holding the .xcodeproj and must not exist yet. Returns a
+    dict with the "file" written, the "settings" moved and the keys
+    "skipped" because an .xcconfig cannot hold their values.
+    """
+    if txn is None:
+        txn = ProjectTransaction(project_path)
+    project = txn.project
+    config_ids = [config_id for config_id, _ in selection]
+    if len(config_ids) < 2:
+        raise ValueError("Hoisting needs at least two configurations")
+    for config_id, owner_id in selection:
+        if project.objects[config_id].get('baseConfigurationReference'):
+            raise ValueError(f"{describe(project, config_id, owner_id)} already has a "
+                             "base configuration")
+    base = project_base(project_path)
+    rel = os.path.relpath(os.path.join(base, path), base)
+    if os.path.exists(os.path.join(base, rel)):
+        raise ValueError(f"{rel} already exists")
+
+    settings = {}
+    skipped = []
+    for entry in shared_settings(project, config_ids):
+        if len(entry['configurations']) < len(config_ids):
+            break
+        text = xcconfig_value(entry['value'])
+        if text is None:
+            skipped.append(entry['key'])
+        else:
+            settings[entry['key']] = text
+            edit_settings(txn, config_ids, {entry['key']: None})
+    if not settings:
+        return {'file': None, 'settings': {}, 'skipped': skipped}
+
+    groups = GroupResolver(txn)
+    ref_id, _ = txn.add_file(os.path.basename(rel), groups.group_for(os.path.dirname(rel)))
+    for config_id in config_ids:
+        txn.set_base_configuration(config_id, ref_id)
+    os.makedirs(os.path.dirname(os.path.join(base, rel)), exist_ok=True)
+    with open(os.path.join(base, rel), 'x', encoding='utf-8') as f:
+        f.write(f"// Build settings shared by {len(config_ids)} configurations\n\n")
+        for key in sorted(settings):
+            f.write(f"{key} = {settings[key]}\n")
+    try:
+        txn.commit(label=f"hoist {len(settings)} setting(s) into {rel}")
+    except BaseException:
+        os.remove(os.path.join(base, rel))
+        raise
+    return {'file': rel, 'settings': settings, 'skipped': skipped}
+
+
+def _parse_assignments(args):
+    changes = {}
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        if not sep or not key:
+            raise ValueError(f"Expected KEY=VALUE, got {arg}")
+        changes[key] = value
+    return changes
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    options = {'--target': [], '--config': []}
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in options and i + 1 < len(args):
+            options[args[i]].append(args[i + 1])
+            i += 2
+            continue
+        if not args[i].startswith('--'):
+            positional.append(args[i])
+        i += 1
+    if len(positional) < 2 or positional[1] not in COMMANDS:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+    project_path, command, rest = positional[0], positional[1], positional[2:]
+    if len(rest) != {'set': max(len(rest), 1), 'remove': max(len(rest), 1),
+                     'shared': 0, 'hoist': 1}[command]:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+
+    try:
+        txn = ProjectTransaction(project_path)
+        project = txn.project
+        selection = select_configurations(project, options['--target'], options['--config'],
+                                          project_level='--project' in args)
+        owners = dict(selection)
+        if command == 'shared':
+            result = shared_settings(project, list(owners))
+        elif command == 'hoist':
+            result = hoist_settings(project_path, rest[0], selection, txn=txn)
+        else:
+            changes = (_parse_assignments(rest) if command == 'set'
+                       else dict.fromkeys(rest))
+            queued = edit_settings(txn, list(owners), changes)
+            txn.commit(label=f"settings {command} {', '.join(changes)}")
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if command in ('set', 'remove'):
+        for config_id, key, value in queued:
+            where = describe(project, config_id, owners[config_id])
+            print(f"~ {where}: {key} = {value}" if value is not None else f"- {where}: {key}")
+        print(f"Changed {len(queued)} setting(s) in {len({q[0] for q in queued})} "
+              f"of {len(owners)} configuration(s)." if queued
+              else "Nothing to do: every configuration already matches.")
+        return
+    if '--json' in args:
+        import json
+
+        if command == 'shared':
+            for entry in result:
+                entry['configurations'] = [describe(project, config_id, owners[config_id])
+                                           for config_id in entry['configurations']]
+        json.dump(result, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif command == 'shared':
+        for entry in result:
+            count = len(entry['configurations'])
+            mark = '*' if count == len(owners) else ' '
+            print(f"{mark} {count:>4}  {entry['key']} = {entry['value']}")
+        common = sum(1 for entry in result if len(entry['configurations']) == len(owners))
+        print(f"{len(result)} shared setting(s), {common} in all {len(owners)} "
+              f"configuration(s) (*, hoistable).")
+    else:
+        for key, value in result['settings'].items():
+            print(f"^ {key} = {value}")
+        for key in result['skipped']:
+            print(f"  {key}: not representable in an .xcconfig, left in place")
+        if result['file']:
+            print(f"Hoisted {len(result['settings'])} setting(s) from {len(owners)} "
+                  f"configuration(s) into {result['file']}")
+        else:
+            print("Nothing to do: no setting is shared by every selected configuration.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
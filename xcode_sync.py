@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Keep an Xcode project in sync with its source folders.
+
+The source roots (Jamminverz/ and Shared/ by default) are walked with a
+thread pool, one task per subtree below the first few levels, and the files
+found are compared with where the project's file references point on disk. The result is three
+lists:
+
+- additions: files on disk that no reference points at
+- deletions: references under a root whose file no longer exists
+- moves: references whose file exists but whose group does not match its
+  directory, plus missing references whose file turned up (by name) in a
+  different directory
+
+By default the plan is only printed; with --apply it is committed as one
+ProjectTransaction, creating groups for new directories as needed. A dry
+run with --mmap plans from a memory-mapped view of the project instead of
+parsing it fully, for project files too large to hold in memory.
+
+Usage: python3 xcode_sync.py path/to/project.pbxproj [--apply | --mmap] [--root DIR ...]
+                             [--target NAME] [--deterministic]
+"""
+
+import os
+import sys
+
+import xcode_trace
+from xcode_project import FILE_TYPES, XcodeProject, find_target, project_base
+from xcode_transaction import GroupResolver, ProjectTransaction, phase_for
+
+DEFAULT_ROOTS = ('Jamminverz', 'Shared')
+
+# Files that live next to the sources but are not referenced as files
+IGNORED_NAMES = frozenset(['Info.plist'])
+
+# scan_sources splits the tree into subtrees at most this many levels down,
+# stopping earlier once there are this many subtrees per worker
+_SPLIT_DEPTH = 3
+_DIRS_PER_WORKER = 2
+
+
+def classify(name, is_dir):
+    """Return "file", "dir" or None for a directory entry named name.
+
+    Directories with a known extension (asset catalogs, ...) are bundles
+    and count as single files; hidden and ignored entries give None.
+    """
+    if name.startswith('.') or name in IGNORED_NAMES:
+        return None
+    ext = os.path.splitext(name)[1]
+    if ext in FILE_TYPES:
+        return 'file'
+    if is_dir and ext not in ('.xcodeproj', '.xcworkspace'):
+        return 'dir'
+    return None
+
+
+def _scan_dir(base, rel_dir):
+    """List one directory; returns (files, subdirectories), both relative to base."""
+    files = []
+    subdirs = []
+    with os.scandir(os.path.join(base, rel_dir)) as entries:
+        for entry in entries:
+            kind = classify(entry.name, entry.is_dir(follow_symlinks=False))
+            if kind == 'file':
+                files.append(os.path.join(rel_dir, entry.name))
+            elif kind == 'dir':
+                subdirs.append(os.path.join(rel_dir, entry.name))
+    return files, subdirs
+
+
+def _scan_tree(base, rel_dir):
+    """Walk one subtree serially; returns the files in it, relative to base."""
+    files = []
+    stack = [rel_dir]
+    while stack:
+        found, subdirs = _scan_dir(base, stack.pop())
+        files.extend(found)
+        stack.extend(subdirs)
+    return files
+
+
+def scan_sources(base, roots=DEFAULT_ROOTS, workers=None):
+    """Walk the roots under base; returns a set of relative paths.
+
+    The top levels are listed in this thread, breadth first, until there
+    are enough directories to give every worker a few (or _SPLIT_DEPTH
+    levels are done); each of those subtrees is then walked serially by one
+    task. With workers=1, or a tree that never fans out, nothing is
+    submitted. On a warm page cache the listing is mostly Python work under
+    the GIL, so the pool gains little over workers=1; it pays off where
+    each directory listing waits on the disk or a network file system.
+    """
+    if workers is None:
+        # ThreadPoolExecutor's own default
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    found = set()
+    dirs = [root for root in roots if os.path.isdir(os.path.join(base, root))]
+    for _ in range(_SPLIT_DEPTH):
+        if workers == 1 or not dirs or len(dirs) >= workers * _DIRS_PER_WORKER:
+            break
+        subdirs = []
+        for rel_dir in dirs:
+            files, below = _scan_dir(base, rel_dir)
+            found.update(files)
+            subdirs.extend(below)
+        dirs = subdirs
+    if workers == 1 or len(dirs) <= 1:
+        for rel_dir in dirs:
+            found.update(_scan_tree(base, rel_dir))
+        return found
+
+    # Imported here: concurrent.futures pulls in logging, which would
+    # double the start-up time of commands that never scan
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for files in pool.map(_scan_tree, [base] * len(dirs), dirs):
+            found.update(files)
+    return found
+
+
+def _under(path, roots):
+    return any(path == root or path.startswith(root + os.sep) for root in roots)
+
+
+def plan_sync(project, on_disk, roots=DEFAULT_ROOTS, renames=None):
+    """Compare scanned files with the project; returns a dict of changes.
+
+    "add" lists relative paths, "remove" (ref ID, path) pairs and "move"
+    (ref ID, old path, new path) triples. renames maps old paths to new
+    ones for files known to have been renamed, which become moves even
+    when the file name changed.
+    """
+    renames = renames or {}
+    roots = [os.path.normpath(root) for root in roots]
+    referenced = {}
+    for ref_id in project.by_isa.get('PBXFileReference', ()):
+        path = project.source_path(ref_id)
+        if path and _under(path, roots):
+            referenced.setdefault(path, []).append(ref_id)
+
+    added = {path: None for path in sorted(on_disk) if path not in referenced}
+    by_name = {}
+    for path in added:
+        by_name.setdefault(os.path.basename(path), []).append(path)
+
+    moves = []
+    removals = []
+    for path, ref_ids in referenced.items():
+        for ref_id in ref_ids:
+            if path in on_disk:
+                if project.objects[ref_id].get('sourceTree', '<group>') != '<group>':
+                    continue
+                group_path = project.source_path(project.parent.get(ref_id))
+                if group_path is not None and group_path != os.path.dirname(path):
+                    moves.append((ref_id, path, path))
+                continue
+            # Any source tree may move here: apply_sync rewrites the
+            # reference as "<group>"-relative to the file's new directory
+            candidates = by_name.get(os.path.basename(path), [])
+            if renames.get(path) in added:
+                candidates = [renames[path]]
+            if len(candidates) == 1 and candidates[0] in added:
+                del added[candidates[0]]
+                moves.append((ref_id, path, candidates[0]))
+            else:
+                removals.append((ref_id, path))
+    return {'add': list(added), 'remove': removals, 'move': moves}
+
+
+def apply_sync(txn, plan, target_id=None):
+    """Queue every change in plan on txn; the caller commits."""
+    project = txn.project
+    if target_id is None:
+        targets = project.ids_with_isa('PBXNativeTarget')
+        target_id = targets[0] if targets else None
+    groups = GroupResolver(txn)
+    for ref_id, old_path, new_path in plan['move']:
+        # The group mirrors the file's directory, so the new path is the
+        # bare file name relative to it, whatever tree the reference used
+        new_name = os.path.basename(new_path)
+        name = project.objects[ref_id].get('name')
+        renamed = name == os.path.basename(old_path) and new_name != name
+        txn.move_file(ref_id, groups.group_for(os.path.dirname(new_path)),
+                      path=new_name, source_tree='<group>',
+                      name=new_name if renamed else None)
+    for path in plan['add']:
+        txn.add_file(os.path.basename(path), groups.group_for(os.path.dirname(path)),
+                     phase_for(project, path, target_id))
+    for ref_id, _ in plan['remove']:
+        txn.remove_file(ref_id)
+
+
+def sync_project(project_path, roots=DEFAULT_ROOTS, apply=False, target=None,
+                 deterministic=False, mapped=False):
+    """Scan, plan and optionally apply a sync; returns the plan.
+
+    With mapped (ignored when applying) the plan comes from a MappedProject.
+    """
+    base = project_base(project_path)
+    with xcode_trace.phase('scan'):
+        on_disk = scan_sources(base, roots)
+    if mapped and not apply:
+        from xcode_mmap import MappedProject
+
+        with MappedProject(project_path) as project, xcode_trace.phase('plan'):
+            return plan_sync(project, on_disk, roots)
+    project = XcodeProject.load(project_path)
+    with xcode_trace.phase('plan'):
+        plan = plan_sync(project, on_disk, roots)
+    if apply:
+        target_id = find_target(project, target) if target is not None else None
+        txn = ProjectTransaction(project, deterministic_ids=deterministic)
+        apply_sync(txn, plan, target_id)
+        plan['applied'] = txn.commit()
+    return plan
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    roots = []
+    target = None
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--root', '--target') and i + 1 < len(args):
+            if args[i] == '--root':
+                roots.append(args[i + 1])
+            else:
+                target = args[i + 1]
+            i += 2
+            continue
+        if not args[i].startswith('--'):
+            positional.append(args[i])
+        i += 1
+    if len(positional) != 1:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+
+    plan = sync_project(positional[0], roots or DEFAULT_ROOTS, apply='--apply' in args,
+                        target=target, deterministic='--deterministic' in args,
+                        mapped='--mmap' in args)
+    for path in plan['add']:
+        print(f"+ {path}")
+    for _, path in plan['remove']:
+        print(f"- {path}")
+    for _, old_path, new_path in plan['move']:
+        print(f"~ {old_path} -> {new_path}" if old_path != new_path else f"~ {new_path} (group)")
+    if not (plan['add'] or plan['remove'] or plan['move']):
+        print("Nothing to do: the project matches the source folders.")
+    elif 'applied' in plan:
+        print(f"Applied {plan['applied']} change(s).")
+    else:
+        print("Run with --apply to update the project.")
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
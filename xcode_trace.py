@@ -0,0 +1,246 @@
+"""
+Opt-in phase instrumentation for the pbxproj scripts.
+
+The library marks its phases (read, parse, index, mutate, serialize, write,
+plus scan/plan/analyze in the sync and dedupe tools) with
+
+    with phase('parse'):
+        ...
+
+which costs one function call when tracing is off. A script turns tracing
+on by calling setup(sys.argv) before its main(); that strips these flags
+from argv so the script's own argument handling never sees them:
+
+  --trace-json FILE   record wall time, CPU time and peak RSS of every
+                      phase and write them to FILE as Chrome trace events
+                      (load it in chrome://tracing or https://ui.perfetto.dev)
+  --profile PHASE     run cProfile during every occurrence of PHASE and dump
+                      the stats to xcode-PHASE.prof (read with pstats or
+                      snakeviz); profiling parse or index bypasses the
+                      snapshot cache, whose loads run neither
+
+With either flag a per-phase summary, followed by any counters recorded with
+count(), is printed to stderr on exit.
+"""
+
+import _thread
+import atexit
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_tracer = None
+
+
+def _max_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class _NullPhase:
+    """Stand-in returned by phase() while tracing is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def note(self, **args):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self._profiling = False
+
+    def note(self, **args):
+        """Attach extra values (byte counts, object counts, ...) to the event."""
+        self.args.update(args)
+
+    def __enter__(self):
+        tracer = self.tracer
+        self._rss = _max_rss_kb()
+        self._cpu = time.process_time()
+        self._wall = time.perf_counter()
+        if tracer.profiler is not None and self.name == tracer.profile_phase and not tracer.profiling:
+            tracer.profiling = self._profiling = tracer.profiled = True
+            tracer.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        tracer = self.tracer
+        if self._profiling:
+            tracer.profiler.disable()
+            tracer.profiling = False
+        rss = _max_rss_kb()
+        args = dict(self.args, cpu_ms=round((cpu - self._cpu) * 1000, 3))
+        if rss is not None:
+            args['max_rss_kb'] = rss
+            args['max_rss_growth_kb'] = rss - self._rss
+        tracer.record(self.name, self._wall, wall, args)
+        return False
+
+
+class Tracer:
+    """Collects phase events and writes them as a Chrome trace."""
+
+    def __init__(self, trace_path=None, profile_phase=None):
+        self.trace_path = trace_path
+        self.profile_phase = profile_phase
+        self.profiler = None
+        if profile_phase:
+            import cProfile
+            self.profiler = cProfile.Profile()
+        self.profiling = False
+        self.profiled = False
+        self.origin = time.perf_counter()
+        self.events = []
+        self.counters = {}
+
+    def phase(self, name, **args):
+        return _Phase(self, name, args)
+
+    def record(self, name, start, end, args):
+        self.events.append({
+            'name': name,
+            'cat': 'xcode',
+            'ph': 'X',
+            'ts': round((start - self.origin) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': _thread.get_ident(),
+            'args': args,
+        })
+        if 'max_rss_kb' in args:
+            self.events.append({
+                'name': 'max RSS', 'cat': 'xcode', 'ph': 'C',
+                'ts': round((end - self.origin) * 1e6, 1), 'pid': os.getpid(),
+                'args': {'MB': round(args['max_rss_kb'] / 1024, 1)},
+            })
+
+    def count(self, name, n=1):
+        value = self.counters[name] = self.counters.get(name, 0) + n
+        self.events.append({
+            'name': name, 'cat': 'xcode', 'ph': 'C',
+            'ts': round((time.perf_counter() - self.origin) * 1e6, 1), 'pid': os.getpid(),
+            'args': {name: value},
+        })
+
+    def summary(self):
+        """Return per-phase totals as (name, count, wall ms, cpu ms, max RSS kb)."""
+        totals = {}
+        for event in self.events:
+            if event['ph'] != 'X':
+                continue
+            entry = totals.setdefault(event['name'], [0, 0.0, 0.0, None])
+            entry[0] += 1
+            entry[1] += event['dur'] / 1000
+            entry[2] += event['args']['cpu_ms']
+            rss = event['args'].get('max_rss_kb')
+            if rss is not None:
+                entry[3] = max(rss, entry[3] or 0)
+        return [(name, *entry) for name, entry in totals.items()]
+
+    def write(self, path):
+        import json
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+            f.write('\n')
+
+
+def phase(name, **args):
+    """Context manager timing one phase; a no-op unless tracing is enabled."""
+    if _tracer is None:
+        return _NULL_PHASE
+    return _tracer.phase(name, **args)
+
+
+def count(name, n=1):
+    """Add n to a named counter (cache hits, ...); a no-op unless tracing is enabled."""
+    if _tracer is not None:
+        _tracer.count(name, n)
+
+
+def profiling(name):
+    """Return True if --profile asked for phase name in this process."""
+    return _tracer is not None and _tracer.profile_phase == name
+
+
+def enable(trace_path=None, profile_phase=None):
+    """Start tracing for the rest of the process and return the Tracer."""
+    global _tracer
+    _tracer = Tracer(trace_path, profile_phase)
+    return _tracer
+
+
+def disable():
+    """Stop tracing; returns the Tracer that was active, if any."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def _pop_option(argv, flag):
+    if flag not in argv:
+        return None
+    i = argv.index(flag)
+    if i + 1 >= len(argv):
+        sys.exit(f"{flag} needs a value")
+    value = argv[i + 1]
+    del argv[i:i + 2]
+    return value
+
+
+def setup(argv):
+    """Handle --trace-json/--profile in argv (in place) for a script's main.
+
+    Returns the Tracer, or None when neither flag was given.
+    """
+    trace_path = _pop_option(argv, '--trace-json')
+    profile_phase = _pop_option(argv, '--profile')
+    if trace_path is None and profile_phase is None:
+        return None
+    tracer = enable(trace_path, profile_phase)
+    command = tracer.phase(os.path.basename(argv[0]) if argv else 'main')
+    command.__enter__()
+
+    def finish():
+        command.__exit__(None, None, None)
+        disable()
+        print(f"{'phase':<24} {'count':>5} {'wall ms':>10} {'cpu ms':>10} {'max RSS MB':>11}",
+              file=sys.stderr)
+        for name, count, wall, cpu, rss in tracer.summary():
+            rss_text = f"{rss / 1024:>11.1f}" if rss is not None else f"{'-':>11}"
+            print(f"{name:<24} {count:>5} {wall:>10.1f} {cpu:>10.1f} {rss_text}", file=sys.stderr)
+        for name, value in sorted(tracer.counters.items()):
+            print(f"{name:<24} {value:>5}", file=sys.stderr)
+        if trace_path:
+            tracer.write(trace_path)
+            print(f"Trace written to {trace_path}", file=sys.stderr)
+        if tracer.profiler is not None and not tracer.profiled:
+            print(f"Phase '{profile_phase}' never ran; no cProfile stats written", file=sys.stderr)
+        elif tracer.profiler is not None:
+            profile_path = f"xcode-{profile_phase}.prof"
+            tracer.profiler.dump_stats(profile_path)
+            print(f"cProfile stats for '{profile_phase}' written to {profile_path}", file=sys.stderr)
+
+    atexit.register(finish)
+    return tracer
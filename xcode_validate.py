@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Check project.pbxproj files without changing them.
+
+Each file must parse, and must have no repeated object IDs, build files
+whose fileRef is missing or list entries naming missing objects (the
+problems xcode_dedupe.py repairs). Problems are printed and the exit status
+is 1 if any file has one, so the command can run as a pre-commit hook; a
+clean file costs one parse, or a snapshot load from xcode_cache when the
+file has not changed since the last run, and the dedupe tool's set
+comparison.
+
+Usage: python3 xcode_validate.py path/to/project.pbxproj [...]
+"""
+
+import sys
+
+import xcode_trace
+from xcode_dedupe import analyze, has_problems
+from xcode_project import ParseError, XcodeProject
+
+
+def validate(project_path):
+    """Return a list of problems found in a project file, empty if it is clean."""
+    try:
+        text = XcodeProject.load(project_path).source
+    except OSError as e:
+        return [f"cannot be read: {e.strerror}"]
+    except ParseError as e:
+        return [f"does not parse: {e} (`xcode.py recover` salvages what it can)"]
+    with xcode_trace.phase('analyze'):
+        if not has_problems(text):
+            return []
+        report = analyze(text)
+    problems = []
+    for obj_id, definitions in report['definitions'].items():
+        problems.append(f"duplicate ID {obj_id} ({', '.join(isa for _, isa, _ in definitions)})")
+    for obj_id, ref_id, _ in report['dangling_file_refs']:
+        problems.append(f"build file {obj_id} points at missing fileRef {ref_id}")
+    for key, obj_id, _ in report['dangling_entries']:
+        problems.append(f"'{key}' lists missing object {obj_id}")
+    return problems
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths or any(p.startswith('--') for p in paths):
+        print(__doc__.strip().splitlines()[-1])
+        sys.exit(2)
+    failed = False
+    for path in paths:
+        for problem in validate(path):
+            print(f"{path}: {problem}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Watch the source folders and keep the Xcode project in sync as files appear.
+
+The project is parsed once and kept in memory. File system events come from
+inotify on Linux (through ctypes, no extra packages) and from a polling scan
+elsewhere. Events are collected until the folders have been quiet for the
+debounce window, then the whole batch is planned with xcode_sync and written
+as one atomic save, so a code generator that emits fifty files in a burst
+costs one rewrite instead of fifty process starts, parses and writes. A
+batch is never held back longer than --max-wait, however steadily events
+keep arriving.
+
+If something else (Xcode, git, another script) rewrites project.pbxproj, the
+next flush notices the changed size/mtime and re-parses before editing. A
+file that does not parse (caught in the middle of a merge, say) leaves the
+last good project in memory and the pending batch unwritten until a later
+event brings a version that does.
+
+Usage: python3 xcode_watch.py path/to/project.pbxproj [--root DIR ...]
+                              [--debounce SECONDS] [--max-wait SECONDS] [--poll] [--deterministic]
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import xcode_trace
+from xcode_project import ParseError, XcodeProject
+from xcode_sync import DEFAULT_ROOTS, apply_sync, classify, plan_sync, scan_sources
+from xcode_transaction import ProjectTransaction
+
+# inotify event bits (<sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+               | IN_DELETE | IN_DELETE_SELF)
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Recursive directory watcher on top of the Linux inotify syscalls."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}
+
+    def add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.paths[wd] = path
+
+    def add_tree(self, path):
+        """Watch path and every directory below it."""
+        self.add_watch(path)
+        for dirpath, dirnames, _ in os.walk(path):
+            dirnames[:] = [d for d in dirnames if classify(d, True) == 'dir']
+            for d in dirnames:
+                self.add_watch(os.path.join(dirpath, d))
+
+    def read(self, timeout):
+        """Wait up to timeout seconds; returns a list of (mask, cookie, path)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 1 << 16)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            base = self.paths.get(wd)
+            if base is None and not mask & IN_Q_OVERFLOW:
+                continue
+            path = os.path.join(base, os.fsdecode(name)) if base and name else base
+            events.append((mask, cookie, path))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if classify(os.path.basename(path), True) == 'dir':
+                    self.add_tree(path)
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that rescans the trees and diffs file lists."""
+
+    def __init__(self, base, roots, interval=1.0):
+        self.base = base
+        self.roots = roots
+        self.interval = interval
+        self.files = scan_sources(base, roots)
+
+    def add_tree(self, path):
+        pass
+
+    def read(self, timeout):
+        time.sleep(min(timeout, self.interval) if timeout is not None else self.interval)
+        files = scan_sources(self.base, self.roots)
+        events = [(IN_CREATE, 0, os.path.join(self.base, p)) for p in files - self.files]
+        events += [(IN_DELETE, 0, os.path.join(self.base, p)) for p in self.files - files]
+        self.files = files
+        return events
+
+    def close(self):
+        pass
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class ProjectWatcher:
+    """Resident project plus the batching logic between events and writes."""
+
+    def __init__(self, project_path, roots=DEFAULT_ROOTS, debounce=0.3, max_wait=5.0,
+                 deterministic=False, poll=False, log=print):
+        self.project_path = os.path.abspath(project_path)
+        self.base = os.path.dirname(os.path.dirname(self.project_path))
+        self.roots = [os.path.normpath(root) for root in roots]
+        self.debounce = debounce
+        self.max_wait = max_wait
+        self.deterministic = deterministic
+        self.log = log
+        self.project = None
+        self._stat = None
+        self._unparsed = None
+        self.reload()
+        self.on_disk = scan_sources(self.base, self.roots)
+        self._created = set()
+        self._deleted = set()
+        self._renames = {}
+        self._moved_from = {}
+
+        watcher = None
+        if not poll and sys.platform.startswith('linux'):
+            try:
+                watcher = InotifyWatcher()
+            except OSError:
+                watcher = None
+        if watcher is None:
+            watcher = PollingWatcher(self.base, self.roots)
+        self.watcher = watcher
+        for root in self.roots:
+            full = os.path.join(self.base, root)
+            if os.path.isdir(full):
+                watcher.add_tree(full)
+        if isinstance(watcher, InotifyWatcher):
+            watcher.add_watch(os.path.dirname(self.project_path))
+
+    def reload(self):
+        """Parse the project file again and remember its size/mtime.
+
+        Returns False, keeping the last good project and the old size/mtime
+        (so the next check tries again), if the file does not parse. The
+        first load has nothing to fall back on and raises instead.
+        """
+        stat = _stat_key(self.project_path)
+        try:
+            project = XcodeProject.load(self.project_path)
+        except ParseError as e:
+            if self.project is None:
+                raise
+            self._unparsed = stat
+            self.log(f"Project does not parse ({e}); keeping the last good copy")
+            return False
+        self.project = project
+        self._stat = stat
+        return True
+
+    def reload_if_changed(self):
+        """Re-parse only if the file changed since we last read or wrote it.
+
+        A version that already failed to parse is not parsed again.
+        """
+        stat = _stat_key(self.project_path)
+        if stat != self._stat and stat != self._unparsed and self.reload():
+            self.log("Project changed on disk; reloaded")
+            return True
+        return False
+
+    @property
+    def pending(self):
+        return bool(self._created or self._deleted or self._renames)
+
+    def _relative(self, path):
+        rel = os.path.relpath(path, self.base)
+        return rel if not rel.startswith('..') else None
+
+    def handle(self, mask, cookie, path):
+        """Fold one event into the pending batch."""
+        if mask & IN_Q_OVERFLOW:
+            # Events were lost; fall back to a full rescan on the next flush
+            current = scan_sources(self.base, self.roots)
+            self._created.update(current - self.on_disk)
+            self._deleted.update(self.on_disk - current)
+            return
+        if path == self.project_path:
+            self.reload_if_changed()
+            return
+        rel = self._relative(path)
+        if rel is None or not any(rel == r or rel.startswith(r + os.sep) for r in self.roots):
+            return
+        is_dir = bool(mask & IN_ISDIR)
+        kind = classify(os.path.basename(rel), is_dir)
+        if kind == 'dir':
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                self._created.update(scan_sources(self.base, [rel]))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                prefix = rel + os.sep
+                self._deleted.update(p for p in self.on_disk if p.startswith(prefix))
+            return
+        if kind != 'file':
+            return
+        if mask & (IN_CREATE | IN_MOVED_TO | IN_CLOSE_WRITE):
+            self._deleted.discard(rel)
+            self._created.add(rel)
+            old = self._moved_from.pop(cookie, None) if mask & IN_MOVED_TO else None
+            if old is not None:
+                self._renames[old] = rel
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self._created.discard(rel)
+            self._deleted.add(rel)
+            if mask & IN_MOVED_FROM:
+                self._moved_from[cookie] = rel
+
+    def flush(self):
+        """Apply the pending batch as one transaction; returns the change count."""
+        with xcode_trace.phase('flush'):
+            return self._flush()
+
+    def _flush(self):
+        self.reload_if_changed()
+        if _stat_key(self.project_path) != self._stat:
+            # Editing the stale copy would overwrite whatever is on disk;
+            # keep the batch for when the file parses again
+            return 0
+        self.on_disk.difference_update(self._deleted)
+        self.on_disk.update(p for p in self._created
+                            if os.path.exists(os.path.join(self.base, p)))
+        with xcode_trace.phase('plan'):
+            plan = plan_sync(self.project, self.on_disk, self.roots, self._renames)
+        self._created.clear()
+        self._deleted.clear()
+        self._renames.clear()
+        self._moved_from.clear()
+        if not (plan['add'] or plan['remove'] or plan['move']):
+            return 0
+        txn = ProjectTransaction(self.project, deterministic_ids=self.deterministic)
+        apply_sync(txn, plan)
+        applied = txn.commit()
+        self._stat = _stat_key(self.project_path)
+        self.log(f"Synced: {len(plan['add'])} added, {len(plan['remove'])} removed, "
+                 f"{len(plan['move'])} moved")
+        return applied
+
+    def run(self, stop_after=None):
+        """Process events until interrupted (or stop_after seconds have passed)."""
+        started = time.monotonic()
+        self.flush()
+        first_event = last_event = None
+        try:
+            while stop_after is None or time.monotonic() - started < stop_after:
+                timeout = self.debounce if last_event is not None else 1.0
+                events = self.watcher.read(timeout)
+                for mask, cookie, path in events:
+                    self.handle(mask, cookie, path)
+                now = time.monotonic()
+                if events:
+                    last_event = now
+                    if first_event is None:
+                        first_event = now
+                if last_event is None:
+                    continue
+                if now - last_event >= self.debounce or now - first_event >= self.max_wait:
+                    if self.pending:
+                        self.flush()
+                    # A batch the flush had to keep is retried a window later
+                    first_event = last_event = now if self.pending else None
+        finally:
+            self.watcher.close()
+
+
+def main(argv=None):
+    args = list(sys.argv[1:] if argv is None else argv)
+    roots = []
+    debounce = 0.3
+    max_wait = 5.0
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] in ('--root', '--debounce', '--max-wait') and i + 1 < len(args):
+            if args[i] == '--root':
+                roots.append(args[i + 1])
+            elif args[i] == '--debounce':
+                debounce = float(args[i + 1])
+            else:
+                max_wait = float(args[i + 1])
+            i += 2
+            continue
+        if not args[i].startswith('--'):
+            positional.append(args[i])
+        i += 1
+    if len(positional) != 1:
+        print('\n'.join(__doc__.strip().splitlines()[-2:]))
+        sys.exit(2)
+
+    watcher = ProjectWatcher(positional[0], roots or DEFAULT_ROOTS, debounce=debounce,
+                             max_wait=max_wait, deterministic='--deterministic' in args, poll='--poll' in args)
+    print(f"Watching {', '.join(watcher.roots)} ({type(watcher.watcher).__name__}); "
+          "press Ctrl-C to stop")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    xcode_trace.setup(sys.argv)
+    main()